@@ -1,12 +1,28 @@
+import asyncio
+import multiprocessing
 import os
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from typing import Optional
 
 import jwt
-from passlib.context import CryptContext
 
-# Use pbkdf2_sha256 as default to avoid bcrypt 72-byte limitation in some envs
-pwd_context = CryptContext(schemes=["pbkdf2_sha256", "bcrypt"], deprecated="auto")
+_pwd_context = None
+
+
+def _get_pwd_context():
+    # built on first use: importing passlib and loading its hash backends is
+    # slow, and most processes (and every hash-pool worker start) never need it
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        # Use pbkdf2_sha256 as default to avoid bcrypt 72-byte limitation in some envs
+        _pwd_context = CryptContext(schemes=["pbkdf2_sha256", "bcrypt"], deprecated="auto")
+    return _pwd_context
 
 SECRET = os.getenv("JWT_SECRET", "dev-secret")
 ALGORITHM = "HS256"
@@ -29,9 +45,155 @@ def decode_access_token(token: str) -> dict:
         raise
 
 
+# Verified claims per token, so repeated requests with the same bearer token
+# skip the signature check. Entries are only served until the token's `exp`.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+# Seconds an acting user's role is trusted without re-reading the database.
+# crud drops the entry when the role changes or the user is deleted.
+ACTING_USER_TTL = float(os.getenv("ACTING_USER_TTL", "30"))
+
+_claims: "OrderedDict[str, dict]" = OrderedDict()
+_claims_lock = threading.Lock()
+
+
+def decode_access_token_cached(token: str) -> dict:
+    """`decode_access_token` behind a bounded LRU of verified claims."""
+    now = time.time()
+    with _claims_lock:
+        claims = _claims.get(token)
+        if claims is not None:
+            if claims.get("exp", 0) > now:
+                _claims.move_to_end(token)
+                return claims
+            del _claims[token]
+    # raises (ExpiredSignatureError included) exactly like the uncached path
+    claims = decode_access_token(token)
+    if TOKEN_CACHE_SIZE > 0:
+        with _claims_lock:
+            _claims[token] = claims
+            while len(_claims) > TOKEN_CACHE_SIZE:
+                _claims.popitem(last=False)
+    return claims
+
+
+@dataclass(frozen=True)
+class ActingUser:
+    """The caller of an authorized write; a snapshot, not an ORM object."""
+    id: int
+    role: str
+
+
+# user id -> (expires_at, ActingUser)
+_acting_users: dict = {}
+_acting_lock = threading.Lock()
+
+
+def get_cached_acting_user(user_id: int) -> Optional[ActingUser]:
+    with _acting_lock:
+        entry = _acting_users.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _acting_users[user_id]
+            return None
+        return entry[1]
+
+
+def cache_acting_user(user: ActingUser):
+    if ACTING_USER_TTL <= 0:
+        return
+    with _acting_lock:
+        _acting_users[user.id] = (time.monotonic() + ACTING_USER_TTL, user)
+
+
+def forget_acting_user(user_id: int):
+    """Called by crud after a user's role changes or the user is deleted."""
+    with _acting_lock:
+        _acting_users.pop(user_id, None)
+
+
+def clear_auth_caches():
+    with _claims_lock:
+        _claims.clear()
+    with _acting_lock:
+        _acting_users.clear()
+
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _get_pwd_context().hash(password)
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return _get_pwd_context().verify(plain, hashed)
+
+
+# pbkdf2 costs hundreds of ms of CPU per call, so request handlers hash in a
+# separate process pool instead of on the event loop (a thread pool would
+# still contend for the GIL with pure-python backends).
+# HASH_WORKERS=0 falls back to the event loop's default thread pool.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+# Hashing jobs allowed in flight (running + queued) before callers are refused
+HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", "64"))
+
+
+class HashQueueFull(RuntimeError):
+    """Raised when HASH_QUEUE_DEPTH hashing jobs are already in flight."""
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(HASH_QUEUE_DEPTH)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if HASH_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that already runs server threads is unsafe
+            _pool = ProcessPoolExecutor(max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(broken: ProcessPoolExecutor):
+    """Drop `broken` (a worker died, e.g. OOM-killed) so the next job starts a
+    fresh pool; a pool another caller already replaced it with is kept."""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_hash_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+async def _run_hash_job(fn, *args):
+    # Backpressure: refuse instead of queueing unboundedly behind a login burst
+    if not _slots.acquire(blocking=False):
+        raise HashQueueFull("password hashing queue is full")
+    try:
+        loop = asyncio.get_running_loop()
+        pool = _get_pool()
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # retry once on a new pool; a second failure is a real error
+            _discard_pool(pool)
+            return await loop.run_in_executor(_get_pool(), fn, *args)
+    finally:
+        _slots.release()
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hash_job(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await _run_hash_job(verify_password, plain, hashed)
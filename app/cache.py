@@ -0,0 +1,165 @@
+"""In-process response cache for the read endpoints.
+
+Entries are encoded response bodies keyed on route + query string. Each entry
+remembers the version of every table it was built from; the mutating `crud`
+functions bump those versions through `invalidate()`, so a write to `orders`
+drops exactly the cached responses that read `orders`. Entries also expire
+after a TTL and the cache is bounded by entry count and total bytes (LRU).
+
+With ETAGS=1 those endpoints also send a strong ETag, a hash of the body.
+A conditional GET is answered with 304 before any query runs only while this
+worker holds a live entry with that ETag; otherwise the body is rebuilt and
+its hash compared, so a 304 never vouches for data older than the TTL.
+
+The versions are per process and only see writes made through `crud` in this
+process. Writes served by another worker, or made by the scripts under
+migration/, are picked up once the TTL expires, by the cache and the ETags
+alike. ETAGS is off by default.
+
+Configuration:
+- RESPONSE_CACHE_TTL: seconds an entry stays valid (default 5; 0 disables)
+- RESPONSE_CACHE_MAX_ENTRIES: default 1024
+- RESPONSE_CACHE_MAX_BYTES: default 64 MiB
+- ETAGS: send ETags and honor If-None-Match (default 0)
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+
+class ResponseCache:
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (expires_at, {table: version}, body, etag)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._versions: dict = {}
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def versions(self, tables: Iterable[str]) -> dict:
+        """Snapshot table versions. Take it *before* reading the data to cache."""
+        with self._lock:
+            return {t: self._versions.get(t, 0) for t in tables}
+
+    def version(self, table: str) -> int:
+        with self._lock:
+            return self._versions.get(table, 0)
+
+    def etag(self, key: str) -> Optional[str]:
+        """ETag of the live entry for `key`, without counting a hit or miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._live(entry, time.monotonic()):
+                return None
+            return entry[3]
+
+    def get(self, key: str) -> Optional[bytes]:
+        found = self.lookup(key)
+        return found[0] if found else None
+
+    def lookup(self, key: str) -> Optional[tuple]:
+        """(body, etag) of the live entry for `key`, or None."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if not self._live(entry, now):
+                self._drop(key)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def set(self, key: str, body: bytes, versions: dict, etag: Optional[str] = None):
+        # very large bodies would just evict everything else
+        if not self.enabled or len(body) > self.max_bytes // 4:
+            return
+        with self._lock:
+            if any(self._versions.get(t, 0) != v for t, v in versions.items()):
+                # a write landed while this body was being built
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, versions, body, etag)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *tables: str):
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _live(self, entry: tuple, now: float) -> bool:
+        expires_at, versions, _, _ = entry
+        return expires_at > now and all(self._versions.get(t, 0) == v for t, v in versions.items())
+
+    def _drop(self, key: str):
+        _, _, body, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+
+
+responses = ResponseCache(
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "5")),
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+)
+
+ETAGS = os.getenv("ETAGS", "0") in ("1", "true", "True")
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag for a response body."""
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def invalidate(*tables: str):
+    """Called by crud after committing a write to `tables`."""
+    responses.invalidate(*tables)
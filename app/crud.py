@@ -1,32 +1,143 @@
 from decimal import Decimal, ROUND_HALF_UP
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, cast, delete, func, insert, select, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, joinedload, noload, selectinload
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from typing import Iterator, List, Sequence
 
-from . import models, schemas
+from . import models, schemas, search, summaries
+from . import auth, cache
 from . import config
 
+# Columns of the read schemas (UserRead, OrderRead). The list and search
+# endpoints select just these as plain rows: no password_hash, no entity
+# construction, nothing added to the session's identity map.
+USER_READ_FIELDS = ("id", "name", "email", "role")
+ORDER_READ_FIELDS = ("id", "user_id", "amount")
+
+
+def _columns(model, fields) -> list:
+    return [getattr(model, f) for f in fields]
+
+
 # Business rule: amount stored rounded to 2 decimals, non-negative
 
 def round_amount(value: Decimal) -> Decimal:
     return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
-def create_user(db: Session, user: schemas.UserCreate) -> models.User:
-    # hash password if provided
-    pwd_hash = None
-    if getattr(user, 'password', None):
-        from .auth import hash_password
-        pwd_hash = hash_password(user.password)
+def _amount_cents(value: Decimal) -> int:
+    return int(round_amount(value) * 100)
+
+
+# user_order_stats is kept in step with orders inside the caller's
+# transaction; these helpers only execute, the caller commits.
+
+def _add_order_stats(db: Session, orders: Sequence[tuple[int, int, int]]) -> None:
+    """Fold new (user_id, order_id, cents) rows into the per-user summary."""
+    per_user: dict[int, tuple[int, int, int]] = {}
+    for user_id, order_id, cents in orders:
+        count, total, last = per_user.get(user_id, (0, 0, 0))
+        per_user[user_id] = (count + 1, total + cents, max(last, order_id))
+    if not per_user:
+        return
+    stats = models.UserOrderStats.__table__
+    stmt = sqlite_insert(stats)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[stats.c.user_id],
+        set_={
+            "order_count": stats.c.order_count + stmt.excluded.order_count,
+            "total_cents": stats.c.total_cents + stmt.excluded.total_cents,
+            "last_order_id": func.max(func.coalesce(stats.c.last_order_id, 0), stmt.excluded.last_order_id),
+        },
+    )
+    db.execute(
+        stmt,
+        [
+            {"user_id": user_id, "order_count": count, "total_cents": total, "last_order_id": last}
+            for user_id, (count, total, last) in per_user.items()
+        ],
+    )
+
+
+def _remove_order_stats(db: Session, user_id: int, cents: int) -> None:
+    # call after the delete is flushed so last_order_id skips the removed row
+    stats = models.UserOrderStats.__table__
+    last = select(func.max(models.Order.id)).where(models.Order.user_id == user_id).scalar_subquery()
+    db.execute(
+        update(stats)
+        .where(stats.c.user_id == user_id)
+        .values(order_count=stats.c.order_count - 1, total_cents=stats.c.total_cents - cents, last_order_id=last)
+    )
+
+
+def create_user(db: Session, user: schemas.UserCreate, password_hash: str | None = None) -> models.User:
+    # hash password if provided; async callers pass a hash computed off the
+    # event loop (see auth.hash_password_async) instead
+    pwd_hash = password_hash
+    if pwd_hash is None and getattr(user, 'password', None):
+        pwd_hash = auth.hash_password(user.password)
     db_user = models.User(name=user.name, email=user.email, role=(user.role or 'user'), password_hash=pwd_hash)
     db.add(db_user)
     db.commit()
+    cache.invalidate("users")
     db.refresh(db_user)
     return db_user
 
 
-def list_users(db: Session) -> List[models.User]:
-    return db.query(models.User).order_by(models.User.id).all()
+def list_users(db: Session, after_id: int | None = None, limit: int | None = None) -> List[models.User]:
+    # Keyset pagination: seek past `after_id` on the primary key index instead
+    # of OFFSET, so every page costs the same regardless of its position.
+    q = db.query(models.User)
+    if after_id is not None:
+        q = q.filter(models.User.id > after_id)
+    q = q.order_by(models.User.id)
+    if limit is not None:
+        q = q.limit(limit)
+    return q.all()
+
+
+def get_user(db: Session, user_id: int) -> models.User | None:
+    return db.get(models.User, user_id)
+
+
+def _search_select(db: Session, q: str, *columns):
+    if len(q) >= search.MIN_QUERY_LENGTH and search.is_available(db.connection()):
+        fts = search.users_fts
+        return (
+            select(*columns)
+            .join(fts, fts.c.rowid == models.User.id)
+            .where(text(f"{search.FTS_TABLE} MATCH :match").bindparams(match=search.match_expression(q)))
+            .order_by(fts.c.rank, models.User.id)
+        )
+    return select(*columns).where(models.User.name.like(f"%{q}%")).order_by(models.User.id)
+
+
+def search_users(db: Session, q: str, limit: int | None = None) -> List[models.User]:
+    """Case-insensitive substring search on user names, best matches first.
+
+    Served from the `users_fts` trigram index when it exists (see
+    app/search.py); falls back to a parameterized LIKE scan otherwise and for
+    queries shorter than a trigram. Callers sanitize `q` as needed.
+    """
+    return db.scalars(_search_select(db, q, models.User).limit(limit)).all()
+
+
+def search_users_rows(db: Session, q: str, limit: int | None = None) -> List[tuple]:
+    """`search_users` as (id, name, email, role) rows."""
+    return db.execute(_search_select(db, q, *_columns(models.User, USER_READ_FIELDS)).limit(limit)).all()
+
+
+def find_users_by_name(db: Session, name: str) -> List[models.User]:
+    return db.query(models.User).filter(models.User.name == name).all()
+
+
+def find_users_by_name_rows(db: Session, name: str) -> List[tuple]:
+    return db.execute(select(*_columns(models.User, USER_READ_FIELDS)).where(models.User.name == name)).all()
+
+
+def get_order(db: Session, order_id: int) -> models.Order | None:
+    return db.get(models.Order, order_id)
 
 
 def create_order(db: Session, order: schemas.OrderCreate) -> models.Order:
@@ -45,6 +156,8 @@ def create_order(db: Session, order: schemas.OrderCreate) -> models.Order:
     db_order = models.Order(user_id=order.user_id, amount=amount)
     db.add(db_order)
     try:
+        db.flush()
+        _add_order_stats(db, [(db_order.user_id, db_order.id, _amount_cents(amount))])
         db.commit()
     except IntegrityError as e:
             db.rollback()
@@ -52,16 +165,264 @@ def create_order(db: Session, order: schemas.OrderCreate) -> models.Order:
             # keep the same API-level ValueError but the message differs and
             # tests can detect the difference.
             raise ValueError("integrity error") from e
+    cache.invalidate("orders")
     db.refresh(db_order)
     return db_order
 
 
-def list_orders(db: Session) -> List[models.Order]:
-    return db.query(models.Order).order_by(models.Order.id).all()
+# Rows inserted per transaction by bulk_create_orders
+BULK_CHUNK_SIZE = 500
+
+
+def bulk_create_orders(
+    db: Session, orders: Sequence[schemas.OrderCreate], chunk_size: int = BULK_CHUNK_SIZE
+) -> List[tuple[int | None, str | None]]:
+    """Insert many orders with one transaction per chunk.
+
+    Returns one `(order_id, error)` pair per input, in input order. Rows that
+    fail validation are reported and skipped without affecting the rest of the
+    chunk; a database error fails (and rolls back) only its own chunk.
+    """
+    results: List[tuple[int | None, str | None]] = [(None, None)] * len(orders)
+    # round every amount up front instead of once per insert round-trip
+    amounts = [round_amount(o.amount) for o in orders]
+
+    for start in range(0, len(orders), chunk_size):
+        chunk = range(start, min(start + chunk_size, len(orders)))
+        existing = None
+        if not config.is_vulnerable():
+            # one IN query per chunk instead of a db.get per row
+            wanted = {orders[i].user_id for i in chunk}
+            existing = set(db.scalars(select(models.User.id).where(models.User.id.in_(wanted))))
+
+        rows, positions = [], []
+        for i in chunk:
+            if existing is not None and orders[i].user_id not in existing:
+                results[i] = (None, "foreign key violation: user does not exist")
+            elif amounts[i] < 0:
+                results[i] = (None, "amount must be non-negative")
+            else:
+                rows.append({"user_id": orders[i].user_id, "amount": amounts[i]})
+                positions.append(i)
+        if not rows:
+            continue
+
+        stmt = insert(models.Order).returning(models.Order.id, sort_by_parameter_order=True)
+        try:
+            ids = db.scalars(stmt, rows).all()
+            _add_order_stats(db, [(r["user_id"], i, _amount_cents(r["amount"])) for r, i in zip(rows, ids)])
+            db.commit()
+            cache.invalidate("orders")
+        except IntegrityError:
+            db.rollback()
+            for i in positions:
+                results[i] = (None, "integrity error")
+            continue
+        for i, order_id in zip(positions, ids):
+            results[i] = (order_id, None)
+    return results
+
+
+def list_orders(
+    db: Session, after_id: int | None = None, limit: int | None = None, user_id: int | None = None
+) -> List[models.Order]:
+    q = db.query(models.Order)
+    if user_id is not None:
+        q = q.filter(models.Order.user_id == user_id)
+    if after_id is not None:
+        q = q.filter(models.Order.id > after_id)
+    q = q.order_by(models.Order.id)
+    if limit is not None:
+        q = q.limit(limit)
+    return q.all()
+
+
+# Rows fetched per round-trip when streaming a whole table
+EXPORT_BATCH_SIZE = 1000
+
+# Columns exposed by the export endpoints: the same as the JSON API
+USER_EXPORT_FIELDS = USER_READ_FIELDS
+ORDER_EXPORT_FIELDS = ORDER_READ_FIELDS
+
+
+def _keyset_rows(db: Session, model, fields, after_id, limit, *where) -> List[tuple]:
+    q = select(*_columns(model, fields)).where(*where)
+    if after_id is not None:
+        q = q.where(model.id > after_id)
+    q = q.order_by(model.id)
+    if limit is not None:
+        q = q.limit(limit)
+    return db.execute(q).all()
 
 
-def get_user_with_orders(db: Session, user_id: int) -> models.User | None:
-    return db.query(models.User).filter(models.User.id == user_id).first()
+def list_users_rows(db: Session, after_id: int | None = None, limit: int | None = None) -> List[tuple]:
+    """`list_users` as (id, name, email, role) rows. Rows have the same
+    attribute names as the entities, so schemas (`from_attributes`) and
+    templates read them unchanged."""
+    return _keyset_rows(db, models.User, USER_READ_FIELDS, after_id, limit)
+
+
+def list_orders_rows(
+    db: Session, after_id: int | None = None, limit: int | None = None, user_id: int | None = None
+) -> List[tuple]:
+    """`list_orders` as (id, user_id, amount) rows (the OrderRead fields)."""
+    where = [models.Order.user_id == user_id] if user_id is not None else []
+    return _keyset_rows(db, models.Order, ORDER_READ_FIELDS, after_id, limit, *where)
+
+
+def users_export_query(batch_size: int = EXPORT_BATCH_SIZE):
+    # yield_per: rows are fetched from the cursor in batches and never
+    # hydrated into ORM objects
+    return (
+        select(*_columns(models.User, USER_EXPORT_FIELDS))
+        .order_by(models.User.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+
+def orders_export_query(batch_size: int = EXPORT_BATCH_SIZE):
+    return (
+        select(*_columns(models.Order, ORDER_EXPORT_FIELDS))
+        .order_by(models.Order.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+
+def iter_users(db: Session, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[tuple]:
+    """Yield (id, name, email, role) rows in id order without loading the table."""
+    yield from db.execute(users_export_query(batch_size))
+
+
+def iter_orders(db: Session, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[tuple]:
+    """Yield (id, user_id, amount) rows in id order without loading the table."""
+    yield from db.execute(orders_export_query(batch_size))
+
+
+def _cents(column):
+    # Amounts are stored rounded to 2 decimals but SQLite keeps NUMERIC as
+    # REAL; aggregating integer cents keeps sums exact.
+    return cast(func.round(column * 100), Integer)
+
+
+def _to_amount(cents: int | None) -> Decimal | None:
+    return None if cents is None else Decimal(cents).scaleb(-2)
+
+
+def _stats(count: int, total_cents: int | None, min_cents: int | None, max_cents: int | None) -> dict:
+    total = _to_amount(total_cents or 0)
+    return {
+        "count": count,
+        "total": total,
+        "min": _to_amount(min_cents),
+        "max": _to_amount(max_cents),
+        "avg": round_amount(total / count) if count else None,
+    }
+
+
+def _amount_filters(query, min_amount: Decimal | None, max_amount: Decimal | None):
+    # filter on the raw column so the (user_id, amount) index can serve it
+    if min_amount is not None:
+        query = query.where(models.Order.amount >= min_amount)
+    if max_amount is not None:
+        query = query.where(models.Order.amount <= max_amount)
+    return query
+
+
+def order_stats(
+    db: Session, user_id: int | None = None, min_amount: Decimal | None = None, max_amount: Decimal | None = None
+) -> schemas.OrderStats:
+    """Count/total/min/max/avg over all orders (or one user's), computed in SQL."""
+    cents = _cents(models.Order.amount)
+    query = select(func.count(), func.sum(cents), func.min(cents), func.max(cents)).select_from(models.Order)
+    if user_id is not None:
+        query = query.where(models.Order.user_id == user_id)
+    row = db.execute(_amount_filters(query, min_amount, max_amount)).one()
+    return schemas.OrderStats(**_stats(*row))
+
+
+def order_stats_by_user(
+    db: Session,
+    after_user_id: int | None = None,
+    limit: int | None = None,
+    min_amount: Decimal | None = None,
+    max_amount: Decimal | None = None,
+) -> List[schemas.UserOrderStats]:
+    """Per-user order aggregates with a single GROUP BY, keyset-paginated on user_id."""
+    cents = _cents(models.Order.amount)
+    query = select(
+        models.Order.user_id, func.count(), func.sum(cents), func.min(cents), func.max(cents)
+    ).group_by(models.Order.user_id)
+    if after_user_id is not None:
+        query = query.where(models.Order.user_id > after_user_id)
+    query = _amount_filters(query, min_amount, max_amount).order_by(models.Order.user_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return [schemas.UserOrderStats(user_id=row[0], **_stats(*row[1:])) for row in db.execute(query)]
+
+
+def order_summary(user: models.User) -> tuple[int, Decimal]:
+    """(order count, order total) over all of a user's orders.
+
+    Read from user_order_stats; the user loaders below fetch it in the same
+    query as the user.
+    """
+    row = user.order_summary
+    if row is None:
+        return 0, _to_amount(0)
+    return row.order_count, _to_amount(row.total_cents)
+
+
+def rebuild_order_stats(db: Session) -> None:
+    """Recompute user_order_stats from orders (drift repair)."""
+    summaries.rebuild(db.connection())
+    db.commit()
+    db.expire_all()
+    cache.invalidate("orders")
+
+
+def order_stats_drift(db: Session) -> List[int]:
+    """User ids whose user_order_stats row disagrees with their orders."""
+    return summaries.drift(db.connection())
+
+
+# Loader strategies for User.orders. Call sites pick one explicitly so the
+# relationship is never lazy-loaded behind their back (one query per user):
+#   "selectin" - one extra `WHERE user_id IN (...)` query; scales to many users
+#                and to users with many orders (no repeated user columns)
+#   "joined"   - a single LEFT OUTER JOIN; cheapest for one user with few orders
+#   "noload"   - leave `orders` empty; the caller loads what it needs itself
+ORDER_LOADERS = {
+    "selectin": selectinload,
+    "joined": joinedload,
+    "noload": noload,
+}
+
+
+def get_user_with_orders(db: Session, user_id: int, loader: str = "selectin") -> models.User | None:
+    try:
+        option = ORDER_LOADERS[loader](models.User.orders)
+    except KeyError:
+        raise ValueError(f"unknown loader strategy: {loader}")
+    return (
+        db.query(models.User)
+        .options(option, joinedload(models.User.order_summary))
+        .filter(models.User.id == user_id)
+        .first()
+    )
+
+
+def get_user_with_orders_page(
+    db: Session, user_id: int, after_id: int | None = None, limit: int = 100
+) -> tuple[models.User | None, List[tuple]]:
+    """Return the user plus one keyset page of their orders (as rows).
+
+    For heavy users this avoids materializing the whole `orders` relationship;
+    the relationship itself is left untouched so the session stays consistent.
+    """
+    user = db.get(models.User, user_id, options=[joinedload(models.User.order_summary)])
+    if not user:
+        return None, []
+    return user, list_orders_rows(db, after_id=after_id, limit=limit, user_id=user_id)
 
 
 def update_user(db: Session, user_id: int, name: str | None = None, email: str | None = None) -> models.User | None:
@@ -79,6 +440,7 @@ def update_user(db: Session, user_id: int, name: str | None = None, email: str |
         pass
     db.add(user)
     db.commit()
+    cache.invalidate("users")
     db.refresh(user)
     return user
 
@@ -92,6 +454,8 @@ def update_user_role(db: Session, user_id: int, role: str) -> models.User | None
     user.role = role
     db.add(user)
     db.commit()
+    cache.invalidate("users")
+    auth.forget_acting_user(user_id)
     db.refresh(user)
     return user
 
@@ -105,9 +469,18 @@ def update_order(db: Session, order_id: int, amount: str | None = None) -> model
         amt = round_amount(Decimal(amount))
         if amt < 0:
             raise ValueError("amount must be non-negative")
+        delta = _amount_cents(amt) - _amount_cents(order.amount)
         order.amount = amt
+        if delta:
+            stats = models.UserOrderStats.__table__
+            db.execute(
+                update(stats)
+                .where(stats.c.user_id == order.user_id)
+                .values(total_cents=stats.c.total_cents + delta)
+            )
     db.add(order)
     db.commit()
+    cache.invalidate("orders")
     db.refresh(order)
     return order
 
@@ -117,7 +490,10 @@ def delete_order(db: Session, order_id: int) -> bool:
     if not order:
         return False
     db.delete(order)
+    db.flush()
+    _remove_order_stats(db, order.user_id, _amount_cents(order.amount))
     db.commit()
+    cache.invalidate("orders")
     return True
 
 
@@ -126,5 +502,10 @@ def delete_user(db: Session, user_id: int) -> bool:
     if not user:
         return False
     db.delete(user)
+    # the ORM cascade removes the orders; the summary row goes with them
+    db.execute(delete(models.UserOrderStats).where(models.UserOrderStats.user_id == user_id))
     db.commit()
+    # orders cascade with the user
+    cache.invalidate("users", "orders")
+    auth.forget_acting_user(user_id)
     return True
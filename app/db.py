@@ -1,20 +1,133 @@
 import os
+import re
+from contextvars import ContextVar
 from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 
+# DB_ASYNC=1 serves requests through an AsyncSession on an async engine
+# (aiosqlite for SQLite). The sync engine is always created: startup DDL,
+# scripts and the test-suite use it.
+DB_ASYNC = os.getenv("DB_ASYNC", "0") in ("1", "true", "True")
+
+
+def _async_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgresql:"):
+        return "postgresql+asyncpg:" + url[len("postgresql:"):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+# SQLite tuning profile, applied to every new connection by set_sqlite_pragma.
+# SQLITE_PROFILE picks a preset; any pragma can also be overridden on its own
+# via SQLITE_<NAME>, e.g. SQLITE_SYNCHRONOUS=FULL or SQLITE_MMAP_SIZE=0.
+SQLITE_PROFILES = {
+    # SQLite defaults: rollback journal, synchronous=FULL, no mmap
+    "default": {},
+    "production": {
+        # readers no longer block behind writers (and vice versa)
+        "journal_mode": "WAL",
+        # in WAL mode NORMAL only fsyncs at checkpoints; still corruption-safe,
+        # but the last transactions may roll back on power loss
+        "synchronous": "NORMAL",
+        "busy_timeout": "5000",
+        # negative = KiB, i.e. ~64 MB page cache per connection
+        "cache_size": "-64000",
+        "mmap_size": "268435456",
+        "temp_store": "MEMORY",
+    },
+}
+SQLITE_PRAGMA_NAMES = ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store")
+_PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+def sqlite_pragmas(profile: str | None = None) -> dict:
+    """Resolve the pragmas for `profile` (default: $SQLITE_PROFILE) plus env overrides."""
+    profile = profile or os.getenv("SQLITE_PROFILE", "production")
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"unknown SQLITE_PROFILE: {profile}")
+    pragmas = {"foreign_keys": "ON", **SQLITE_PROFILES[profile]}
+    for name in SQLITE_PRAGMA_NAMES:
+        value = os.getenv(f"SQLITE_{name.upper()}")
+        if value:
+            pragmas[name] = value
+    for name, value in pragmas.items():
+        if not _PRAGMA_VALUE.match(value):
+            raise ValueError(f"invalid value for PRAGMA {name}: {value!r}")
+    return pragmas
+
+
+def _pool_args(url: str) -> dict:
+    # In-memory SQLite gets SQLAlchemy's single-connection pools; everything
+    # else uses an explicitly sized QueuePool.
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    }
+
+
+SQLITE_PRAGMAS = sqlite_pragmas() if DATABASE_URL.startswith("sqlite") else {}
+
 # For SQLite, enable check_same_thread=False for multithreading in FastAPI
 connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args, future=True)
+engine = create_engine(DATABASE_URL, connect_args=connect_args, future=True, **_pool_args(DATABASE_URL))
 
-# Ensure SQLite enforces foreign keys
+async_engine = (
+    create_async_engine(ASYNC_DATABASE_URL, connect_args=connect_args, **_pool_args(ASYNC_DATABASE_URL))
+    if DB_ASYNC
+    else None
+)
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: dict):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    apply_sqlite_pragmas(dbapi_connection, SQLITE_PRAGMAS)
+
+
+# Ensure SQLite enforces foreign keys and gets the tuning profile
 if DATABASE_URL.startswith("sqlite"):
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, connection_record):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
+    event.listen(engine, "connect", set_sqlite_pragma)
+    if async_engine is not None:
+        event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+# expire_on_commit=False: attributes of returned objects must stay readable
+# outside run_sync, where an implicit refresh cannot await
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if async_engine is not None else None
+)
 Base = declarative_base()
+
+
+# Set for a request profiled with ?profile=1 (app/profiler.py): cProfile only
+# sees the thread it was enabled on, so run_db stays on the event loop.
+run_inline: ContextVar[bool] = ContextVar("run_db_inline", default=False)
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """Call a sync `crud`-style function `fn(session, *args)` without blocking the event loop.
+
+    With an AsyncSession the function runs through `AsyncSession.run_sync`
+    (real async I/O on the async engine); with a plain Session it runs in the
+    threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    if run_inline.get():
+        return fn(db, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
@@ -0,0 +1,53 @@
+"""Direct JSON encoding of column rows for the list endpoints (FAST_JSON=1).
+
+The default path validates every row into its response schema
+(`from_attributes=True`) and dumps the models. Here the rows from the
+column-only selects (`crud.list_users_rows` / `crud.list_orders_rows`) are
+turned into plain dicts keyed by the row's column names, which must be the
+schema's fields in order, and encoded in one call. The bytes are the
+same as the schema-based encoding: compact separators, Decimals as strings,
+non-ASCII left as UTF-8 (benchmarks/fast_json.py checks this). The routes
+keep their response_model, so the OpenAPI schema does not change.
+
+orjson is used when installed; otherwise a pydantic TypeAdapter(Any)
+serializer, which needs no model construction either.
+"""
+from decimal import Decimal
+from typing import Any, Sequence
+
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+_ANY = TypeAdapter(Any)
+
+
+def _default(value):
+    # the only non-JSON type in the list schemas; pydantic emits str(Decimal)
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"cannot encode {type(value).__name__}")
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return _ANY.dump_json(data)
+
+
+def items(rows: Sequence) -> list[dict]:
+    if not rows:
+        return []
+    fields = rows[0]._fields
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def encode(data) -> bytes:
+    """Encode what a list endpoint's load() returns: a list of rows or a
+    `{"items": rows, "next_cursor": ...}` page."""
+    if isinstance(data, dict):
+        return dumps({"items": items(data["items"]), "next_cursor": data["next_cursor"]})
+    return dumps(items(data))
@@ -0,0 +1,157 @@
+"""Group commit for POST /orders (GROUP_COMMIT=1).
+
+Every order otherwise gets its own transaction, and on SQLite each commit
+waits for the disk. With group commit, concurrent requests hand their order
+to one writer task per database. That task gathers them for at most
+GROUP_COMMIT_WINDOW_MS (default 2) or GROUP_COMMIT_MAX_ROWS (default 200)
+rows and inserts them with `crud.bulk_create_orders` in one transaction.
+Each request waits on a future that is resolved with its order id, or failed
+with its error, once that transaction has finished.
+
+Durability is the same as without group commit. A request gets its 201 only
+after the transaction holding its order has committed, with whatever
+guarantees the SQLite profile gives (see app/db.py). If the process dies
+before the commit, none of the waiting requests have been answered and none
+of their orders exist. The cost is up to one window of extra latency per
+order.
+
+Errors stay per order. Rows that fail validation (unknown user, negative
+amount) are reported to their own caller. If the batch transaction fails
+(e.g. a foreign-key violation in vulnerable mode, which skips the user
+check), its orders are retried one transaction each, so only the offending
+order fails.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from . import crud, instrumentation, schemas
+from .db import run_db
+
+ENABLED = os.getenv("GROUP_COMMIT", "0") in ("1", "true", "True")
+WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "2"))
+MAX_ROWS = int(os.getenv("GROUP_COMMIT_MAX_ROWS", "200"))
+
+
+class OrderWriter:
+    """Single writer task that commits queued orders in batches."""
+
+    def __init__(self, make_session, window_ms: float = WINDOW_MS, max_rows: int = MAX_ROWS):
+        self.make_session = make_session
+        self.window = window_ms / 1000
+        self.max_rows = max_rows
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.batches = 0
+        self.closed = False
+        # a fresh context: the writer outlives the request that starts it and
+        # must not inherit its run_db mode or instrumentation timings
+        self.task = self.loop.create_task(self._run(), context=contextvars.Context())
+
+    async def submit(self, order: schemas.OrderCreate) -> int:
+        future = self.loop.create_future()
+        # the writer runs in its own context; it reports the batch's SQL and
+        # commit time back to the waiting requests' timings
+        await self.queue.put((order, future, instrumentation.current()))
+        return await future
+
+    async def _collect(self) -> list:
+        """The next batch: wait for one order, then take whatever arrives
+        within the window, up to max_rows. A None in the queue ends the run."""
+        batch, deadline = [], None
+        while len(batch) < self.max_rows:
+            if deadline is None:
+                item = await self.queue.get()
+                deadline = time.monotonic() + self.window
+            else:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                self.closed = True
+                break
+            batch.append(item)
+        return batch
+
+    async def _run(self):
+        while not self.closed:
+            batch = await self._collect()
+            if not batch:
+                continue
+            try:
+                await self._write(batch)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _write(self, batch: list):
+        orders = [order for order, _, _ in batch]
+        db = self.make_session()
+        try:
+            with instrumentation.on_behalf_of([timings for _, _, timings in batch]):
+                results = await run_db(db, crud.bulk_create_orders, orders, chunk_size=len(orders))
+                failed = [i for i, (_, error) in enumerate(results) if error == "integrity error"]
+                if len(failed) > 1:
+                    # the batch transaction was rolled back: isolate the culprit
+                    for i in failed:
+                        results[i] = (await run_db(db, crud.bulk_create_orders, [orders[i]]))[0]
+        finally:
+            if isinstance(db, AsyncSession):
+                await db.close()
+            else:
+                await run_in_threadpool(db.close)
+        self.batches += 1
+        for (_, future, _), (order_id, error) in zip(batch, results):
+            if future.done():  # caller went away
+                continue
+            if error:
+                future.set_exception(ValueError(error))
+            else:
+                future.set_result(order_id)
+
+    async def close(self):
+        """Commit the orders already queued, then stop."""
+        await self.queue.put(None)
+        await self.task
+
+
+# one writer per database engine, on the loop that serves requests
+_writers: dict = {}
+
+
+def writer_for(db) -> OrderWriter:
+    """The writer for `db`'s engine; it opens sessions of the same kind."""
+    if isinstance(db, AsyncSession):
+        bind = db.bind
+        make_session = lambda: AsyncSession(bind=bind, autoflush=False, expire_on_commit=False)  # noqa: E731
+    else:
+        bind = db.get_bind()
+        make_session = lambda: Session(bind=bind, autoflush=False)  # noqa: E731
+    writer: Optional[OrderWriter] = _writers.get(bind)
+    if writer is None or writer.loop is not asyncio.get_running_loop() or writer.task.done():
+        writer = _writers[bind] = OrderWriter(make_session)
+    return writer
+
+
+async def submit(db, order: schemas.OrderCreate) -> int:
+    """Queue `order` for the writer of `db`'s engine; its id once committed.
+    Raises ValueError like `crud.create_order`."""
+    return await writer_for(db).submit(order)
+
+
+async def shutdown():
+    for key, writer in list(_writers.items()):
+        if writer.loop is asyncio.get_running_loop():
+            await writer.close()
+        _writers.pop(key, None)
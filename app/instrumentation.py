@@ -0,0 +1,346 @@
+"""Opt-in request profiling: per-request timing breakdowns and /metrics.
+
+With INSTRUMENTATION=1, create_app() installs:
+
+- an ASGI middleware that times every request and adds a `Server-Timing`
+  header with its phases:
+    validate  routing, dependencies and request validation (before the handler)
+    app       the route handler's own Python time
+    db        time spent executing SQL (`desc` holds the query count)
+    commit    time spent in COMMIT
+              (a grouped POST /orders, see app/group_commit.py, reports the
+              SQL and commit of the whole batch its order was written in)
+    render    Jinja rendering (non-streamed pages; streamed pages render while
+              the body is sent, after the header, and only reach /metrics)
+    encode    response serialization
+    total     request start to response start
+- `before_cursor_execute`/`after_cursor_execute` hooks on the engines in
+  app/db.py that count queries and time them; statements slower than
+  SLOW_QUERY_MS (default 100) are logged on the `app.sql` logger
+- `GET /metrics` in Prometheus text format: request latency histograms per
+  route, request counts per status, query latencies, slow queries and the
+  accumulated time per phase.
+
+When disabled nothing is installed. The only cost left is `timed()` around
+rendering/encoding in app/main.py, one ContextVar lookup per call.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.responses import PlainTextResponse
+
+ENABLED = os.getenv("INSTRUMENTATION", "0") in ("1", "true", "True")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASES = ("validate", "app", "db", "commit", "render", "encode")
+
+log = logging.getLogger("app.sql")
+
+
+class RequestTimings:
+    """Phase durations (seconds) of one request; filled in by hooks and `timed()`."""
+
+    __slots__ = ("start", "phases", "queries", "handler_start", "handler_end", "commit_start")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        self.handler_start = self.handler_end = self.commit_start = None
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] += seconds
+
+    def finish_header(self) -> dict:
+        """Settle the phases known when the response starts; returns them with `total`."""
+        now = time.perf_counter()
+        p = self.phases
+        if self.handler_start is not None:
+            end = self.handler_end or now
+            p["validate"] = self.handler_start - self.start
+            # whatever the handler spent outside SQL, commits, rendering and encoding
+            p["app"] = max(end - self.handler_start - p["db"] - p["commit"] - p["render"] - p["encode"], 0.0)
+            p["encode"] += now - end
+        return {**p, "total": now - self.start}
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+_NULL = nullcontext()
+
+
+@contextmanager
+def _timing(timings: RequestTimings, phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+def timed(phase: str):
+    """`with timed("render"):` adds the block's duration to the current request."""
+    timings = _current.get()
+    if timings is None:
+        return _NULL
+    return _timing(timings, phase)
+
+
+def current() -> Optional[RequestTimings]:
+    """The timings of the request being served, if instrumented."""
+    return _current.get()
+
+
+@contextmanager
+def on_behalf_of(waiting: list):
+    """Run a block outside any request (e.g. a group-commit batch) and add the
+    SQL and commit time it spends to each of the `waiting` requests' timings."""
+    waiting = [t for t in waiting if t is not None]
+    if not waiting:
+        yield
+        return
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+        for t in waiting:
+            t.queries += timings.queries
+            t.add("db", timings.phases["db"])
+            t.add("commit", timings.phases["commit"])
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        out, cumulative = [], 0
+        prefix = labels + "," if labels else ""
+        suffix = f"{{{labels}}}" if labels else ""
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            out.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+        out.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        out.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        out.append(f"{name}_count{suffix} {self.count}")
+        return out
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.latency: dict = {}     # (method, route) -> Histogram
+        self.requests: dict = {}    # (method, route, status) -> count
+        self.phase_seconds: dict = {}  # (route, phase) -> seconds
+        self.query_latency = Histogram()
+        self.slow_queries = 0
+
+    def observe_request(self, method: str, route: str, status: int, duration: float, phases: dict):
+        with self._lock:
+            self.latency.setdefault((method, route), Histogram()).observe(duration)
+            key = (method, route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            for phase, seconds in phases.items():
+                if seconds:
+                    k = (route, phase)
+                    self.phase_seconds[k] = self.phase_seconds.get(k, 0.0) + seconds
+
+    def observe_query(self, duration: float, slow: bool):
+        with self._lock:
+            self.query_latency.observe(duration)
+            self.slow_queries += slow
+
+    def render(self) -> str:
+        with self._lock:
+            out = [
+                "# HELP http_request_duration_seconds Request latency by route",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), hist in sorted(self.latency.items()):
+                out += hist.lines("http_request_duration_seconds", f'method="{method}",route="{route}"')
+            out += ["# HELP http_requests_total Requests by route and status", "# TYPE http_requests_total counter"]
+            for (method, route, status), n in sorted(self.requests.items()):
+                out.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {n}')
+            out += [
+                "# HELP http_request_phase_seconds_total Time spent per request phase",
+                "# TYPE http_request_phase_seconds_total counter",
+            ]
+            for (route, phase), seconds in sorted(self.phase_seconds.items()):
+                out.append(f'http_request_phase_seconds_total{{route="{route}",phase="{phase}"}} {seconds:.6f}')
+            out += ["# HELP db_query_duration_seconds SQL statement latency", "# TYPE db_query_duration_seconds histogram"]
+            out += self.query_latency.lines("db_query_duration_seconds", "")
+            out += [
+                f"# HELP db_slow_queries_total Statements slower than {SLOW_QUERY_MS:g} ms",
+                "# TYPE db_slow_queries_total counter",
+                f"db_slow_queries_total {self.slow_queries}",
+            ]
+        return "\n".join(out) + "\n"
+
+
+metrics = Metrics()
+
+
+# -------------------- SQLAlchemy hooks --------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    slow = duration * 1000 >= SLOW_QUERY_MS
+    metrics.observe_query(duration, slow)
+    timings = _current.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.add("db", duration)
+    if slow:
+        log.warning("slow query (%.1f ms): %s", duration * 1000, " ".join(statement.split())[:500])
+
+
+def _before_commit(conn):
+    timings = _current.get()
+    if timings is not None:
+        timings.commit_start = time.perf_counter()
+
+
+def _after_commit(session):
+    timings = _current.get()
+    if timings is not None and timings.commit_start is not None:
+        timings.add("commit", time.perf_counter() - timings.commit_start)
+        timings.commit_start = None
+
+
+def instrument_engine(engine):
+    """Time and count the statements and commits run on `engine` (idempotent)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "commit", _before_commit)
+    if not event.contains(Session, "after_commit", _after_commit):
+        event.listen(Session, "after_commit", _after_commit)
+
+
+# -------------------- ASGI middleware --------------------
+
+def _server_timing(phases: dict, queries: int) -> str:
+    parts = []
+    for name, seconds in phases.items():
+        if name == "db":
+            parts.append(f'db;dur={seconds * 1000:.2f};desc="{queries} queries"')
+        elif seconds or name == "total":
+            parts.append(f"{name};dur={seconds * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def _route_name(scope) -> str:
+    # the matched route template, never the raw path (bounded label values)
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class InstrumentationMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = _server_timing(timings.finish_header(), timings.queries)
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            phases = dict(timings.phases)
+            metrics.observe_request(
+                scope["method"], _route_name(scope), status, time.perf_counter() - timings.start, phases
+            )
+
+
+def _timed_endpoint(call):
+    """Wrap a route's endpoint so the request records when the handler ran."""
+    if getattr(call, "_instrumented", False):
+        return call
+
+    def mark(start: bool):
+        timings = _current.get()
+        if timings is not None:
+            if start:
+                timings.handler_start = time.perf_counter()
+            else:
+                timings.handler_end = time.perf_counter()
+
+    if asyncio.iscoroutinefunction(call):
+        @wraps(call)
+        async def wrapper(*args, **kwargs):
+            mark(True)
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                mark(False)
+    else:
+        @wraps(call)
+        def wrapper(*args, **kwargs):
+            mark(True)
+            try:
+                return call(*args, **kwargs)
+            finally:
+                mark(False)
+    wrapper._instrumented = True
+    return wrapper
+
+
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def install(app, engines=()):
+    """Add the middleware, the endpoint timers and GET /metrics to `app`, and
+    the query hooks to `engines`."""
+    from fastapi.routing import APIRoute
+
+    for engine in engines:
+        instrument_engine(engine)
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            # the request handler calls dependant.call at request time
+            route.dependant.call = _timed_endpoint(route.dependant.call)
+    app.add_middleware(InstrumentationMiddleware)
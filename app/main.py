@@ -1,111 +1,444 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, Request, Form, Header
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Query, Request, Form, Header
+from fastapi.responses import HTMLResponse, PlainTextResponse, RedirectResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from .db import Base, engine, SessionLocal
-from . import crud, models, schemas
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import List, Union
+import threading
+from .db import engine, async_engine, SessionLocal, AsyncSessionLocal, run_db
+from . import crud, migrations, schemas
 from . import config
-from .utils import sanitize_input
-from .auth import create_access_token, decode_access_token
+from . import cache
+from . import export
+from .utils import sanitize_input, encode_cursor, decode_cursor
+from . import auth, fastjson, group_commit, instrumentation, profiler
+from .auth import create_access_token, hash_password_async, verify_password_async, HashQueueFull
 from sqlalchemy import text
+from pydantic import TypeAdapter, ValidationError
+from decimal import Decimal
+import json
 import os
-from fastapi import Header
 
-# Create tables if not existing (for demo). In production, use Alembic.
-Base.metadata.create_all(bind=engine)
-
-# Ensure `role` and `password_hash` columns exist on users table for older DB files used in tests/dev.
-with engine.connect() as conn:
-    try:
-        res = conn.execute(text("PRAGMA table_info(users)"))
-        cols = [row[1] for row in res.fetchall()]
-        if 'role' not in cols:
-            # SQLite supports ADD COLUMN; set default to 'user'
-            conn.execute(text("ALTER TABLE users ADD COLUMN role TEXT DEFAULT 'user' NOT NULL"))
-        if 'password_hash' not in cols:
-            conn.execute(text("ALTER TABLE users ADD COLUMN password_hash TEXT"))
-        # Backfill any NULLs just in case
-        conn.execute(text("UPDATE users SET role='user' WHERE role IS NULL"))
-        conn.commit()
-    except Exception:
-        # If the users table doesn't exist yet or pragma failed, ignore
-        pass
-
-# Ensure there is a seeded admin user for local/dev. Password comes from
-# ADMIN_PASSWORD env var or falls back to 'admin' (suitable for local/dev only).
-try:
-    from .db import SessionLocal
-    from . import crud, schemas
+# Importing this module does no I/O: the schema is brought up to date by the
+# app's lifespan (or, for clients that skip lifespan events, by the first
+# request that needs the database). Routes live on separate routers so
+# create_app() can leave the UI and the profiler out.
+router = APIRouter()
+ui_router = APIRouter()
+debug_router = APIRouter()
+
+# UI_ENABLED=0 serves the JSON API only (no /ui routes, no jinja2 import)
+UI_ENABLED = os.getenv("UI_ENABLED", "1") in ("1", "true", "True")
+
+_started = False
+_startup_lock = threading.Lock()
+
+
+def startup():
+    """Bring the schema up to date (tables, column patches, indexes, dev admin
+    seed). A single version check when the database is already current."""
+    global _started
+    with _startup_lock:
+        if not _started:
+            migrations.upgrade(engine)
+            _started = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(startup)
+    yield
+    await group_commit.shutdown()
+    auth.shutdown_hash_pool()
+
+
+@lru_cache(maxsize=None)
+def _templates():
+    # jinja2 is only imported once a UI page is rendered
+    from fastapi.templating import Jinja2Templates
+    return Jinja2Templates(directory="app/templates")
+
+
+# Dependency to get DB session per request. Handlers never touch the session
+# directly on the event loop: they go through `run_db`, which uses the async
+# engine when DB_ASYNC=1 and the threadpool otherwise.
+
+async def get_db():
+    if not _started:
+        await run_in_threadpool(startup)
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
     db = SessionLocal()
     try:
-        existing = db.query(models.User).filter(models.User.role == 'admin').first()
-        if not existing:
-            admin_pw = os.getenv('ADMIN_PASSWORD', 'admin')
-            # create_user will hash the password
-            crud.create_user(db, schemas.UserCreate(name='admin', email=None, role='admin', password=admin_pw))
-            print('Seeded default admin user (name=admin) for local/dev')
+        yield db
     finally:
-        db.close()
-except Exception:
-    # If anything goes wrong during startup seeding, do not crash the app.
-    pass
+        await run_in_threadpool(db.close)
 
-app = FastAPI(title="SW Testing Mini App")
+# Page size bounds for the keyset-paginated list endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Search returns the best matches only
+SEARCH_LIMIT = 50
 
-# Initialize runtime vulnerable flag from environment (can be toggled at runtime)
-env_vuln = os.getenv("VULNERABLE", "0")
-config.set_vulnerable(env_vuln in ("1", "true", "True"))
 
-# UI setup
-templates = Jinja2Templates(directory="app/templates")
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+def _cursor_to_id(after: str | None) -> int | None:
+    if after is None:
+        return None
+    try:
+        return decode_cursor(after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
 
-# Dependency to get DB session per request
 
-def get_db():
-    db = SessionLocal()
+def _page(rows: list, limit: int, key: str = "id") -> dict:
+    # rows were fetched with limit + 1 so we can tell whether a next page exists
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return {"items": rows, "next_cursor": encode_cursor(getattr(rows[-1], key))}
+    return {"items": rows, "next_cursor": None}
+
+
+# FAST_JSON=1: GET /users and GET /orders encode their column rows with
+# app/fastjson.py instead of validating them into the schemas first.
+FAST_JSON = os.getenv("FAST_JSON", "0") in ("1", "true", "True")
+
+# Encoders for cached read endpoints; they produce the same bytes FastAPI
+# would for the route's response_model.
+_USERS_ADAPTER = TypeAdapter(Union[schemas.UserPage, List[schemas.UserRead]])
+_ORDERS_ADAPTER = TypeAdapter(Union[schemas.OrderPage, List[schemas.OrderRead]])
+_USER_DETAIL_ADAPTER = TypeAdapter(schemas.UserDetail)
+
+
+async def _cached_json(request: Request, tables: tuple, adapter: TypeAdapter, load, dump=None) -> Response:
+    """Serve a read endpoint through the response cache (see app/cache.py).
+
+    `load()` produces the response data on a miss; `tables` are the tables it
+    reads, whose versions decide when the cached body goes stale. With ETAGS=1
+    a matching If-None-Match is answered with 304 before any query while the
+    cached entry is live, and after rebuilding the body otherwise.
+    `dump(data) -> bytes`, when given, replaces validating through `adapter`.
+    """
+    key = f"{request.url.path}?{request.url.query}"
+    if_none_match = request.headers.get("if-none-match") if cache.ETAGS else None
+    if if_none_match:
+        etag = cache.responses.etag(key)
+        if etag and cache.etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    # snapshot versions before reading so a concurrent write can't be masked
+    versions = cache.responses.versions(tables)
+    cached = cache.responses.lookup(key)
+    if cached is not None:
+        body, etag = cached
+        x_cache = "HIT"
+    else:
+        data = await load()
+        with instrumentation.timed("encode"):
+            if dump is not None:
+                body = dump(data)
+            else:
+                body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+        etag = cache.body_etag(body) if cache.ETAGS else None
+        cache.responses.set(key, body, versions, etag)
+        x_cache = "MISS"
+    if not cache.ETAGS:
+        return Response(body, media_type="application/json", headers={"X-Cache": x_cache})
+    if etag is None:  # cached before ETAGS was switched on
+        etag = cache.body_etag(body)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if cache.etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers={**headers, "X-Cache": x_cache})
+
+
+async def require_admin_token(request: Request):
+    """A bearer token with the admin role claim; no acting-user fallback."""
+    authorization = request.headers.get("authorization")
+    if not profiler.is_admin(authorization):
+        raise HTTPException(status_code=403 if authorization else 401, detail="admin token required")
+
+
+@debug_router.get("/debug/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin_token)])
+async def debug_profile(
+    seconds: float = Query(5.0, gt=0, le=profiler.MAX_SECONDS), interval_ms: float = Query(5.0, ge=1, le=1000)
+):
+    """Sample this worker's threads for `seconds`; collapsed stacks for a flame graph."""
+    if not profiler.sampling.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="a profile is already running")
     try:
-        yield db
+        # the sampler sleeps between samples in a worker thread; the event
+        # loop keeps serving (and is sampled)
+        stacks = await run_in_threadpool(profiler.sample, seconds, interval_ms / 1000)
     finally:
-        db.close()
+        profiler.sampling.release()
+    return PlainTextResponse(stacks)
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return cache.responses.stats()
 
-@app.get("/health")
+
+@router.get("/health")
 async def health():
     return {"status": "ok"}
 
-@app.post("/users", response_model=schemas.UserRead, status_code=201)
+async def _offload_hash(fn, *args):
+    try:
+        return await fn(*args)
+    except HashQueueFull:
+        raise HTTPException(status_code=429, detail="too many concurrent password operations", headers={"Retry-After": "1"})
+
+
+@router.post("/users", response_model=schemas.UserRead, status_code=201)
 async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    created = crud.create_user(db, user)
+    pwd_hash = None
+    if user.password:
+        pwd_hash = await _offload_hash(hash_password_async, user.password)
+    created = await run_db(db, crud.create_user, user, password_hash=pwd_hash)
     return created
 
-@app.get("/users", response_model=List[schemas.UserRead])
-async def get_users(db: Session = Depends(get_db)):
-    return crud.list_users(db)
-
-@app.post("/orders", response_model=schemas.OrderRead, status_code=201)
+@router.get("/users", response_model=Union[schemas.UserPage, List[schemas.UserRead]])
+async def get_users(
+    request: Request,
+    after: str | None = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    paginate: bool = Query(True, description="Set to false for the legacy unpaginated list"),
+    db: Session = Depends(get_db),
+):
+    async def load():
+        if not paginate:
+            return await run_db(db, crud.list_users_rows)
+        return _page(await run_db(db, crud.list_users_rows, after_id=_cursor_to_id(after), limit=limit + 1), limit)
+
+    return await _cached_json(request, ("users",), _USERS_ADAPTER, load, dump=fastjson.encode if FAST_JSON else None)
+
+@router.post("/orders", response_model=schemas.OrderRead, status_code=201)
 async def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
     try:
-        created = crud.create_order(db, order)
+        created = await _create_order(db, order)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     return created
 
-@app.get("/orders", response_model=List[schemas.OrderRead])
-async def get_orders(db: Session = Depends(get_db)):
-    return crud.list_orders(db)
 
-@app.get("/search", response_model=List[schemas.UserRead])
-async def search_users(q: str = Query("", min_length=0, max_length=100), db: Session = Depends(get_db)):
+async def _create_order(db: Session, order: schemas.OrderCreate):
+    """crud.create_order, or with GROUP_COMMIT=1 a place in the next batch
+    (app/group_commit.py); returns once the order is committed."""
+    if not group_commit.ENABLED:
+        return await run_db(db, crud.create_order, order)
+    order_id = await group_commit.submit(db, order)
+    return {"id": order_id, "user_id": order.user_id, "amount": crud.round_amount(order.amount)}
+
+# Upper bounds on one POST /orders/bulk request; both are checked while the
+# body is read, so an oversized upload is refused before it is buffered or parsed
+BULK_MAX_ROWS = 50_000
+BULK_MAX_BYTES = 16 * 1024 * 1024
+
+
+def _too_many_rows():
+    return HTTPException(status_code=413, detail=f"at most {BULK_MAX_ROWS} rows per request")
+
+
+def _too_large():
+    return HTTPException(status_code=413, detail=f"body larger than {BULK_MAX_BYTES} bytes")
+
+
+async def _read_chunks(request: Request):
+    """The request body chunk by chunk, refused with 413 past BULK_MAX_BYTES."""
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > BULK_MAX_BYTES:
+        raise _too_large()
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > BULK_MAX_BYTES:
+            raise _too_large()
+        yield chunk
+
+
+def _add_ndjson_rows(items: list, lines: list):
+    for line in lines:
+        if not line.strip():
+            continue
+        if len(items) == BULK_MAX_ROWS:
+            raise _too_many_rows()
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            # keep the row so it gets reported at its index
+            items.append(None)
+
+
+async def _read_bulk_rows(request: Request) -> list:
+    if "ndjson" in request.headers.get("content-type", ""):
+        # one JSON document per line, parsed as it arrives; blank lines are ignored
+        items, pending = [], b""
+        async for chunk in _read_chunks(request):
+            *lines, pending = (pending + chunk).split(b"\n")
+            _add_ndjson_rows(items, lines)
+        _add_ndjson_rows(items, [pending])
+        return items
+    body = b"".join([chunk async for chunk in _read_chunks(request)])
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="body must be a JSON array or NDJSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="body must be a JSON array or NDJSON")
+    if len(items) > BULK_MAX_ROWS:
+        raise _too_many_rows()
+    return items
+
+
+@router.post("/orders/bulk", response_model=schemas.BulkOrderResponse)
+async def create_orders_bulk(request: Request, db: Session = Depends(get_db)):
+    """Create many orders in one request.
+
+    Accepts a JSON array of OrderCreate objects, or NDJSON when sent with
+    `Content-Type: application/x-ndjson`. Each row is validated on its own and
+    reported in `results` at its input index.
+    """
+    items = await _read_bulk_rows(request)
+
+    results = [schemas.BulkOrderResult(index=i) for i in range(len(items))]
+    valid, positions = [], []
+    for i, item in enumerate(items):
+        try:
+            valid.append(schemas.OrderCreate.model_validate(item))
+            positions.append(i)
+        except ValidationError as e:
+            err = e.errors()[0]
+            loc = ".".join(str(p) for p in err["loc"])
+            results[i].error = f"{loc}: {err['msg']}" if loc else err["msg"]
+
+    for i, (order_id, error) in zip(positions, await run_db(db, crud.bulk_create_orders, valid)):
+        results[i].id = order_id
+        results[i].error = error
+
+    created = sum(1 for r in results if r.id is not None)
+    return schemas.BulkOrderResponse(created=created, failed=len(results) - created, results=results)
+
+
+@router.get("/orders", response_model=Union[schemas.OrderPage, List[schemas.OrderRead]])
+async def get_orders(
+    request: Request,
+    after: str | None = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    paginate: bool = Query(True, description="Set to false for the legacy unpaginated list"),
+    db: Session = Depends(get_db),
+):
+    async def load():
+        if not paginate:
+            return await run_db(db, crud.list_orders_rows)
+        return _page(await run_db(db, crud.list_orders_rows, after_id=_cursor_to_id(after), limit=limit + 1), limit)
+
+    return await _cached_json(request, ("orders",), _ORDERS_ADAPTER, load, dump=fastjson.encode if FAST_JSON else None)
+
+_ORDER_STATS_ADAPTER = TypeAdapter(schemas.OrderStats)
+_USER_ORDER_STATS_ADAPTER = TypeAdapter(schemas.UserOrderStatsPage)
+
+
+@router.get("/stats/orders", response_model=schemas.OrderStats)
+async def get_order_stats(
+    request: Request,
+    user_id: int | None = Query(None, description="Restrict to one user's orders"),
+    min_amount: Decimal | None = Query(None, ge=0),
+    max_amount: Decimal | None = Query(None, ge=0),
+    db: Session = Depends(get_db),
+):
+    """Order count, total, min, max and average computed in SQL."""
+    async def load():
+        return await run_db(db, crud.order_stats, user_id=user_id, min_amount=min_amount, max_amount=max_amount)
+
+    return await _cached_json(request, ("orders",), _ORDER_STATS_ADAPTER, load)
+
+
+@router.get("/stats/orders/by-user", response_model=schemas.UserOrderStatsPage)
+async def get_order_stats_by_user(
+    request: Request,
+    after: str | None = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    min_amount: Decimal | None = Query(None, ge=0),
+    max_amount: Decimal | None = Query(None, ge=0),
+    db: Session = Depends(get_db),
+):
+    """Per-user order aggregates (one GROUP BY), paginated by user id."""
+    async def load():
+        rows = await run_db(
+            db,
+            crud.order_stats_by_user,
+            after_user_id=_cursor_to_id(after),
+            limit=limit + 1,
+            min_amount=min_amount,
+            max_amount=max_amount,
+        )
+        return _page(rows, limit, key="user_id")
+
+    return await _cached_json(request, ("orders",), _USER_ORDER_STATS_ADAPTER, load)
+
+
+def _stream_export(db: Session, iter_rows, fields, fmt: str):
+    # The session is owned by the stream: it must stay open until the last
+    # row is written, which happens after the handler has returned.
+    # Starlette iterates this sync generator in the threadpool.
+    try:
+        yield from export.encode(iter_rows(db), fields, fmt)
+    finally:
+        db.close()
+
+
+async def _astream_export(db: AsyncSession, query, fields, fmt: str):
+    # DB_ASYNC path: server-side cursor on the async engine
+    try:
+        result = await db.stream(query)
+        async for chunk in export.aencode(result.partitions(export.CHUNK_ROWS), fields, fmt):
+            yield chunk
+    finally:
+        await db.close()
+
+
+def _export_response(db, name: str, iter_rows, query, fields, fmt: str) -> StreamingResponse:
+    if isinstance(db, AsyncSession):
+        body = _astream_export(db, query, fields, fmt)
+    else:
+        body = _stream_export(db, iter_rows, fields, fmt)
+    return StreamingResponse(
+        body,
+        media_type=export.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+@router.get("/export/users")
+async def export_users(format: str = Query("ndjson", pattern="^(ndjson|csv)$"), db: Session = Depends(get_db)):
+    """Stream every user as NDJSON or CSV with bounded memory."""
+    return _export_response(db, "users", crud.iter_users, crud.users_export_query(), crud.USER_EXPORT_FIELDS, format)
+
+
+@router.get("/export/orders")
+async def export_orders(format: str = Query("ndjson", pattern="^(ndjson|csv)$"), db: Session = Depends(get_db)):
+    """Stream every order as NDJSON or CSV with bounded memory."""
+    return _export_response(db, "orders", crud.iter_orders, crud.orders_export_query(), crud.ORDER_EXPORT_FIELDS, format)
+
+
+@router.get("/search", response_model=List[schemas.UserRead])
+async def search_users(
+    q: str = Query("", min_length=0, max_length=100),
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
     # Black-box injection safe: ORM filter with parameterization
     if not q:
         return []
-    results = db.query(models.User).filter(models.User.name.like(f"%{q}%")).all()
+    results = await run_db(db, crud.search_users_rows, q, limit=limit)
     return results
 
 
-@app.get("/search_vuln", response_model=List[schemas.UserRead])
+@router.get("/search_vuln", response_model=List[schemas.UserRead])
 async def search_users_vuln(q: str = Query("", min_length=0, max_length=200), db: Session = Depends(get_db)):
     """A toggleable endpoint that demonstrates vulnerable vs safe search.
 
@@ -118,52 +451,76 @@ async def search_users_vuln(q: str = Query("", min_length=0, max_length=200), db
     if config.is_vulnerable():
         # Vulnerable: build SQL with direct interpolation (DO NOT DO THIS IN REAL APPS)
         sql = f"SELECT id, name, email, role FROM users WHERE name = '{q}'"
-        rows = db.execute(text(sql)).all()
+        rows = await run_db(db, lambda s: s.execute(text(sql)).all())
         # Map rows to UserRead-like dicts
         results = []
         for r in rows:
-            results.append(models.User(id=r[0], name=r[1], email=r[2], role=(r[3] if len(r) > 3 else 'user')))
+            results.append({"id": r[0], "name": r[1], "email": r[2], "role": (r[3] if len(r) > 3 else 'user')})
         return results
     else:
         # Safe: parameterized ORM filter for exact match
-        return db.query(models.User).filter(models.User.name == q).all()
-
-
-@app.get("/users/{user_id}", response_model=schemas.UserDetail)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = crud.get_user_with_orders(db, user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="user not found")
-    # ensure orders are loaded
-    return user
-
-
-@app.delete("/orders/{order_id}")
+        return await run_db(db, crud.find_users_by_name_rows, q)
+
+
+@router.get("/users/{user_id}", response_model=schemas.UserDetail)
+async def get_user(
+    user_id: int,
+    request: Request,
+    orders_after: str | None = Query(None, description="Cursor returned as orders_next_cursor"),
+    orders_limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    paginate: bool = Query(True, description="Set to false to embed every order"),
+    db: Session = Depends(get_db),
+):
+    async def load():
+        if not paginate:
+            # whole relationship, eagerly loaded in one extra IN query
+            user = await run_db(db, crud.get_user_with_orders, user_id, loader="selectin")
+            if not user:
+                raise HTTPException(status_code=404, detail="user not found")
+            orders, next_cursor = user.orders, None
+        else:
+            user, orders = await run_db(
+                db, crud.get_user_with_orders_page, user_id, after_id=_cursor_to_id(orders_after), limit=orders_limit + 1
+            )
+            if not user:
+                raise HTTPException(status_code=404, detail="user not found")
+            page = _page(orders, orders_limit)
+            orders, next_cursor = page["items"], page["next_cursor"]
+        order_count, order_total = crud.order_summary(user)
+        return {
+            "id": user.id,
+            "name": user.name,
+            "email": user.email,
+            "role": user.role,
+            "orders": orders,
+            "orders_next_cursor": next_cursor,
+            "order_count": order_count,
+            "order_total": order_total,
+        }
+
+    return await _cached_json(request, ("users", "orders"), _USER_DETAIL_ADAPTER, load)
+
+
+@router.delete("/orders/{order_id}")
 async def api_delete_order(order_id: int, db: Session = Depends(get_db)):
-    ok = crud.delete_order(db, order_id)
+    ok = await run_db(db, crud.delete_order, order_id)
     if not ok:
         raise HTTPException(status_code=404, detail="order not found")
     return {"deleted": order_id}
 
 
-@app.put("/orders/{order_id}")
-async def api_update_order(order_id: int, payload: dict, db: Session = Depends(get_db), x_acting_user_id: int | None = Header(default=None), request: Request = None):
-    # payload may contain 'amount'
-    order = db.get(models.Order, order_id)
-    if not order:
-        raise HTTPException(status_code=404, detail="order not found")
+async def resolve_acting_user(request: Request, x_acting_user_id: int | None, db: Session) -> auth.ActingUser:
+    """Who is making this write: the bearer token's subject, else X-Acting-User-Id.
 
-    # Authorization: acting user must be the order owner or an admin
-    # resolve acting user id from Authorization or header
+    Verified token claims and the user's role are served from the caches in
+    app/auth.py, so a repeat caller costs neither a signature check nor a query.
+    """
     acting_id = None
-    auth = None
-    if request:
-        auth = request.headers.get('authorization')
-    if auth and auth.lower().startswith('bearer '):
-        token = auth.split(None, 1)[1]
+    authorization = request.headers.get('authorization')
+    if authorization and authorization.lower().startswith('bearer '):
+        token = authorization.split(None, 1)[1]
         try:
-            payload_token = decode_access_token(token)
-            acting_id = int(payload_token.get('sub'))
+            acting_id = int(auth.decode_access_token_cached(token).get('sub'))
         except Exception:
             raise HTTPException(status_code=401, detail='invalid token')
     elif x_acting_user_id is not None:
@@ -171,29 +528,45 @@ async def api_update_order(order_id: int, payload: dict, db: Session = Depends(g
 
     if acting_id is None:
         raise HTTPException(status_code=403, detail="missing acting user header or token")
-    acting = db.get(models.User, acting_id)
-    if not acting:
-        raise HTTPException(status_code=403, detail="acting user not found")
+    acting = auth.get_cached_acting_user(acting_id)
+    if acting is None:
+        user = await run_db(db, crud.get_user, acting_id)
+        if not user:
+            raise HTTPException(status_code=403, detail="acting user not found")
+        acting = auth.ActingUser(id=user.id, role=user.role)
+        auth.cache_acting_user(acting)
+    return acting
+
+
+@router.put("/orders/{order_id}")
+async def api_update_order(order_id: int, payload: dict, db: Session = Depends(get_db), x_acting_user_id: int | None = Header(default=None), request: Request = None):
+    # payload may contain 'amount'
+    order = await run_db(db, crud.get_order, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="order not found")
+
+    # Authorization: acting user must be the order owner or an admin
+    acting = await resolve_acting_user(request, x_acting_user_id, db)
     if acting.role != 'admin' and acting.id != order.user_id:
         raise HTTPException(status_code=403, detail="forbidden")
 
     amount = payload.get('amount')
     try:
-        updated = crud.update_order(db, order_id, amount=amount)
+        updated = await run_db(db, crud.update_order, order_id, amount=amount)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     return updated
 
 
-@app.delete("/users/{user_id}")
+@router.delete("/users/{user_id}")
 async def api_delete_user(user_id: int, db: Session = Depends(get_db)):
-    ok = crud.delete_user(db, user_id)
+    ok = await run_db(db, crud.delete_user, user_id)
     if not ok:
         raise HTTPException(status_code=404, detail="user not found")
     return {"deleted": user_id}
 
 
-@app.put("/users/{user_id}")
+@router.put("/users/{user_id}")
 async def api_update_user(user_id: int, payload: dict, db: Session = Depends(get_db), x_acting_user_id: int | None = Header(default=None), request: Request = None):
     # Accept raw dict to keep things simple for this small app
     name = payload.get("name")
@@ -201,78 +574,72 @@ async def api_update_user(user_id: int, payload: dict, db: Session = Depends(get
     role = payload.get("role")
 
     # perform update
-    updated = crud.update_user(db, user_id, name=name, email=email)
+    updated = await run_db(db, crud.update_user, user_id, name=name, email=email)
     if not updated:
         raise HTTPException(status_code=404, detail="user not found")
 
-    # role changes require admin privilege
+    # role changes require admin privilege; plain updates need no acting user
     if role is not None:
-        # resolve acting user: prefer Authorization bearer token, fall back to X-Acting-User-Id
-        acting_id = None
-        # check Authorization
-        auth = None
-        if request:
-            auth = request.headers.get('authorization')
-        if auth and auth.lower().startswith('bearer '):
-            token = auth.split(None, 1)[1]
-            try:
-                payload_token = decode_access_token(token)
-                acting_id = int(payload_token.get('sub'))
-            except Exception:
-                raise HTTPException(status_code=401, detail='invalid token')
-        elif x_acting_user_id is not None:
-            acting_id = int(x_acting_user_id)
-
-        if acting_id is None:
-            raise HTTPException(status_code=403, detail="missing acting user header or token")
-        acting = db.get(models.User, acting_id)
-        if not acting or acting.role != 'admin':
+        acting = await resolve_acting_user(request, x_acting_user_id, db)
+        if acting.role != 'admin':
             raise HTTPException(status_code=403, detail="forbidden: admin required to change role")
         try:
-            updated = crud.update_user_role(db, user_id, role)
+            updated = await run_db(db, crud.update_user_role, user_id, role)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
 
     return updated
 
 
-@app.get("/ui/users/{user_id}", response_class=HTMLResponse)
-async def ui_user_detail(request: Request, user_id: int, db: Session = Depends(get_db)):
-    user = crud.get_user_with_orders(db, user_id)
+async def _user_detail_context(db: Session, user_id: int, orders_after: str | None = None) -> dict:
+    # the detail page only ever renders one page of orders
+    user, orders = await run_db(
+        db, crud.get_user_with_orders_page, user_id, after_id=_cursor_to_id(orders_after), limit=DEFAULT_PAGE_SIZE + 1
+    )
+    page = _page(orders, DEFAULT_PAGE_SIZE)
+    order_count, order_total = crud.order_summary(user) if user else (0, None)
+    return {
+        "user": user,
+        "orders": page["items"],
+        "orders_next_cursor": page["next_cursor"],
+        "order_count": order_count,
+        "order_total": order_total,
+    }
+
+
+@ui_router.get("/ui/users/{user_id}", response_class=HTMLResponse)
+async def ui_user_detail(request: Request, user_id: int, orders_after: str | None = None, db: Session = Depends(get_db)):
+    ctx = await _user_detail_context(db, user_id, orders_after)
+    user = ctx["user"]
     if not user:
-        return templates.TemplateResponse(
+        return _stream_template(
+            request,
             "index.html",
-            {"request": request, "users": crud.list_users(db), "orders": crud.list_orders(db), "q": "", "search_results": None, "error": "user not found", "vulnerable": config.is_vulnerable()},
+            {**(await _index_context(db)), "q": "", "search_results": None, "error": "user not found", "vulnerable": config.is_vulnerable()},
             status_code=404,
         )
-    return templates.TemplateResponse(
-        "user_detail.html",
-        {"request": request, "user": user, "vulnerable": config.is_vulnerable()},
-    )
+    return _stream_template(request, "user_detail.html", {**ctx, "vulnerable": config.is_vulnerable()})
 
 
-@app.post("/ui/users/{user_id}/orders")
+@ui_router.post("/ui/users/{user_id}/orders")
 async def ui_create_order_for_user(request: Request, user_id: int, amount: str = Form(...), db: Session = Depends(get_db)):
     # Create order then redirect back to user detail
     try:
-        crud.create_order(db, schemas.OrderCreate(user_id=user_id, amount=amount))
+        await _create_order(db, schemas.OrderCreate(user_id=user_id, amount=amount))
         return RedirectResponse(url=f"/ui/users/{user_id}", status_code=303)
     except ValueError as e:
-        users = crud.list_users(db)
-        orders = crud.list_orders(db)
-        return templates.TemplateResponse(
-            "user_detail.html",
-            {"request": request, "user": crud.get_user_with_orders(db, user_id), "error": str(e), "vulnerable": config.is_vulnerable()},
-            status_code=400,
+        ctx = await _user_detail_context(db, user_id)
+        return _render(
+            request, "user_detail.html", {**ctx, "error": str(e), "vulnerable": config.is_vulnerable()}, status_code=400
         )
 
 
-@app.get("/vulnerable")
+@router.get("/vulnerable")
 async def get_vulnerable():
     return {"vulnerable": config.is_vulnerable()}
 
 
-@app.post("/vulnerable")
+@router.post("/vulnerable")
 async def set_vulnerable_endpoint(request: Request):
     """Set the runtime vulnerable flag. Accepts value via query, form, or JSON body.
 
@@ -312,7 +679,7 @@ async def set_vulnerable_endpoint(request: Request):
     return {"vulnerable": config.is_vulnerable()}
 
 
-@app.post("/auth/login")
+@router.post("/auth/login")
 async def auth_login(payload: dict, db: Session = Depends(get_db)):
     # Secure-only flow: require user_id and password. Legacy no-password
     # login has been removed to enforce explicit authentication.
@@ -322,23 +689,86 @@ async def auth_login(payload: dict, db: Session = Depends(get_db)):
     pwd = payload.get('password')
     if not pwd:
         raise HTTPException(status_code=401, detail="password required")
-    user = db.get(models.User, int(uid))
+    user = await run_db(db, crud.get_user, int(uid))
     if not user:
         raise HTTPException(status_code=404, detail="user not found")
-    from .auth import verify_password
     if not user.password_hash:
         # If a user exists but has no password set, deny login to remove legacy flow.
         raise HTTPException(status_code=401, detail="password required")
-    if not verify_password(pwd, user.password_hash):
+    if not await _offload_hash(verify_password_async, pwd, user.password_hash):
         raise HTTPException(status_code=401, detail="invalid credentials")
     token = create_access_token(user.id, user.role)
     return {"access_token": token, "token_type": "bearer"}
 
 # -------------------- UI Views --------------------
-@app.get("/ui", response_class=HTMLResponse)
+# Rows per page in the UI lists; later pages are fetched as fragments
+UI_PAGE_SIZE = 50
+# Rendered template text is flushed to the client in chunks of about this size
+TEMPLATE_CHUNK_CHARS = 8192
+
+
+def _render(request: Request, name: str, context: dict, status_code: int = 200) -> Response:
+    """Render a small template in one piece (fragments, error re-renders)."""
+    with instrumentation.timed("render"):
+        return _templates().TemplateResponse(name, {"request": request, **context}, status_code=status_code)
+
+
+def _stream_template(request: Request, name: str, context: dict, status_code: int = 200) -> StreamingResponse:
+    """Render `name` incrementally: the browser gets the head of the page (and
+    starts fetching CSS/JS) while the rest is still being rendered."""
+    template = _templates().get_template(name)
+    context = {"request": request, **context}
+
+    pieces = template.generate(context)
+
+    def next_chunk() -> str:
+        buf, size = [], 0
+        with instrumentation.timed("render"):
+            for piece in pieces:
+                buf.append(piece)
+                size += len(piece)
+                if size >= TEMPLATE_CHUNK_CHARS:
+                    break
+        return "".join(buf)
+
+    def chunks():
+        while chunk := next_chunk():
+            yield chunk
+
+    return StreamingResponse(chunks(), status_code=status_code, media_type="text/html; charset=utf-8")
+
+
+async def _users_fragment_context(db: Session, after: str | None = None) -> dict:
+    users = await run_db(db, crud.list_users_rows, after_id=_cursor_to_id(after), limit=UI_PAGE_SIZE + 1)
+    page = _page(users, UI_PAGE_SIZE)
+    return {"users": page["items"], "users_next_cursor": page["next_cursor"], "after": after}
+
+
+async def _orders_fragment_context(db: Session, after: str | None = None) -> dict:
+    orders = await run_db(db, crud.list_orders_rows, after_id=_cursor_to_id(after), limit=UI_PAGE_SIZE + 1)
+    page = _page(orders, UI_PAGE_SIZE)
+    return {"orders": page["items"], "orders_next_cursor": page["next_cursor"], "after": after}
+
+
+async def _index_context(db: Session) -> dict:
+    # first page of each list only; "Load more" fetches the rest
+    return {**(await _users_fragment_context(db)), **(await _orders_fragment_context(db)), "after": None}
+
+
+@ui_router.get("/ui/fragments/users", response_class=HTMLResponse)
+async def ui_users_fragment(request: Request, after: str | None = None, db: Session = Depends(get_db)):
+    """The next page of user rows for the index page's "Load more" button."""
+    return _render(request, "_user_rows.html", await _users_fragment_context(db, after))
+
+
+@ui_router.get("/ui/fragments/orders", response_class=HTMLResponse)
+async def ui_orders_fragment(request: Request, after: str | None = None, db: Session = Depends(get_db)):
+    return _render(request, "_order_rows.html", await _orders_fragment_context(db, after))
+
+
+@ui_router.get("/ui", response_class=HTMLResponse)
 async def ui_index(request: Request, q: str = "", db: Session = Depends(get_db)):
-    users = crud.list_users(db)
-    orders = crud.list_orders(db)
+    lists = await _index_context(db)
     search_results = None
     toast = None
     if q:
@@ -347,13 +777,12 @@ async def ui_index(request: Request, q: str = "", db: Session = Depends(get_db))
         if not config.is_vulnerable() and sanitized_q != (q or ""):
             # Input was cleaned in safe mode — inform the user and use the sanitized value
             toast = "Invalid input detected — input has been sanitized for safety."
-        search_results = db.query(models.User).filter(models.User.name.like(f"%{sanitized_q}%")).all()
-    return templates.TemplateResponse(
+        search_results = await run_db(db, crud.search_users_rows, sanitized_q, limit=SEARCH_LIMIT)
+    return _stream_template(
+        request,
         "index.html",
             {
-                "request": request,
-                "users": users,
-                "orders": orders,
+                **lists,
                 "q": q,
                 "search_results": search_results,
                 "error": None,
@@ -362,22 +791,46 @@ async def ui_index(request: Request, q: str = "", db: Session = Depends(get_db))
             },
     )
 
-@app.post("/ui/users")
+@ui_router.post("/ui/users")
 async def ui_create_user(name: str = Form(...), email: str | None = Form(default=None), db: Session = Depends(get_db)):
-    crud.create_user(db, schemas.UserCreate(name=name, email=email or None))
+    await run_db(db, crud.create_user, schemas.UserCreate(name=name, email=email or None))
     return RedirectResponse(url="/ui", status_code=303)
 
-@app.post("/ui/orders")
+@ui_router.post("/ui/orders")
 async def ui_create_order(request: Request, user_id: int = Form(...), amount: str = Form(...), db: Session = Depends(get_db)):
     try:
-        crud.create_order(db, schemas.OrderCreate(user_id=user_id, amount=amount))
+        await _create_order(db, schemas.OrderCreate(user_id=user_id, amount=amount))
         return RedirectResponse(url="/ui", status_code=303)
     except ValueError as e:
         # Re-render with error message
-        users = crud.list_users(db)
-        orders = crud.list_orders(db)
-        return templates.TemplateResponse(
+        return _stream_template(
+            request,
             "index.html",
-            {"request": request, "users": users, "orders": orders, "q": "", "search_results": None, "error": str(e)},
+            {**(await _index_context(db)), "q": "", "search_results": None, "error": str(e)},
             status_code=400,
         )
+
+
+def create_app(ui: bool | None = None, instrument: bool | None = None) -> FastAPI:
+    """Build the ASGI app. `ui` defaults to UI_ENABLED, `instrument` to
+    INSTRUMENTATION (see app/instrumentation.py)."""
+    app = FastAPI(title="SW Testing Mini App", lifespan=lifespan)
+
+    # Initialize runtime vulnerable flag from environment (can be toggled at runtime)
+    env_vuln = os.getenv("VULNERABLE", "0")
+    config.set_vulnerable(env_vuln in ("1", "true", "True"))
+
+    app.include_router(router)
+    if UI_ENABLED if ui is None else ui:
+        from fastapi.staticfiles import StaticFiles
+        app.include_router(ui_router)
+        app.mount("/static", StaticFiles(directory="app/static"), name="static")
+    if profiler.ENABLED:
+        app.include_router(debug_router)
+        app.add_middleware(profiler.ProfileMiddleware)
+    if instrumentation.ENABLED if instrument is None else instrument:
+        instrumentation.install(app, [engine] + ([async_engine.sync_engine] if async_engine is not None else []))
+    return app
+
+
+app = create_app()
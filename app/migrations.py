@@ -0,0 +1,142 @@
+"""Versioned schema migrations, run once per database instead of on every start.
+
+`schema_version` holds the number of the last applied step. `upgrade()` reads
+it (one single-row query) and returns immediately when the database is
+current, so worker startup does not depend on table size. Otherwise it applies
+the missing steps in order, each in its own transaction, bumping the version
+as it goes. On SQLite the whole upgrade holds the write lock (BEGIN IMMEDIATE),
+so workers starting together wait for the first one instead of racing on DDL,
+then see the new version and do nothing.
+
+Steps must be idempotent: databases from before this runner existed start at
+version 0 and replay every step, some of which they already have.
+
+Usage:
+  python -m app.migrations            # upgrade app.db (or DATABASE_URL)
+  python -m app.migrations --status
+"""
+import argparse
+import os
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from .db import Base
+from . import models
+
+
+def _columns(conn: Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+
+
+def create_tables(conn: Connection):
+    """Tables, indexes, the search index and the order summary from the models."""
+    Base.metadata.create_all(bind=conn)
+
+
+def users_role_and_password_hash(conn: Connection):
+    """Columns added to users after the first release."""
+    cols = _columns(conn, "users")
+    if "role" not in cols:
+        conn.execute(text("ALTER TABLE users ADD COLUMN role TEXT DEFAULT 'user' NOT NULL"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_role ON users (role)"))
+    if "password_hash" not in cols:
+        conn.execute(text("ALTER TABLE users ADD COLUMN password_hash TEXT"))
+    conn.execute(text("UPDATE users SET role='user' WHERE role IS NULL"))
+
+
+def users_email(conn: Connection):
+    """V1 -> V2: add users.email and backfill it from the name.
+
+    Only a database that lacks the column is backfilled; V2 users may have no
+    email on purpose. For very large V1 files run the batched
+    `migration.migration_v1_to_v2 --batch-size N` first, this step then only
+    records the version.
+    """
+    if "email" in _columns(conn, "users"):
+        return
+    conn.execute(text("ALTER TABLE users ADD COLUMN email TEXT"))
+    conn.execute(text("UPDATE users SET email = name || '@example.com' WHERE email IS NULL"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_email ON users (email)"))
+
+
+def orders_user_id_amount_index(conn: Connection):
+    # create_all does not add new indexes to tables that already exist
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_orders_user_id_amount ON orders (user_id, amount)"))
+
+
+def seed_admin(conn: Connection):
+    """Seed an admin for local/dev (password from ADMIN_PASSWORD, default 'admin')."""
+    if conn.execute(text("SELECT 1 FROM users WHERE role = 'admin' LIMIT 1")).first():
+        return
+    from .auth import hash_password
+    conn.execute(
+        models.User.__table__.insert().values(
+            name="admin", role="admin", password_hash=hash_password(os.getenv("ADMIN_PASSWORD", "admin"))
+        )
+    )
+    print("Seeded default admin user (name=admin) for local/dev")
+
+
+# Append only: a step's position is its version number.
+MIGRATIONS = [
+    create_tables,
+    users_role_and_password_hash,
+    users_email,
+    orders_user_id_amount_index,
+    seed_admin,
+]
+LATEST = len(MIGRATIONS)
+
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    return conn.execute(text("SELECT version FROM schema_version")).scalar() or 0
+
+
+def _set_version(conn: Connection, version: int):
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    if conn.execute(text("UPDATE schema_version SET version = :v"), {"v": version}).rowcount == 0:
+        conn.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": version})
+
+
+def upgrade(engine: Engine) -> list[str]:
+    """Bring the database to LATEST. Returns the names of the steps applied."""
+    with engine.connect() as conn:
+        if current_version(conn) >= LATEST:
+            return []
+        conn.rollback()
+
+        applied = []
+        sqlite = conn.dialect.name == "sqlite"
+        while True:
+            if sqlite:
+                # take the write lock before reading the version
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+            version = current_version(conn)
+            if version >= LATEST:
+                conn.rollback()
+                return applied
+            step = MIGRATIONS[version]
+            step(conn)
+            _set_version(conn, version + 1)
+            conn.commit()
+            applied.append(step.__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--status", action="store_true", help="Print the current and latest version and exit")
+    args = parser.parse_args()
+    from .db import engine
+    if args.status:
+        with engine.connect() as conn:
+            print(f"schema version {current_version(conn)} (latest {LATEST})")
+        return
+    for name in upgrade(engine):
+        print(f"applied {name}")
+
+
+if __name__ == "__main__":
+    main()
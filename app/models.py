@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, Index, event
 from sqlalchemy.orm import relationship
 from .db import Base
+from . import search, summaries
 
 class User(Base):
     __tablename__ = "users"
@@ -15,6 +16,8 @@ class User(Base):
     password_hash = Column(String, nullable=True)
 
     orders = relationship("Order", back_populates="user", cascade="all, delete-orphan")
+    # written by crud with the orders themselves, never through the ORM
+    order_summary = relationship("UserOrderStats", uselist=False, viewonly=True)
 
 class Order(Base):
     __tablename__ = "orders"
@@ -24,3 +27,22 @@ class Order(Base):
     amount = Column(Numeric(10, 2), nullable=False)
 
     user = relationship("User", back_populates="orders")
+
+    # covering index for per-user aggregates (GROUP BY user_id with amount filters)
+    __table_args__ = (Index("ix_orders_user_id_amount", "user_id", "amount"),)
+
+class UserOrderStats(Base):
+    # maintained by crud alongside every order write; see app/summaries.py
+    __tablename__ = summaries.TABLE
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    # sum of amounts in cents (exact, unlike summing REAL amounts)
+    total_cents = Column(Integer, nullable=False, default=0)
+    last_order_id = Column(Integer, nullable=True)
+
+
+# Keep the users.name full-text index (and its sync triggers) alongside the tables
+event.listen(Base.metadata, "after_create", search.install)
+# Backfill the order summary when it is added to an existing database
+event.listen(Base.metadata, "after_create", summaries.install)
@@ -0,0 +1,157 @@
+"""On-demand profiling of a running worker, for admins only.
+
+- `sample()` is a statistical sampler: every `interval` seconds it reads the
+  stack of every thread (`sys._current_frames`) and counts identical stacks.
+  The result is collapsed-stack text ("thread;outer;...;inner count" per line)
+  that flamegraph.pl, speedscope or inferno render directly. The sampled
+  threads are never paused beyond the GIL hand-off, so it is safe to run on a
+  loaded worker. Served by GET /debug/profile.
+- `ProfileMiddleware` runs a single request under cProfile when it carries
+  `?profile=1` and returns the pstats summary instead of the response.
+  `run_db` calls run inline on the event loop thread for that request so the
+  crud work is in the profile; other requests served concurrently by the same
+  worker show up as well.
+
+Both require a bearer token whose `role` claim is `admin` (see
+`auth.create_access_token`). PROFILER=0 removes them.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import parse_qs
+
+from . import auth, db
+
+ENABLED = os.getenv("PROFILER", "1") in ("1", "true", "True")
+# Upper bound for one sampling run, in seconds
+MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+# Rows of the cProfile summary returned by ?profile=1
+SUMMARY_LINES = 40
+SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls")
+
+# one sampling run per process at a time
+sampling = threading.Lock()
+# one ?profile=1 request per process at a time: cProfile profiles the event
+# loop thread, which concurrent profiled requests would share
+profiling = threading.Lock()
+
+
+def is_admin(authorization: str | None) -> bool:
+    """True for `Authorization: Bearer <token>` with a valid admin token."""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return False
+    try:
+        claims = auth.decode_access_token_cached(authorization.split(None, 1)[1])
+    except Exception:
+        return False
+    return claims.get("role") == "admin"
+
+
+# installed packages and the stdlib are labelled by their import path
+_LIBRARY_PREFIX = re.compile(r"^.*/(?:site-packages|dist-packages|lib/python\d+\.\d+)/")
+
+
+def _frame_label(code) -> str:
+    path, n = _LIBRARY_PREFIX.subn("", code.co_filename)
+    if not n and os.path.isabs(path):
+        path = os.path.relpath(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def sample(seconds: float, interval: float = 0.005) -> str:
+    """Sample every other thread's stack for `seconds`; collapsed-stack text."""
+    own = threading.get_ident()
+    stacks: Counter = Counter()
+    labels: dict = {}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            stacks[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def summary(profile: cProfile.Profile, sort: str = "cumulative", lines: int = SUMMARY_LINES) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profile, stream=out)
+    stats.sort_stats(sort if sort in SORT_KEYS else "cumulative").print_stats(lines)
+    return out.getvalue()
+
+
+class ProfileMiddleware:
+    """`?profile=1` (plus `profile_sort=tottime|calls`) from an admin: answer
+    with the cProfile summary of handling the request, or 409 while another
+    profiled request is running."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or b"profile=1" not in scope.get("query_string", b""):
+            return await self.app(scope, receive, send)
+        params = parse_qs(scope["query_string"].decode("latin-1"))
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+        if params.get("profile") != ["1"] or not is_admin(authorization):
+            return await self.app(scope, receive, send)
+
+        if not profiling.acquire(blocking=False):
+            body = b"a profiled request is already running"
+            await send({
+                "type": "http.response.start",
+                "status": 409,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        profile = cProfile.Profile()
+        token = None
+        try:
+            token = db.run_inline.set(True)
+            profile.enable()
+            await self.app(scope, receive, discard)
+        finally:
+            profile.disable()
+            if token is not None:
+                db.run_inline.reset(token)
+            profiling.release()
+
+        body = summary(profile, params.get("profile_sort", ["cumulative"])[0]).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profiled-status", str(status).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, PositiveInt, field_validator
 from pydantic.config import ConfigDict
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 
 class UserCreate(BaseModel):
@@ -20,6 +20,11 @@ class UserRead(BaseModel):
 
 class UserDetail(UserRead):
     orders: list["OrderRead"] = []
+    # set when `orders` holds only one page of the user's orders
+    orders_next_cursor: Optional[str] = None
+    # totals over all of the user's orders, read from user_order_stats
+    order_count: int = 0
+    order_total: Decimal = Decimal("0.00")
 
 class OrderCreate(BaseModel):
     user_id: PositiveInt
@@ -40,5 +45,48 @@ class OrderRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserPage(BaseModel):
+    items: List[UserRead]
+    # opaque cursor for the next page; None when this is the last page
+    next_cursor: Optional[str] = None
+
+
+class OrderPage(BaseModel):
+    items: List[OrderRead]
+    next_cursor: Optional[str] = None
+
+
+class BulkOrderResult(BaseModel):
+    # position of the row in the submitted array / NDJSON stream
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkOrderResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkOrderResult]
+
+
+class OrderStats(BaseModel):
+    count: int
+    # exact sums of the stored (already HALF_UP rounded) amounts
+    total: Decimal
+    min: Optional[Decimal] = None
+    max: Optional[Decimal] = None
+    # rounded HALF_UP to 2 decimals, like every stored amount
+    avg: Optional[Decimal] = None
+
+
+class UserOrderStats(OrderStats):
+    user_id: int
+
+
+class UserOrderStatsPage(BaseModel):
+    items: List[UserOrderStats]
+    next_cursor: Optional[str] = None
+
+
 # finalize forward refs
 UserDetail.model_rebuild()
@@ -0,0 +1,77 @@
+"""Full-text index for user name search.
+
+`users_fts` is an external-content SQLite FTS5 table over `users.name` using
+the trigram tokenizer, so `MATCH '"abc"'` has the same case-insensitive
+substring semantics as `name LIKE '%abc%'` but is answered from the index.
+Triggers keep it in sync with every insert/update/delete on `users`.
+
+Where FTS5 (or the trigram tokenizer, SQLite >= 3.34) is unavailable the
+index is simply not created and `crud.search_users` falls back to LIKE.
+"""
+import weakref
+
+from sqlalchemy import column, table, text
+from sqlalchemy.exc import DBAPIError
+
+FTS_TABLE = "users_fts"
+# trigrams need at least three characters; shorter queries use LIKE
+MIN_QUERY_LENGTH = 3
+
+users_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "name, content='users', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name); END",
+    f"CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name); END",
+    f"CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF name ON users BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name); END",
+]
+
+# engine -> whether users_fts exists there
+_available = weakref.WeakKeyDictionary()
+
+
+def _has_fts_table(connection) -> bool:
+    row = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"), {"name": FTS_TABLE}
+    ).first()
+    return row is not None
+
+
+def install(target, connection, **kw) -> bool:
+    """Create the index and triggers (MetaData `after_create` hook).
+
+    Backfills from `users` when the index is created on an existing table.
+    Returns whether the index is usable.
+    """
+    if connection.dialect.name != "sqlite":
+        _available[connection.engine] = False
+        return False
+    existed = _has_fts_table(connection)
+    try:
+        for stmt in DDL:
+            connection.execute(text(stmt))
+        if not existed:
+            connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    except DBAPIError:
+        # compiled without FTS5 / trigram tokenizer
+        _available[connection.engine] = False
+        return False
+    _available[connection.engine] = True
+    return True
+
+
+def is_available(connection) -> bool:
+    engine = connection.engine
+    if engine not in _available:
+        _available[engine] = connection.dialect.name == "sqlite" and _has_fts_table(connection)
+    return _available[engine]
+
+
+def match_expression(q: str) -> str:
+    # quote as a single FTS5 phrase so operators in user input stay literal
+    return '"' + q.replace('"', '""') + '"'
@@ -0,0 +1,51 @@
+"""Materialized per-user order summary (`user_order_stats`).
+
+One row per user holding the order count, the sum of amounts in integer cents
+and the highest order id, so totals are read with a primary-key lookup instead
+of a scan over `orders`. crud updates the row in the same transaction as every
+order insert/update/delete; `rebuild` recomputes it from scratch and `drift`
+lists the users whose row disagrees with `orders`.
+
+The SQL is plain SQLite so migration/rebuild_order_stats.py can run it over a
+bare sqlite3 connection as well.
+"""
+from sqlalchemy import text
+
+TABLE = "user_order_stats"
+
+# orders.amount is stored rounded to 2 decimals; cents keep sums exact
+_GROUPED = (
+    "SELECT user_id, COUNT(*) AS order_count, SUM(CAST(ROUND(amount * 100) AS INTEGER)) AS total_cents, "
+    "MAX(id) AS last_order_id FROM orders GROUP BY user_id"
+)
+
+REBUILD_SQL = [
+    f"DELETE FROM {TABLE}",
+    f"INSERT INTO {TABLE} (user_id, order_count, total_cents, last_order_id) {_GROUPED}",
+]
+
+# rows in either side that the other lacks; users left with no orders keep a
+# zeroed row, which is equivalent to having none
+DRIFT_SQL = (
+    f"SELECT user_id FROM ({_GROUPED} EXCEPT "
+    f"SELECT user_id, order_count, total_cents, last_order_id FROM {TABLE} WHERE order_count > 0) "
+    f"UNION SELECT user_id FROM (SELECT user_id, order_count, total_cents, last_order_id FROM {TABLE} "
+    f"WHERE order_count > 0 EXCEPT {_GROUPED}) ORDER BY user_id"
+)
+
+
+def rebuild(connection) -> None:
+    for stmt in REBUILD_SQL:
+        connection.execute(text(stmt))
+
+
+def drift(connection) -> list[int]:
+    """User ids whose summary row does not match their orders."""
+    return [row[0] for row in connection.execute(text(DRIFT_SQL))]
+
+
+def install(target, connection, tables=(), **kw) -> None:
+    """Backfill the summary when `create_all` adds it to an existing database
+    (MetaData `after_create` hook)."""
+    if any(t.name == TABLE for t in tables):
+        rebuild(connection)
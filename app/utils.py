@@ -1,21 +1,90 @@
+import base64
+import binascii
+import functools
 import re
+import threading
 from typing import Optional
-import bleach
+
+
+class Sanitizer:
+    """Callable that sanitizes user input the way `sanitize_input` documents.
+
+    The bleach `Cleaner` (one per thread: its parser is stateful) and the
+    regexes are built once instead of per call. Input with nothing bleach
+    would change -- no `<`, `>`, `&`, CR or C0 control characters -- skips
+    HTML parsing entirely, and recent results are memoized in a bounded LRU.
+    """
+
+    # characters html5lib parsing/serializing can alter; without any of them
+    # bleach.clean(value, strip=True) returns value unchanged
+    _NEEDS_HTML = re.compile(r"[<>&\r\x01-\x08\x0b\x0c\x0e-\x1f]")
+    _SQL_META = re.compile(r"(--|;)")
+    # longer inputs are sanitized without being cached
+    MAX_CACHED_LENGTH = 1024
+
+    def __init__(self, cache_size: int = 1024):
+        self._local = threading.local()
+        self._cached = functools.lru_cache(maxsize=cache_size)(self._sanitize)
+
+    def __call__(self, value: Optional[str]) -> str:
+        if value is None:
+            return ""
+        if len(value) > self.MAX_CACHED_LENGTH:
+            return self._sanitize(value)
+        return self._cached(value)
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+    def _cleaner(self):
+        cleaner = getattr(self._local, "cleaner", None)
+        if cleaner is None:
+            # bleach is imported on first use; it is slow to import
+            from bleach.sanitizer import Cleaner
+            cleaner = self._local.cleaner = Cleaner(strip=True)
+        return cleaner
+
+    def _sanitize(self, value: str) -> str:
+        # remove NULL bytes
+        val = value.replace("\x00", "")
+        # strip tags
+        if self._NEEDS_HTML.search(val):
+            val = self._cleaner().clean(val)
+        # remove common SQL comment and statement separators
+        val = self._SQL_META.sub("", val)
+        return val.strip()
+
+
+_sanitizer = Sanitizer()
 
 
 def sanitize_input(value: Optional[str]) -> str:
     """Sanitize a user-supplied string for safe display and search.
 
-    - Strips HTML tags using bleach.clean(..., strip=True)
+    - Strips HTML tags using bleach (same result as bleach.clean(..., strip=True))
     - Removes obvious SQL metacharacters like '--' and ';'
     - Trims whitespace
     """
-    if value is None:
-        return ""
-    # remove NULL bytes
-    val = value.replace("\x00", "")
-    # strip tags
-    val = bleach.clean(val, strip=True)
-    # remove common SQL comment and statement separators
-    val = re.sub(r"(--|;)", "", val)
-    return val.strip()
+    return _sanitizer(value)
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode a primary key into an opaque pagination cursor."""
+    raw = f"id:{int(last_id)}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor produced by `encode_cursor` back to the primary key.
+
+    Raises ValueError for anything that was not produced by `encode_cursor`.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError("invalid cursor") from e
+    prefix, _, value = raw.partition(":")
+    if prefix != "id" or not value.isdigit():
+        raise ValueError("invalid cursor")
+    return int(value)
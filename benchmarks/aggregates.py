@@ -0,0 +1,87 @@
+"""
+Benchmark: per-user order totals computed client-side vs crud.order_stats_by_user
+
+The client-side path is what dashboards did before the /stats endpoints: load
+every order and sum amounts per user in Python. The SQL path is one GROUP BY.
+Both run against the same file-backed SQLite database and must agree exactly.
+
+Usage:
+  python -m benchmarks.aggregates --users 200 --orders 50000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+from app.db import Base
+
+
+def make_session(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, future=True)
+
+    @event.listens_for(engine, "connect")
+    def _fk(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True)()
+
+
+def client_side(db):
+    totals = defaultdict(Decimal)
+    counts = defaultdict(int)
+    for order in db.execute(select(models.Order)).scalars():
+        totals[order.user_id] += Decimal(str(order.amount)).quantize(Decimal("0.01"))
+        counts[order.user_id] += 1
+    return {uid: (counts[uid], totals[uid]) for uid in totals}
+
+
+def sql_side(db):
+    return {s.user_id: (s.count, s.total) for s in crud.order_stats_by_user(db)}
+
+
+def timed(label, fn, db):
+    db.expunge_all()
+    start = time.perf_counter()
+    result = fn(db)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>11}: {elapsed * 1000:.1f} ms")
+    return result, elapsed
+
+
+def run(users: int, orders: int):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_session(os.path.join(tmp, "aggregates.db"))
+        ids = [crud.create_user(db, schemas.UserCreate(name=f"bench{i}")).id for i in range(users)]
+        crud.bulk_create_orders(
+            db,
+            [
+                schemas.OrderCreate(user_id=rng.choice(ids), amount=Decimal(rng.randint(1, 99999)) / 100)
+                for _ in range(orders)
+            ],
+        )
+        expected, slow = timed("client-side", client_side, db)
+        actual, fast = timed("sql", sql_side, db)
+        db.close()
+        assert actual == expected, "GROUP BY totals differ from the client-side sums"
+        print(f"    speedup: {slow / fast:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--orders", type=int, default=50000)
+    args = parser.parse_args()
+    run(args.users, args.orders)
+
+
+if __name__ == "__main__":
+    main()
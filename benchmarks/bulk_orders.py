@@ -0,0 +1,62 @@
+"""
+Benchmark: per-row crud.create_order vs crud.bulk_create_orders
+
+Runs both paths against a fresh file-backed SQLite database (so commits pay
+for a real fsync) and prints orders/sec for each.
+
+Usage:
+  python -m benchmarks.bulk_orders --rows 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, schemas
+from app.db import Base
+
+
+def make_session(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, future=True)
+
+    @event.listens_for(engine, "connect")
+    def _fk(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True)()
+
+
+def run(rows: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for label in ("per_row", "bulk"):
+            db = make_session(os.path.join(tmp, f"{label}.db"))
+            user = crud.create_user(db, schemas.UserCreate(name="bench"))
+            orders = [schemas.OrderCreate(user_id=user.id, amount=Decimal(i % 1000) / 7) for i in range(rows)]
+            start = time.perf_counter()
+            if label == "per_row":
+                for o in orders:
+                    crud.create_order(db, o)
+            else:
+                crud.bulk_create_orders(db, orders)
+            elapsed = time.perf_counter() - start
+            db.close()
+            results[label] = rows / elapsed
+            print(f"{label:>8}: {rows} orders in {elapsed:.3f}s ({results[label]:,.0f} orders/s)")
+        print(f" speedup: {results['bulk'] / results['per_row']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000, help="Orders inserted per path")
+    args = parser.parse_args()
+    run(args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: schema-validated vs FAST_JSON encoding of GET /users and GET /orders
+
+The schema path is the default one: ORM rows from crud.list_users/list_orders
+validated into UserRead/OrderRead (`from_attributes=True`) and dumped by the
+route's TypeAdapter. FAST_JSON selects the columns only (crud.*_rows) and
+encodes them with app/fastjson.py, with orjson and with its TypeAdapter(Any)
+fallback. Each variant includes its query. Every body must be byte-identical
+to the schema path, for the unpaginated list and for every keyset page; user
+names include quotes, control characters, non-ASCII and HTML.
+
+Usage:
+  python -m benchmarks.fast_json --rows 100000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, fastjson, models
+from app.db import Base
+from app.main import _ORDERS_ADAPTER, _USERS_ADAPTER, _page
+from app.utils import decode_cursor
+
+NAMES = ['plain', 'quote " and \\ backslash', "ctrl \x01\x1f tab\t nl\n", "Zoë 李小龙 😀", "</script><b>", "   "]
+PAGE = 100
+
+
+def seed(path: str, rows: int):
+    rng = random.Random(0)
+    engine = create_engine(f"sqlite:///{path}", future=True)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"name": f"{rng.choice(NAMES)}{i}", "email": None if i % 3 else f"u{i}@example.com", "role": "user"}
+            for i in range(rows)
+        ])
+        conn.execute(insert(models.Order), [
+            {"user_id": rng.randint(1, rows), "amount": Decimal(rng.randint(0, 10**7)) / 100} for _ in range(rows)
+        ])
+    return sessionmaker(bind=engine, autoflush=False, future=True)
+
+
+def schema_body(adapter, list_fn):
+    def body(db, **kw):
+        data = list_fn(db, **kw) if not kw else _page(list_fn(db, **kw), PAGE)
+        return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return body
+
+
+def fast_body(list_fn):
+    def body(db, **kw):
+        data = list_fn(db, **kw) if not kw else _page(list_fn(db, **kw), PAGE)
+        return fastjson.encode(data)
+    return body
+
+
+def timed(Session, body, repeat: int) -> tuple[float, bytes]:
+    best, out = float("inf"), b""
+    for _ in range(repeat):
+        with Session() as db:
+            start = time.perf_counter()
+            out = body(db)
+            best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def check_pages(Session, expected, actual):
+    after, pages = None, 0
+    while True:
+        with Session() as db:
+            a = expected(db, after_id=after, limit=PAGE + 1)
+            b = actual(db, after_id=after, limit=PAGE + 1)
+        assert a == b, f"page after {after} differs"
+        pages += 1
+        cursor = json.loads(a)["next_cursor"]
+        if cursor is None:
+            return pages
+        after = decode_cursor(cursor)
+
+
+def run(rows: int, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        Session = seed(os.path.join(tmp, "fast_json.db"), rows)
+        encoders = [("orjson", fastjson.orjson), ("TypeAdapter(Any)", None)] if fastjson.orjson else [("TypeAdapter(Any)", None)]
+        for label, adapter, list_fn, rows_fn in (
+            ("GET /users", _USERS_ADAPTER, crud.list_users, crud.list_users_rows),
+            ("GET /orders", _ORDERS_ADAPTER, crud.list_orders, crud.list_orders_rows),
+        ):
+            schema = schema_body(adapter, list_fn)
+            base, expected = timed(Session, schema, repeat)
+            print(f"{label} ?paginate=false, {rows} rows, {len(expected) / 1e6:.1f} MB")
+            print(f"  {'schema validation':<26} {base * 1000:8.1f} ms")
+            saved = fastjson.orjson
+            try:
+                for name, module in encoders:
+                    fastjson.orjson = module
+                    elapsed, body = timed(Session, fast_body(rows_fn), repeat)
+                    assert body == expected, f"{label}: FAST_JSON ({name}) body differs"
+                    pages = check_pages(Session, schema, fast_body(rows_fn)) if rows <= 20_000 else None
+                    checked = f", {pages} pages identical" if pages else ""
+                    print(f"  {'FAST_JSON, ' + name:<26} {elapsed * 1000:8.1f} ms ({base / elapsed:.1f}x){checked}")
+            finally:
+                fastjson.orjson = saved
+        print("bodies byte-identical")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000, help="Users and orders each")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs")
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
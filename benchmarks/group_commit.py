@@ -0,0 +1,86 @@
+"""
+Benchmark: concurrent order creation, one transaction each vs group commit
+
+Simulates `--concurrency` clients that each create orders back to back, as
+POST /orders does: through `run_db` on the threadpool, one commit per order,
+or through the group-commit writer (app/group_commit.py). Uses a fresh
+file-backed SQLite database so commits pay for a real fsync, and prints
+orders/sec plus per-order latency for both.
+
+Usage:
+  python -m benchmarks.group_commit --rows 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, group_commit, schemas
+from app.db import run_db
+from benchmarks.bulk_orders import make_session
+
+
+async def _clients(db, orders, concurrency: int, window_ms: float):
+    latencies = []
+    writer = None
+    if window_ms is not None:
+        bind = db.get_bind()
+        writer = group_commit.OrderWriter(lambda: sessionmaker(bind=bind, autoflush=False)(), window_ms=window_ms)
+    Session = sessionmaker(bind=db.get_bind(), autoflush=False)
+
+    async def client(share):
+        session = Session()
+        try:
+            for order in share:
+                start = time.perf_counter()
+                if writer is None:
+                    await run_db(session, crud.create_order, order)
+                else:
+                    await writer.submit(order)
+                latencies.append(time.perf_counter() - start)
+        finally:
+            session.close()
+
+    await asyncio.gather(*(client(orders[i::concurrency]) for i in range(concurrency)))
+    if writer is not None:
+        await writer.close()
+    return latencies, writer.batches if writer else len(orders)
+
+
+def run(rows: int, concurrency: int, window_ms: float):
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for label, window in (("per_order", None), ("grouped", window_ms)):
+            db = make_session(os.path.join(tmp, f"{label}.db"))
+            user = crud.create_user(db, schemas.UserCreate(name="bench"))
+            orders = [schemas.OrderCreate(user_id=user.id, amount=Decimal(i % 1000) / 7) for i in range(rows)]
+            start = time.perf_counter()
+            latencies, commits = asyncio.run(_clients(db, orders, concurrency, window))
+            elapsed = time.perf_counter() - start
+            db.close()
+            latencies.sort()
+            results[label] = rows / elapsed
+            print(
+                f"{label:>9}: {rows} orders in {elapsed:.3f}s ({results[label]:,.0f} orders/s), "
+                f"{commits} commits, p50 {statistics.median(latencies) * 1000:.2f}ms, "
+                f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f}ms"
+            )
+        print(f"  speedup: {results['grouped'] / results['per_order']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000, help="Orders created per mode")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--window-ms", type=float, default=group_commit.WINDOW_MS, help="Group commit window")
+    args = parser.parse_args()
+    run(args.rows, args.concurrency, args.window_ms)
+
+
+if __name__ == "__main__":
+    main()
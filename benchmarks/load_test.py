@@ -0,0 +1,166 @@
+"""
+Run the Locust suite headless and record or compare a latency baseline
+
+Runs locustfile.py against --host (or, with --serve, against a uvicorn it
+starts on the given database), then reduces Locust's CSV stats to a JSON
+document with p50/p95/p99 (ms), RPS and failures per endpoint.
+
+  --save PATH      write the run as a baseline
+  --compare PATH   exit 1 if any endpoint regressed beyond --threshold
+                   (p95/p99 slower, RPS lower, or more failures)
+
+Usage:
+  python -m benchmarks.seed_load_db --db loadtest.db --users 10000
+  python -m benchmarks.load_test --serve loadtest.db -u 50 -t 60s --save baseline.json
+  python -m benchmarks.load_test --serve loadtest.db -u 50 -t 60s --compare baseline.json --threshold 0.2
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from contextlib import contextmanager
+
+from benchmarks.seed_load_db import manifest_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PERCENTILES = {"p50": "50%", "p95": "95%", "p99": "99%"}
+
+
+def read_stats(csv_path: str) -> dict:
+    """Locust's *_stats.csv -> {"METHOD name": {p50, p95, p99, rps, requests, failures}}."""
+    endpoints = {}
+    with open(csv_path, newline="") as fh:
+        for row in csv.DictReader(fh):
+            key = f"{row['Type']} {row['Name']}".strip()
+            if not row["Type"]:
+                key = "Aggregated"
+            stats = {name: float(row[col] or 0) for name, col in PERCENTILES.items()}
+            stats["rps"] = float(row["Requests/s"] or 0)
+            stats["requests"] = int(row["Request Count"])
+            stats["failures"] = int(row["Failure Count"])
+            endpoints[key] = stats
+    return endpoints
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_ms: float = 5.0) -> list[str]:
+    """Human-readable regressions of `current` against `baseline`.
+
+    Latency must grow by more than `threshold` (relative) *and* `min_ms`
+    (absolute) to count, so millisecond-level noise on fast endpoints does
+    not fail a run. Endpoints missing from either side are ignored.
+    """
+    problems = []
+    for name, base in baseline["endpoints"].items():
+        cur = current["endpoints"].get(name)
+        if cur is None:
+            continue
+        for p in ("p95", "p99"):
+            if cur[p] > base[p] * (1 + threshold) and cur[p] - base[p] > min_ms:
+                problems.append(f"{name}: {p} {base[p]:.0f} -> {cur[p]:.0f} ms")
+        if base["rps"] and cur["rps"] < base["rps"] * (1 - threshold):
+            problems.append(f"{name}: rps {base['rps']:.1f} -> {cur['rps']:.1f}")
+        base_rate = base["failures"] / base["requests"] if base["requests"] else 0
+        cur_rate = cur["failures"] / cur["requests"] if cur["requests"] else 0
+        if cur_rate > base_rate + 0.01:
+            problems.append(f"{name}: failure rate {base_rate:.1%} -> {cur_rate:.1%}")
+    return problems
+
+
+@contextmanager
+def serve(db_path: str, port: int):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{os.path.abspath(db_path)}", "RESPONSE_CACHE_TTL": os.getenv("RESPONSE_CACHE_TTL", "5")}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(url + "/health", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("server did not start")
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def run_locust(host: str, users: int, spawn_rate: float, run_time: str, seed_file: str | None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = os.path.join(tmp, "run")
+        env = dict(os.environ)
+        if seed_file:
+            env["LOCUST_SEED"] = seed_file
+        subprocess.run(
+            [
+                sys.executable, "-m", "locust", "-f", os.path.join(ROOT, "locustfile.py"), "--headless",
+                "--host", host, "-u", str(users), "-r", str(spawn_rate), "-t", run_time,
+                "--csv", prefix, "--only-summary", "--exit-code-on-error", "0",
+            ],
+            cwd=ROOT, env=env, check=True,
+        )
+        endpoints = read_stats(prefix + "_stats.csv")
+    return {
+        "meta": {"host": host, "users": users, "spawn_rate": spawn_rate, "run_time": run_time,
+                 "seed": seed_file, "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "endpoints": endpoints,
+    }
+
+
+def print_table(result: dict):
+    print(f"{'endpoint':<40} {'reqs':>7} {'fail':>5} {'rps':>8} {'p50':>6} {'p95':>6} {'p99':>6}")
+    for name, s in sorted(result["endpoints"].items()):
+        print(f"{name:<40} {s['requests']:>7} {s['failures']:>5} {s['rps']:>8.1f} "
+              f"{s['p50']:>6.0f} {s['p95']:>6.0f} {s['p99']:>6.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--host", help="Base URL of a running server")
+    target.add_argument("--serve", metavar="DB", help="Start uvicorn on this seeded SQLite file")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --serve")
+    parser.add_argument("--seed-file", help="Seed manifest (default: next to --serve DB)")
+    parser.add_argument("-u", "--users", type=int, default=50)
+    parser.add_argument("-r", "--spawn-rate", type=float, default=10)
+    parser.add_argument("-t", "--run-time", default="60s")
+    parser.add_argument("--save", help="Write this run as a JSON baseline")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="Ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    seed_file = args.seed_file or (manifest_path(args.serve) if args.serve else None)
+    if args.serve:
+        with serve(args.serve, args.port) as host:
+            result = run_locust(host, args.users, args.spawn_rate, args.run_time, seed_file)
+    else:
+        result = run_locust(args.host, args.users, args.spawn_rate, args.run_time, seed_file)
+    print_table(result)
+
+    if args.save:
+        with open(args.save, "w") as fh:
+            json.dump(result, fh, indent=2, sort_keys=True)
+        print(f"baseline written to {args.save}")
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        problems = compare(baseline, result, args.threshold, args.min_ms)
+        for p in problems:
+            print(f"REGRESSION {p}")
+        if problems:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
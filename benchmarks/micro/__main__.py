@@ -0,0 +1,52 @@
+"""
+Run the micro-benchmarks and keep or compare baselines
+
+Wraps pytest-benchmark with a fixed storage directory
+(benchmarks/micro/.baselines, one subdirectory per machine):
+
+  run        print timings only
+  save       store this run as a baseline named --name
+  compare    compare with the latest stored baseline (or --against) and exit 1
+             if any benchmark's median is more than --threshold percent slower
+
+--sizes picks the data sizes (orders; users are a tenth), e.g. 1k,100k,1M.
+Unknown arguments go to pytest, e.g. `-k list_orders`.
+
+Usage:
+  python -m benchmarks.micro save --sizes 1k,100k,1M
+  python -m benchmarks.micro compare --sizes 1k,100k,1M --threshold 15
+"""
+import argparse
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STORAGE = os.path.join(HERE, ".baselines")
+
+
+def pytest_args(args) -> list[str]:
+    out = [HERE, "-c", os.path.join(HERE, "pytest.ini"), "-q", f"--benchmark-storage=file://{STORAGE}"]
+    if args.command == "save":
+        out.append(f"--benchmark-save={args.name}")
+    elif args.command == "compare":
+        out.append(f"--benchmark-compare={args.against}" if args.against else "--benchmark-compare")
+        out.append(f"--benchmark-compare-fail=median:{args.threshold:g}%")
+    return out + [a for a in args.pytest_args if a != "--"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["run", "save", "compare"])
+    parser.add_argument("--sizes", default=os.getenv("BENCH_SIZES", "1k,100k"), help="Comma separated, e.g. 1k,100k,1M")
+    parser.add_argument("--name", default="baseline", help="Name for `save`")
+    parser.add_argument("--against", help="Stored run for `compare` (number or name prefix; default latest)")
+    parser.add_argument("--threshold", type=float, default=20, help="Allowed median slowdown in percent")
+    args, args.pytest_args = parser.parse_known_args()
+    os.environ["BENCH_SIZES"] = args.sizes
+    sys.exit(pytest.main(pytest_args(args)))
+
+
+if __name__ == "__main__":
+    main()
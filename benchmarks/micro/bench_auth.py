@@ -0,0 +1,25 @@
+"""JWT issue and verification, with and without the claims cache."""
+import pytest
+
+from app import auth
+
+
+@pytest.mark.benchmark(group="jwt")
+def test_create_access_token(benchmark):
+    benchmark(auth.create_access_token, 42, "user")
+
+
+@pytest.mark.benchmark(group="jwt")
+def test_decode_access_token(benchmark):
+    token = auth.create_access_token(42, "user")
+    assert benchmark(auth.decode_access_token, token)["sub"] == "42"
+
+
+@pytest.mark.benchmark(group="jwt")
+def test_decode_access_token_cached(benchmark):
+    token = auth.create_access_token(42, "user")
+    auth.clear_auth_caches()
+    try:
+        assert benchmark(auth.decode_access_token_cached, token)["sub"] == "42"
+    finally:
+        auth.clear_auth_caches()
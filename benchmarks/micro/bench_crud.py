@@ -0,0 +1,57 @@
+"""crud hot paths: amount rounding, single-order insert and order pages."""
+import random
+from decimal import Decimal
+
+import pytest
+
+from app import crud, schemas
+
+
+def test_round_amount(benchmark):
+    benchmark(crud.round_amount, Decimal("12.345"))
+
+
+@pytest.mark.benchmark(group="create_order")
+def test_create_order(benchmark, dataset):
+    Session, info = dataset
+    rng = random.Random(0)
+    db = Session()
+    try:
+        # one committed insert per call, like POST /orders
+        benchmark(lambda: crud.create_order(
+            db, schemas.OrderCreate(user_id=rng.randint(*info["users"]), amount=Decimal("19.99"))
+        ))
+    finally:
+        db.close()
+
+
+def _page(Session, list_fn=crud.list_orders, **kwargs):
+    # a fresh session per call, as each request gets one
+    with Session() as db:
+        return list_fn(db, limit=50, **kwargs)
+
+
+@pytest.mark.benchmark(group="list_orders")
+def test_list_orders_first_page(benchmark, dataset):
+    Session, _ = dataset
+    assert len(benchmark(_page, Session)) == 50
+
+
+@pytest.mark.benchmark(group="list_orders")
+def test_list_orders_rows_first_page(benchmark, dataset):
+    # column projection, as the API handlers use
+    Session, _ = dataset
+    assert len(benchmark(_page, Session, crud.list_orders_rows)) == 50
+
+
+@pytest.mark.benchmark(group="list_orders")
+def test_list_orders_deep_page(benchmark, dataset):
+    Session, info = dataset
+    after = info["orders"] // 2
+    assert len(benchmark(_page, Session, after_id=after)) == 50
+
+
+@pytest.mark.benchmark(group="list_orders")
+def test_list_orders_by_user(benchmark, dataset):
+    Session, info = dataset
+    benchmark(_page, Session, user_id=info["users"][0])
@@ -0,0 +1,32 @@
+"""Request validation: OrderCreate parsing and input sanitizing."""
+import pytest
+
+from app import schemas
+from app.utils import Sanitizer, sanitize_input
+
+PLAIN = "Zoë o'brien"
+HTML = "<script>alert(1)</script>Bob; DROP TABLE users; --"
+
+
+@pytest.mark.benchmark(group="OrderCreate")
+def test_order_create_valid(benchmark):
+    order = benchmark(schemas.OrderCreate.model_validate, {"user_id": 1, "amount": "19.99"})
+    assert order.user_id == 1
+
+
+@pytest.mark.benchmark(group="OrderCreate")
+def test_order_create_json(benchmark):
+    benchmark(schemas.OrderCreate.model_validate_json, '{"user_id": 1, "amount": "19.99"}')
+
+
+@pytest.mark.benchmark(group="sanitize_input")
+@pytest.mark.parametrize("value", [PLAIN, HTML], ids=["plain", "html"])
+def test_sanitize_input(benchmark, value):
+    # repeated input: served from the memo cache
+    benchmark(sanitize_input, value)
+
+
+@pytest.mark.benchmark(group="sanitize_input")
+@pytest.mark.parametrize("value", [PLAIN, HTML], ids=["plain", "html"])
+def test_sanitize_input_uncached(benchmark, value):
+    benchmark(Sanitizer(cache_size=0), value)
@@ -0,0 +1,106 @@
+"""Seeded SQLite databases for the micro-benchmarks.
+
+Each data size (BENCH_SIZES, orders; users are a tenth of that) is seeded once
+per run into a file through the app's migrations, then served two ways:
+`file` (the file itself, with the app's SQLITE_PROFILE pragmas) and `memory`
+(an in-memory copy made with SQLite's backup API).
+"""
+import os
+import random
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from sqlalchemy import create_engine, event, insert, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app import models, migrations, summaries  # noqa: E402
+from app.db import apply_sqlite_pragmas, sqlite_pragmas  # noqa: E402
+
+BACKENDS = ("memory", "file")
+SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    if value[-1:] in SUFFIXES:
+        return int(value[:-1]) * SUFFIXES[value[-1]]
+    return int(value)
+
+
+def size_label(size: int) -> str:
+    for suffix, factor in (("M", 1_000_000), ("k", 1_000)):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{suffix}"
+    return str(size)
+
+
+SIZES = [parse_size(s) for s in os.getenv("BENCH_SIZES", "1k,100k").split(",") if s.strip()]
+
+
+def seed(path: str, orders: int, seed: int = 0) -> dict:
+    """Migrated database with orders // 10 users and `orders` orders."""
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite:///{path}", future=True)
+    migrations.upgrade(engine)
+    users = max(orders // 10, 1)
+    with engine.begin() as conn:
+        first = (conn.execute(select(models.User.id).order_by(models.User.id.desc())).scalar() or 0) + 1
+        for start in range(0, users, 50_000):
+            conn.execute(insert(models.User), [
+                {"name": f"bench_{i}", "email": f"bench{i}@example.com", "role": "user"}
+                for i in range(start, min(start + 50_000, users))
+            ])
+        for start in range(0, orders, 50_000):
+            conn.execute(insert(models.Order), [
+                {"user_id": rng.randint(first, first + users - 1), "amount": rng.randint(0, 50_000) / 100}
+                for _ in range(start, min(start + 50_000, orders))
+            ])
+        summaries.rebuild(conn)
+    engine.dispose()
+    return {"users": (first, first + users - 1), "orders": orders}
+
+
+def _file_engine(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, future=True)
+    pragmas = sqlite_pragmas()
+    event.listen(engine, "connect", lambda conn, rec: apply_sqlite_pragmas(conn, pragmas))
+    return engine
+
+
+def _memory_engine(path: str):
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    with sqlite3.connect(path) as src:
+        src.backup(conn)
+    apply_sqlite_pragmas(conn, {"foreign_keys": "ON"})
+    return create_engine("sqlite://", creator=lambda: conn, poolclass=StaticPool, future=True)
+
+
+@pytest.fixture(scope="session")
+def _seeded_files(tmp_path_factory):
+    files = {}
+
+    def get(size: int):
+        if size not in files:
+            path = str(tmp_path_factory.mktemp("bench") / f"orders_{size_label(size)}.db")
+            files[size] = (path, seed(path, size))
+        return files[size]
+
+    return get
+
+
+@pytest.fixture(
+    scope="session",
+    params=[(backend, size) for size in SIZES for backend in BACKENDS],
+    ids=lambda p: f"{p[0]}-{size_label(p[1])}",
+)
+def dataset(request, _seeded_files):
+    """(sessionmaker, info) for one backend/size; info has the user id range and order count."""
+    backend, size = request.param
+    path, info = _seeded_files(size)
+    engine = _memory_engine(path) if backend == "memory" else _file_engine(path)
+    yield sessionmaker(bind=engine, autoflush=False, future=True), info
+    engine.dispose()
@@ -0,0 +1,77 @@
+"""
+Benchmark: single-statement vs batched V1 -> V2 email backfill
+
+Generates a V1 database (users without `email`), then migrates a copy with
+each mode while a background "app" thread keeps inserting orders. Prints the
+total migration time and the worst write latency the app saw, which is
+roughly how long the database was locked in one go.
+
+Usage:
+  python -m benchmarks.migration_v1_to_v2 --rows 1000000 --batch-size 10000 --sleep 0.01
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from migration.migration_v1_to_v2 import migrate
+
+
+def make_v1_db(path: str, rows: int):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, amount NUMERIC NOT NULL)")
+    conn.executemany("INSERT INTO users (name) VALUES (?)", ((f"user{i}",) for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def app_writer(path: str, stop: threading.Event, latencies: list):
+    conn = sqlite3.connect(path, timeout=600)
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.execute("INSERT INTO orders (user_id, amount) VALUES (1, 1.00)")
+        conn.commit()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.005)
+    conn.close()
+
+
+def run(rows: int, batch_size: int, sleep: float):
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "v1.db")
+        start = time.perf_counter()
+        make_v1_db(template, rows)
+        print(f"generated {rows} users in {time.perf_counter() - start:.1f}s")
+
+        for label, kwargs in (("single", {}), ("batched", {"batch_size": batch_size, "sleep": sleep})):
+            path = os.path.join(tmp, f"{label}.db")
+            shutil.copy(template, path)
+            stop, latencies = threading.Event(), []
+            writer = threading.Thread(target=app_writer, args=(path, stop, latencies))
+            writer.start()
+            time.sleep(0.1)
+            start = time.perf_counter()
+            migrate(path, **kwargs)
+            elapsed = time.perf_counter() - start
+            stop.set()
+            writer.join()
+            print(f"{label:>8}: {elapsed:.2f}s total, app writes {len(latencies)}, "
+                  f"worst write latency {max(latencies) * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--sleep", type=float, default=0.01, help="Pause between batches")
+    args = parser.parse_args()
+    run(args.rows, args.batch_size, args.sleep)
+
+
+if __name__ == "__main__":
+    main()
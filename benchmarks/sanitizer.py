@@ -0,0 +1,91 @@
+"""
+Benchmark: per-call bleach.clean vs the precompiled, memoized Sanitizer
+
+`reference` is the original sanitize_input. Both run over a corpus of
+realistic search/name inputs and adversarial HTML; outputs must be identical.
+The memoized sanitizer is timed cold (fresh cache: fast path and Cleaner
+reuse only) and warm (repeats served from the LRU).
+
+Usage:
+  python -m benchmarks.sanitizer --rounds 20
+"""
+import argparse
+import random
+import re
+import time
+
+import bleach
+
+from app.utils import Sanitizer
+
+
+def reference(value):
+    if value is None:
+        return ""
+    val = value.replace("\x00", "")
+    val = bleach.clean(val, strip=True)
+    val = re.sub(r"(--|;)", "", val)
+    return val.strip()
+
+
+REALISTIC = [
+    "alice", "Bob Smith", "o'brien", "Zoë Saldaña", "李小龙", "anne-marie", "  padded  ", "user42",
+    "jane.doe@example.com", "smith; jones", "100% match", "a \"quoted\" name", "x" * 200, "",
+]
+ADVERSARIAL = [
+    "<script>alert(1)</script>Bob", "<img src=x onerror=alert(1)>", "<scr<script>ipt>alert(1)</script>",
+    "Tom &amp; Jerry", "Tom & Jerry", "a < b > c", "<!-- hidden -->visible", "<b>bold</b> & <i>it</i>",
+    "&lt;script&gt;", "&#60;script&#62;", "line\r\nbreak", "ctrl\x01\x02\x1fchars", "nul\x00byte",
+    "Alice; DROP TABLE users; --", "<a href='javascript:alert(1)'>x</a>", "<" * 50, "&" * 50,
+    "<div>" * 100 + "deep" + "</div>" * 100, "<p>" + "word " * 2000 + "</p>", None,
+]
+
+
+def corpus(size=2000, seed=0):
+    """Inputs for equality checks and timing: mostly repeats, like real search traffic."""
+    rng = random.Random(seed)
+    base = REALISTIC + ADVERSARIAL
+    out = list(base)
+    while len(out) < size:
+        a, b = rng.choice(base) or "", rng.choice(base) or ""
+        out.append(rng.choice([a, a + b, a[: rng.randint(0, len(a))]]))
+    return out
+
+
+def timed(fn, inputs, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for value in inputs:
+            fn(value)
+    return (time.perf_counter() - start) / (rounds * len(inputs)) * 1e6
+
+
+def run(rounds: int):
+    inputs = corpus()
+    sanitizer = Sanitizer()
+    mismatches = [v for v in inputs if sanitizer(v) != reference(v)]
+    assert not mismatches, f"outputs differ for {mismatches[:5]!r}"
+
+    ref = timed(reference, inputs, rounds)
+    cold = timed(Sanitizer(cache_size=0), inputs, rounds)
+    warm = timed(sanitizer, inputs, rounds)
+    print(f"identical output over {len(inputs)} inputs")
+    print(f"  bleach.clean per call: {ref:8.1f} us/input")
+    print(f"  sanitizer, no cache:   {cold:8.1f} us/input ({ref / cold:.1f}x)")
+    print(f"  sanitizer, warm LRU:   {warm:8.1f} us/input ({ref / warm:.1f}x)")
+
+    # plain names and queries: the fast path, never parsed as HTML
+    ref = timed(reference, REALISTIC, rounds * 100)
+    cold = timed(Sanitizer(cache_size=0), REALISTIC, rounds * 100)
+    print(f"realistic inputs only: {ref:.1f} -> {cold:.1f} us/input uncached ({ref / cold:.0f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Build a SQLite database of configurable size for load tests
+
+Creates the schema through the app's migrations, then bulk-inserts users and
+orders. `--login-users` of the users get the password `--password` (hashed
+once and shared) so the Locust suite can log in and send authorized writes.
+Writes a JSON manifest next to the database that locustfile.py reads through
+LOCUST_SEED.
+
+Usage:
+  python -m benchmarks.seed_load_db --db loadtest.db --users 10000 --orders-per-user 20
+"""
+import argparse
+import json
+import os
+import random
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, migrations, models, schemas
+from app.auth import hash_password
+
+NAMES = ["alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi", "ivan", "judy", "mallory", "oscar"]
+
+
+def manifest_path(db_path: str) -> str:
+    return os.path.splitext(db_path)[0] + ".seed.json"
+
+
+def seed(db_path: str, users: int, orders_per_user: int, login_users: int, password: str, seed: int = 0) -> dict:
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} exists; seed into a fresh file")
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite:///{db_path}", future=True)
+    migrations.upgrade(engine)
+    db = sessionmaker(bind=engine, autoflush=False, future=True)()
+
+    start = time.perf_counter()
+    shared_hash = hash_password(password)
+    rows = [
+        {
+            "name": f"{rng.choice(NAMES)}_{i}",
+            "email": f"load{i}@example.com",
+            "role": "user",
+            "password_hash": shared_hash if i < login_users else None,
+        }
+        for i in range(users)
+    ]
+    for chunk in range(0, len(rows), 5000):
+        db.execute(insert(models.User), rows[chunk:chunk + 5000])
+    db.commit()
+    ids = list(db.scalars(select(models.User.id).where(models.User.email.like("load%@example.com")).order_by(models.User.id)))
+
+    orders = [
+        schemas.OrderCreate(user_id=uid, amount=Decimal(rng.randint(100, 50000)) / 100)
+        for uid in ids
+        for _ in range(orders_per_user)
+    ]
+    crud.bulk_create_orders(db, orders, chunk_size=5000)
+    admin = db.scalars(select(models.User).where(models.User.role == "admin").order_by(models.User.id)).first()
+    db.close()
+    engine.dispose()
+
+    manifest = {
+        "db": os.path.abspath(db_path),
+        "users": len(ids),
+        "orders": len(orders),
+        "user_ids": [ids[0], ids[-1]] if ids else [],
+        "login_user_ids": ids[:login_users],
+        "password": password,
+        "admin_id": admin.id if admin else None,
+        "admin_password": os.getenv("ADMIN_PASSWORD", "admin"),
+        "names": NAMES,
+        "seed": seed,
+    }
+    with open(manifest_path(db_path), "w") as fh:
+        json.dump(manifest, fh, indent=2)
+    print(f"seeded {len(ids)} users and {len(orders)} orders in {time.perf_counter() - start:.1f}s "
+          f"-> {manifest_path(db_path)}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", required=True, help="Path of the SQLite file to create")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--orders-per-user", type=int, default=20)
+    parser.add_argument("--login-users", type=int, default=100, help="Users given --password for JWT logins")
+    parser.add_argument("--password", default="loadtest-pass")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed, for reproducible databases")
+    args = parser.parse_args()
+    seed(args.db, args.users, args.orders_per_user, min(args.login_users, args.users), args.password, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: SQLite read/write concurrency per tuning profile
+
+For each profile in app.db.SQLITE_PROFILES, seeds a file-backed database and
+runs reader threads (keyset pages of orders) next to writer threads (one
+committed order per iteration, like POST /orders) for a fixed duration.
+Reports reads/s, writes/s and how many operations failed with
+"database is locked".
+
+Usage:
+  python -m benchmarks.sqlite_concurrency --seconds 5 --readers 4 --writers 1
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.exc import OperationalError
+
+from app import models
+from app.db import Base, SQLITE_PROFILES, apply_sqlite_pragmas, sqlite_pragmas
+
+
+def make_engine(path: str, profile: str):
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        pool_size=32,
+        future=True,
+    )
+    pragmas = sqlite_pragmas(profile)
+    event.listen(engine, "connect", lambda conn, rec: apply_sqlite_pragmas(conn, pragmas))
+    return engine
+
+
+def seed(engine, users: int, orders: int):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"name": f"user{i}", "role": "user"} for i in range(users)])
+        conn.execute(
+            insert(models.Order),
+            [{"user_id": random.randint(1, users), "amount": random.randint(0, 10_000) / 100} for _ in range(orders)],
+        )
+
+
+def run_profile(profile: str, seconds: float, readers: int, writers: int, rows: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "bench.db"), profile)
+        seed(engine, users=1000, orders=rows)
+        counts = {"reads": 0, "writes": 0, "locked": 0}
+        lock = threading.Lock()
+        stop = time.perf_counter() + seconds
+
+        def reader():
+            n = locked = 0
+            while time.perf_counter() < stop:
+                after = random.randint(0, rows)
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(
+                            select(models.Order.id, models.Order.user_id, models.Order.amount)
+                            .where(models.Order.id > after)
+                            .order_by(models.Order.id)
+                            .limit(100)
+                        ).all()
+                    n += 1
+                except OperationalError:
+                    locked += 1
+            with lock:
+                counts["reads"] += n
+                counts["locked"] += locked
+
+        def writer():
+            n = locked = 0
+            while time.perf_counter() < stop:
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(insert(models.Order).values(user_id=random.randint(1, 1000), amount=1.23))
+                    n += 1
+                except OperationalError:
+                    locked += 1
+            with lock:
+                counts["writes"] += n
+                counts["locked"] += locked
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        engine.dispose()
+    return {k: (v / seconds if k != "locked" else v) for k, v in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=50_000, help="Orders seeded before the run")
+    args = parser.parse_args()
+
+    print(f"{'profile':>12} {'reads/s':>10} {'writes/s':>10} {'locked':>8}")
+    for profile in SQLITE_PROFILES:
+        r = run_profile(profile, args.seconds, args.readers, args.writers, args.rows)
+        print(f"{profile:>12} {r['reads']:>10,.0f} {r['writes']:>10,.0f} {r['locked']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,37 @@
-from locust import HttpUser, task, between
+"""Locust load test covering the API and UI.
+
+Against a seeded database (see benchmarks/seed_load_db.py) point LOCUST_SEED
+at its manifest so readers hit existing rows and writers can log in:
+
+  LOCUST_SEED=loadtest.seed.json locust -f locustfile.py --host http://localhost:8000
+
+Without a manifest every simulated client creates its own user on start and
+only uses data it created. benchmarks/load_test.py runs this headless and
+records/compares baselines.
+"""
+import json
+import os
 import random
 
+from locust import HttpUser, between, task
+
+SEED = None
+if os.getenv("LOCUST_SEED") and os.path.exists(os.environ["LOCUST_SEED"]):
+    with open(os.environ["LOCUST_SEED"]) as fh:
+        SEED = json.load(fh)
+
+SEARCH_TERMS = (SEED or {}).get("names") or ["user", "ali", "bob"]
+
+
+def _random_user_id(fallback):
+    if SEED and SEED["user_ids"]:
+        return random.randint(*SEED["user_ids"])
+    return fallback
+
+
 class ApiUser(HttpUser):
+    """Signs up, then places and lists orders (the original smoke load)."""
+    weight = 3
     wait_time = between(0.1, 0.5)
 
     def on_start(self):
@@ -22,4 +52,126 @@ class ApiUser(HttpUser):
 
     @task(1)
     def list_orders(self):
-        self.client.get("/orders")
+        self.client.get("/orders", params={"limit": 50}, name="/orders")
+
+    @task(1)
+    def bulk_orders(self):
+        if not getattr(self, "user_id", None):
+            return
+        rows = [{"user_id": self.user_id, "amount": str(round(random.random() * 100, 2))} for _ in range(50)]
+        self.client.post("/orders/bulk", json=rows)
+
+
+class ReaderUser(HttpUser):
+    """Read-heavy traffic: lists, search, user detail, stats and UI pages."""
+    weight = 6
+    wait_time = between(0.05, 0.3)
+
+    def on_start(self):
+        self.own_id = None
+        if not SEED:
+            r = self.client.post("/users", json={"name": f"reader_{random.randint(1, 1_000_000)}"})
+            self.own_id = r.json()["id"] if r.status_code == 201 else None
+
+    @task(4)
+    def list_users(self):
+        r = self.client.get("/users", params={"limit": 50}, name="/users")
+        cursor = r.json().get("next_cursor") if r.status_code == 200 else None
+        if cursor:
+            self.client.get("/users", params={"limit": 50, "after": cursor}, name="/users?after")
+
+    @task(4)
+    def search(self):
+        self.client.get("/search", params={"q": random.choice(SEARCH_TERMS)}, name="/search")
+
+    @task(4)
+    def user_detail(self):
+        uid = _random_user_id(self.own_id)
+        if uid:
+            with self.client.get(f"/users/{uid}", name="/users/[id]", catch_response=True) as r:
+                # deleted by a WriterUser meanwhile: expected, not a failure
+                if r.status_code == 404:
+                    r.success()
+
+    @task(2)
+    def order_stats(self):
+        self.client.get("/stats/orders", name="/stats/orders")
+        self.client.get("/stats/orders/by-user", params={"limit": 50}, name="/stats/orders/by-user")
+
+    @task(2)
+    def ui_index(self):
+        r = self.client.get("/ui", name="/ui")
+        if r.status_code == 200 and "/ui/fragments/users?after=" in r.text:
+            after = r.text.split("/ui/fragments/users?after=", 1)[1].split('"', 1)[0]
+            self.client.get("/ui/fragments/users", params={"after": after}, name="/ui/fragments/users")
+
+    @task(1)
+    def ui_user_detail(self):
+        uid = _random_user_id(self.own_id)
+        if uid:
+            with self.client.get(f"/ui/users/{uid}", name="/ui/users/[id]", catch_response=True) as r:
+                if r.status_code == 404:
+                    r.success()
+
+
+class WriterUser(HttpUser):
+    """Authorized writes: JWT login, order updates, deletes, user edits."""
+    weight = 2
+    wait_time = between(0.1, 0.5)
+
+    def on_start(self):
+        self.token = None
+        self.orders = []
+        if SEED and SEED["login_user_ids"]:
+            self.user_id = random.choice(SEED["login_user_ids"])
+            password = SEED["password"]
+        else:
+            password = "locust-pass"
+            r = self.client.post("/users", json={"name": f"writer_{random.randint(1, 1_000_000)}", "password": password})
+            self.user_id = r.json()["id"] if r.status_code == 201 else None
+        if self.user_id:
+            self.login(password)
+
+    def login(self, password):
+        r = self.client.post("/auth/login", json={"user_id": self.user_id, "password": password}, name="/auth/login")
+        if r.status_code == 200:
+            self.token = r.json()["access_token"]
+
+    @property
+    def auth_headers(self):
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    @task(4)
+    def create_and_update_order(self):
+        if not self.user_id:
+            return
+        r = self.client.post("/orders", json={"user_id": self.user_id, "amount": "10.00"})
+        if r.status_code != 201:
+            return
+        order_id = r.json()["id"]
+        self.orders.append(order_id)
+        amount = str(round(random.random() * 100, 2))
+        self.client.put(f"/orders/{order_id}", json={"amount": amount}, headers=self.auth_headers, name="/orders/[id]")
+
+    @task(2)
+    def delete_order(self):
+        if self.orders:
+            self.client.delete(f"/orders/{self.orders.pop()}", name="/orders/[id]")
+
+    @task(1)
+    def update_profile(self):
+        if self.user_id:
+            self.client.put(f"/users/{self.user_id}", json={"email": f"w{random.randint(1, 10**6)}@example.com"},
+                            name="/users/[id]")
+
+    @task(1)
+    def create_and_delete_user(self):
+        r = self.client.post("/users", json={"name": f"temp_{random.randint(1, 1_000_000)}"})
+        if r.status_code == 201:
+            self.client.delete(f"/users/{r.json()['id']}", name="/users/[id]")
+
+    @task(1)
+    def relogin(self):
+        # pbkdf2 verification in the hash pool: the most CPU-heavy endpoint
+        if self.user_id:
+            self.login(SEED["password"] if SEED and SEED["login_user_ids"] else "locust-pass")
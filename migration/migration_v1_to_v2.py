@@ -3,13 +3,26 @@ Migration V1 -> V2
 - Adds 'email' column to users if missing
 - Backfills email as '<name>@example.com' when NULL
 
+By default the backfill is one UPDATE in one transaction. On large files use
+--batch-size: users are backfilled by primary-key range, one short
+transaction per batch, so the live app can write between batches. Progress is
+checkpointed in the `migration_checkpoints` table and a rerun after an
+interruption resumes after the last committed batch.
+
 Usage:
   python -m migration.migration_v1_to_v2 --db path/to/app.db
+  python -m migration.migration_v1_to_v2 --db path/to/app.db --batch-size 10000 --sleep 0.05
+  python -m migration.migration_v1_to_v2 --db path/to/app.db --dry-run
 """
 import argparse
 import os
 import sqlite3
+import time
 from contextlib import closing
+from typing import Callable, Optional
+
+CHECKPOINT = "v1_to_v2_email"
+BACKFILL_SQL = "UPDATE users SET email = name || '@example.com' WHERE email IS NULL"
 
 
 def has_column(conn: sqlite3.Connection, table: str, column: str) -> bool:
@@ -17,36 +30,144 @@ def has_column(conn: sqlite3.Connection, table: str, column: str) -> bool:
     return any(row[1] == column for row in cur.fetchall())
 
 
-def migrate(db_path: str):
+def _connect(db_path: str) -> sqlite3.Connection:
     if db_path == ":memory:":
         raise ValueError("Use a file-backed DB for migration script")
 
     if not os.path.exists(db_path):
         raise FileNotFoundError(db_path)
 
-    with closing(sqlite3.connect(db_path)) as conn:
-        conn.execute("PRAGMA foreign_keys=ON")
-        conn.row_factory = sqlite3.Row
+    # wait (rather than fail) while the live app holds the write lock
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.row_factory = sqlite3.Row
+
+    # Ensure users table exists
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    if "users" not in tables:
+        conn.close()
+        raise RuntimeError("users table missing; cannot migrate")
+    return conn
+
+
+def _checkpoint(conn: sqlite3.Connection) -> int:
+    conn.execute("CREATE TABLE IF NOT EXISTS migration_checkpoints (name TEXT PRIMARY KEY, last_id INTEGER NOT NULL)")
+    row = conn.execute("SELECT last_id FROM migration_checkpoints WHERE name = ?", (CHECKPOINT,)).fetchone()
+    return row[0] if row else 0
+
+
+def _max_id(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0]
+
 
-        # Ensure users table exists
+def plan(db_path: str, batch_size: Optional[int] = None) -> dict:
+    """Dry run: what `migrate` would do, without writing anything."""
+    with closing(_connect(db_path)) as conn:
+        has_email = has_column(conn, "users", "email")
         tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
-        if "users" not in tables:
-            raise RuntimeError("users table missing; cannot migrate")
+        resume_after = 0
+        if "migration_checkpoints" in tables:
+            row = conn.execute("SELECT last_id FROM migration_checkpoints WHERE name = ?", (CHECKPOINT,)).fetchone()
+            resume_after = row[0] if row else 0
+        total = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        remaining = conn.execute("SELECT COUNT(*) FROM users WHERE id > ?", (resume_after,)).fetchone()[0]
+        if has_email:
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM users WHERE id > ? AND email IS NULL", (resume_after,)
+            ).fetchone()[0]
+        else:
+            pending = remaining
+        max_id = _max_id(conn)
+    report = {
+        "total_users": total,
+        "add_email_column": not has_email,
+        "rows_to_backfill": pending,
+        "resume_after_id": resume_after,
+        "max_id": max_id,
+    }
+    if batch_size:
+        report["batches"] = -(-remaining // batch_size)
+    return report
 
-        # Add column if missing
+
+def migrate(
+    db_path: str,
+    batch_size: Optional[int] = None,
+    sleep: float = 0.0,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> int:
+    """Add and backfill users.email. Returns the number of rows backfilled.
+
+    With `batch_size`, backfills `batch_size` users per transaction, records the
+    last finished id after each batch, sleeps `sleep` seconds between batches
+    and calls `progress` with a status dict after each one.
+    """
+    with closing(_connect(db_path)) as conn:
+        # Add column if missing (O(1) in SQLite: no table rewrite)
         if not has_column(conn, "users", "email"):
             conn.execute("ALTER TABLE users ADD COLUMN email TEXT")
 
-        # Backfill where NULL
-        conn.execute("UPDATE users SET email = name || '@example.com' WHERE email IS NULL")
+        if not batch_size:
+            # Backfill where NULL
+            updated = conn.execute(BACKFILL_SQL).rowcount
+            conn.commit()
+            return updated
+
+        last_id = _checkpoint(conn)
         conn.commit()
+        updated = 0
+        started = time.monotonic()
+        # re-read the end each round so rows inserted meanwhile are covered
+        while last_id < (max_id := _max_id(conn)):
+            # batches hold `batch_size` existing ids, however sparse the ids are
+            row = conn.execute(
+                "SELECT id FROM users WHERE id > ? ORDER BY id LIMIT 1 OFFSET ?", (last_id, batch_size - 1)
+            ).fetchone()
+            upper = row[0] if row else max_id
+            updated += conn.execute(BACKFILL_SQL + " AND id > ? AND id <= ?", (last_id, upper)).rowcount
+            conn.execute(
+                "INSERT INTO migration_checkpoints (name, last_id) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET last_id = excluded.last_id",
+                (CHECKPOINT, upper),
+            )
+            conn.commit()
+            last_id = upper
+            if progress:
+                progress({
+                    "last_id": last_id,
+                    "max_id": max_id,
+                    "updated": updated,
+                    "elapsed": time.monotonic() - started,
+                })
+            if sleep:
+                time.sleep(sleep)
+
+        # finished: a later run starts from the beginning again
+        conn.execute("DELETE FROM migration_checkpoints WHERE name = ?", (CHECKPOINT,))
+        conn.commit()
+        return updated
+
+
+def _print_progress(status: dict):
+    pct = 100.0 * status["last_id"] / status["max_id"] if status["max_id"] else 100.0
+    print(f"{pct:5.1f}%  id {status['last_id']}/{status['max_id']}  backfilled {status['updated']}  "
+          f"{status['elapsed']:.1f}s", flush=True)
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--db", required=True, help="Path to SQLite database file")
+    parser.add_argument("--batch-size", type=int, default=None, help="Backfill this many users per transaction (resumable)")
+    parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to pause between batches")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change and exit")
     args = parser.parse_args()
-    migrate(args.db)
+    if args.dry_run:
+        for key, value in plan(args.db, args.batch_size).items():
+            print(f"{key}: {value}")
+        return
+    updated = migrate(args.db, batch_size=args.batch_size, sleep=args.sleep,
+                      progress=_print_progress if args.batch_size else None)
+    print(f"backfilled {updated} users")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,57 @@
+"""
+Rebuild the user_order_stats summary from orders
+- With --check, only reports users whose summary has drifted (exit status 1 if any)
+- Otherwise recomputes every row in one transaction
+
+Usage:
+  python -m migration.rebuild_order_stats --db path/to/app.db [--check]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+from app.summaries import DRIFT_SQL, REBUILD_SQL, TABLE
+
+
+def check(db_path: str) -> list[int]:
+    with closing(_connect(db_path)) as conn:
+        return [row[0] for row in conn.execute(DRIFT_SQL)]
+
+
+def rebuild(db_path: str):
+    with closing(_connect(db_path)) as conn:
+        for stmt in REBUILD_SQL:
+            conn.execute(stmt)
+        conn.commit()
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    if db_path == ":memory:":
+        raise ValueError("Use a file-backed DB for migration script")
+
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+
+    conn = sqlite3.connect(db_path)
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    if TABLE not in tables or "orders" not in tables:
+        conn.close()
+        raise RuntimeError(f"{TABLE} or orders table missing; start the app once to create it")
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", required=True, help="Path to SQLite database file")
+    parser.add_argument("--check", action="store_true", help="Report drift without rewriting anything")
+    args = parser.parse_args()
+    if args.check:
+        drifted = check(args.db)
+        print(f"{len(drifted)} user(s) drifted" + (f": {drifted}" if drifted else ""))
+        sys.exit(1 if drifted else 0)
+    rebuild(args.db)
+
+if __name__ == "__main__":
+    main()
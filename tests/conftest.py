@@ -1,11 +1,15 @@
 import os
+import subprocess
+import sys
 import tempfile
+from contextlib import contextmanager
 from typing import Generator
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from app import auth, cache
 from app.db import Base
 from app.main import app, get_db
 
@@ -36,7 +40,68 @@ def client(db_session):
         finally:
             pass
     app.dependency_overrides[get_db] = override_get_db
+    # cached responses and acting users belong to whichever database served them
+    cache.responses.clear()
+    auth.clear_auth_caches()
     from fastapi.testclient import TestClient
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
+    cache.responses.clear()
+    auth.clear_auth_caches()
+
+
+@pytest.fixture(scope="function")
+def assert_num_queries(db_session):
+    """Assert how many SQL statements a block runs against the test engine.
+
+        with assert_num_queries(2):
+            client.get(f"/users/{uid}")
+
+    Guards eager-loading choices in crud against N+1 regressions.
+    """
+    engine = db_session.get_bind()
+
+    @contextmanager
+    def _assert(expected: int):
+        statements = []
+
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+        assert len(statements) == expected, (
+            f"expected {expected} queries, got {len(statements)}:\n" + "\n".join(statements)
+        )
+
+    return _assert
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    """Pin the response cache to its defaults, whatever RESPONSE_CACHE_* says."""
+    monkeypatch.setattr(cache.responses, "ttl", 5.0)
+    monkeypatch.setattr(cache.responses, "max_entries", 1024)
+    monkeypatch.setattr(cache.responses, "max_bytes", 64 * 1024 * 1024)
+    return cache.responses
+
+
+@pytest.fixture
+def env_default():
+    """`env_default("app.cache", "ETAGS")`: the value a module setting gets in
+    a fresh interpreter with the environment variable of the same name unset."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def _default(module: str, name: str, var: str | None = None) -> str:
+        env = {k: v for k, v in os.environ.items() if k != (var or name)}
+        out = subprocess.run(
+            [sys.executable, "-c", f"import {module} as m; print(m.{name})"],
+            cwd=root, env=env, capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+
+    return _default
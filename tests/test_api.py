@@ -19,7 +19,7 @@ def test_user_and_order_flow(client):
 
     r = client.get("/orders")
     assert r.status_code == 200
-    assert len(r.json()) == 1
+    assert len(r.json()["items"]) == 1
 
 
 def test_fk_violation_returns_400(client):
@@ -0,0 +1,74 @@
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db import Base, run_db
+from app.main import app, get_db
+from app import cache, crud
+
+
+@pytest.fixture
+def async_client(tmp_path):
+    # Tables are created with a throwaway sync engine; requests then go
+    # through an AsyncSession on aiosqlite, as with DB_ASYNC=1.
+    path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{path}", future=True)
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    AsyncTestingSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with AsyncTestingSession() as db:
+            assert isinstance(db, AsyncSession)
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    cache.responses.clear()
+    with TestClient(app) as c:
+        yield c
+        c.portal.call(async_engine.dispose)
+    app.dependency_overrides.clear()
+    cache.responses.clear()
+
+
+def test_async_session_crud_flow(async_client):
+    r = async_client.post("/users", json={"name": "Async", "password": "pw"})
+    assert r.status_code == 201
+    uid = r.json()["id"]
+
+    r = async_client.post("/orders", json={"user_id": uid, "amount": "1.005"})
+    assert r.status_code == 201
+    oid = r.json()["id"]
+
+    assert async_client.get("/orders").json()["items"][0]["amount"] == "1.01"
+    assert async_client.get(f"/users/{uid}").json()["orders"][0]["id"] == oid
+    assert async_client.get(f"/users/{uid}", params={"paginate": "false"}).json()["orders"][0]["id"] == oid
+    assert [u["name"] for u in async_client.get("/search", params={"q": "syn"}).json()] == ["Async"]
+
+    token = async_client.post("/auth/login", json={"user_id": uid, "password": "pw"}).json()["access_token"]
+    r = async_client.put(f"/orders/{oid}", json={"amount": "2.00"}, headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200 and float(r.json()["amount"]) == 2.0
+
+    assert "Async" in async_client.get(f"/ui/users/{uid}").text
+    assert async_client.get("/export/orders").text.count("\n") == 1
+    assert async_client.delete(f"/users/{uid}").status_code == 200
+
+
+def test_run_db_uses_threadpool_for_sync_sessions(db_session):
+    import asyncio
+    import threading
+
+    seen = {}
+
+    def probe(db):
+        seen["thread"] = threading.get_ident()
+        return crud.list_users(db)
+
+    assert asyncio.run(run_db(db_session, probe)) == []
+    assert seen["thread"] != threading.get_ident()
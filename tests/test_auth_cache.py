@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from app import auth, crud, schemas
+
+
+def _seed(db_session):
+    admin = crud.create_user(db_session, schemas.UserCreate(name="Boss", role="admin"))
+    owner = crud.create_user(db_session, schemas.UserCreate(name="Owner"))
+    order = crud.create_order(db_session, schemas.OrderCreate(user_id=owner.id, amount=Decimal("1.00")))
+    return admin.id, owner.id, order.id
+
+
+def _count_calls(monkeypatch, module, name):
+    calls = []
+    original = getattr(module, name)
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(module, name, counted)
+    return calls
+
+
+def test_repeat_writes_skip_token_verification_and_user_lookup(client, db_session, monkeypatch):
+    admin_id, _, order_id = _seed(db_session)
+    headers = {"Authorization": f"Bearer {auth.create_access_token(admin_id, 'admin')}"}
+    decodes = _count_calls(monkeypatch, auth, "decode_access_token")
+    lookups = _count_calls(monkeypatch, crud, "get_user")
+
+    for amount in ("2.00", "3.00", "4.00"):
+        assert client.put(f"/orders/{order_id}", json={"amount": amount}, headers=headers).status_code == 200
+    assert len(decodes) == 1
+    assert len(lookups) == 1
+
+
+def test_expired_claims_are_not_served_from_cache(client, db_session, monkeypatch):
+    admin_id, _, order_id = _seed(db_session)
+    token = auth.create_access_token(admin_id, "admin")
+    auth.decode_access_token_cached(token)
+    auth._claims[token]["exp"] = 0
+    decodes = _count_calls(monkeypatch, auth, "decode_access_token")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.put(f"/orders/{order_id}", json={"amount": "2.00"}, headers=headers).status_code == 200
+    assert len(decodes) == 1
+
+
+def test_invalid_token_is_rejected_every_time(client, db_session):
+    _, _, order_id = _seed(db_session)
+    for _ in range(2):
+        resp = client.put(f"/orders/{order_id}", json={"amount": "2.00"}, headers={"Authorization": "Bearer nope"})
+        assert resp.status_code == 401
+
+
+def test_role_change_takes_effect_immediately(client, db_session):
+    admin_id, owner_id, order_id = _seed(db_session)
+    other = crud.create_user(db_session, schemas.UserCreate(name="Other", role="admin")).id
+    headers = {"X-Acting-User-Id": str(other)}
+    assert client.put(f"/orders/{order_id}", json={"amount": "2.00"}, headers=headers).status_code == 200
+
+    # demoted through the API: the cached admin role must not survive
+    resp = client.put(f"/users/{other}", json={"role": "user"}, headers={"X-Acting-User-Id": str(admin_id)})
+    assert resp.status_code == 200
+    assert client.put(f"/orders/{order_id}", json={"amount": "3.00"}, headers=headers).status_code == 403
+
+
+def test_deleted_user_is_forgotten(client, db_session):
+    admin_id, _, order_id = _seed(db_session)
+    headers = {"X-Acting-User-Id": str(admin_id)}
+    assert client.put(f"/orders/{order_id}", json={"amount": "2.00"}, headers=headers).status_code == 200
+    assert client.delete(f"/users/{admin_id}").status_code == 200
+    resp = client.put(f"/orders/{order_id}", json={"amount": "3.00"}, headers=headers)
+    assert resp.status_code == 403
+    assert resp.json()["detail"] == "acting user not found"
+
+
+def test_unknown_order_is_404_before_credentials_are_checked(client):
+    assert client.put("/orders/999999", json={"amount": "1.00"}).status_code == 404
+    bad = {"Authorization": "Bearer not-a-token"}
+    assert client.put("/orders/999999", json={"amount": "1.00"}, headers=bad).status_code == 404
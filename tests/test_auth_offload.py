@@ -0,0 +1,46 @@
+import asyncio
+import os
+import signal
+import threading
+
+from app import auth
+
+
+def test_async_hash_roundtrip():
+    async def run():
+        hashed = await auth.hash_password_async("s3cret")
+        return hashed, await auth.verify_password_async("s3cret", hashed), await auth.verify_password_async("nope", hashed)
+
+    hashed, ok, bad = asyncio.run(run())
+    assert hashed.startswith("$pbkdf2-sha256$")
+    assert ok is True and bad is False
+
+
+def test_signup_returns_429_when_hash_queue_full(client, monkeypatch):
+    monkeypatch.setattr(auth, "_slots", threading.BoundedSemaphore(1))
+    auth._slots.acquire()  # simulate a job already occupying the only slot
+    r = client.post("/users", json={"name": "Burst", "password": "pw"})
+    assert r.status_code == 429
+    assert r.headers["retry-after"] == "1"
+
+    # users without a password never touch the pool
+    assert client.post("/users", json={"name": "NoPw"}).status_code == 201
+
+
+def test_login_uses_offloaded_verify(client):
+    uid = client.post("/users", json={"name": "Login", "password": "pw"}).json()["id"]
+    assert client.post("/auth/login", json={"user_id": uid, "password": "bad"}).status_code == 401
+    assert client.post("/auth/login", json={"user_id": uid, "password": "pw"}).status_code == 200
+
+
+def test_login_recovers_from_killed_hash_worker(client):
+    uid = client.post("/users", json={"name": "Survivor", "password": "pw"}).json()["id"]
+    pool = auth._get_pool()
+    # what the OOM killer does to a worker
+    worker = next(iter(pool._processes.values()))
+    os.kill(worker.pid, signal.SIGKILL)
+    worker.join(timeout=5)
+
+    assert client.post("/auth/login", json={"user_id": uid, "password": "pw"}).status_code == 200
+    assert auth._get_pool() is not pool
+    assert client.post("/auth/login", json={"user_id": uid, "password": "bad"}).status_code == 401
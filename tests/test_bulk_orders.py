@@ -0,0 +1,108 @@
+import asyncio
+from decimal import Decimal
+
+from app import crud, main, schemas
+
+
+def test_bulk_create_orders_reports_per_row(db_session):
+    user = crud.create_user(db_session, schemas.UserCreate(name="Bulk"))
+    orders = [
+        schemas.OrderCreate(user_id=user.id, amount=Decimal("1.005")),
+        schemas.OrderCreate(user_id=9999, amount=Decimal("2.00")),
+        schemas.OrderCreate(user_id=user.id, amount=Decimal("3.333")),
+    ]
+    results = crud.bulk_create_orders(db_session, orders, chunk_size=2)
+    assert results[1] == (None, "foreign key violation: user does not exist")
+    assert results[0][1] is None and results[2][1] is None
+    # ids come back in input order, spanning both chunks
+    assert results[0][0] < results[2][0]
+
+    stored = {o.id: o.amount for o in crud.list_orders(db_session)}
+    assert stored == {results[0][0]: Decimal("1.01"), results[2][0]: Decimal("3.33")}
+
+
+def test_bulk_endpoint_json_array(client):
+    uid = client.post("/users", json={"name": "Importer"}).json()["id"]
+    payload = [
+        {"user_id": uid, "amount": "5.555"},
+        {"user_id": uid, "amount": "-1"},
+        {"user_id": 424242, "amount": "1.00"},
+        "not an order",
+    ]
+    r = client.post("/orders/bulk", json=payload)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["created"] == 1 and body["failed"] == 3
+    res = body["results"]
+    assert [x["index"] for x in res] == [0, 1, 2, 3]
+    assert res[0]["id"] and res[0]["error"] is None
+    assert res[1]["error"].startswith("amount")
+    assert "foreign key" in res[2]["error"]
+    assert res[3]["error"]
+
+    orders = client.get("/orders").json()["items"]
+    assert [o["amount"] for o in orders] == ["5.56"]
+
+
+def test_bulk_endpoint_ndjson(client):
+    uid = client.post("/users", json={"name": "Streamer"}).json()["id"]
+    lines = [f'{{"user_id": {uid}, "amount": "{i}.00"}}' for i in range(3)] + ["{broken"]
+    r = client.post(
+        "/orders/bulk",
+        content="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 200
+    body = r.json()
+    assert body["created"] == 3 and body["failed"] == 1
+    assert body["results"][3]["id"] is None
+
+
+def test_bulk_endpoint_rejects_non_array(client):
+    assert client.post("/orders/bulk", json={"user_id": 1, "amount": "1"}).status_code == 400
+
+
+def test_bulk_endpoint_row_limit(client, monkeypatch):
+    monkeypatch.setattr(main, "BULK_MAX_ROWS", 3)
+    uid = client.post("/users", json={"name": "Oversized"}).json()["id"]
+    rows = [{"user_id": uid, "amount": "1.00"}] * 4
+    r = client.post("/orders/bulk", json=rows)
+    assert r.status_code == 413 and "at most 3 rows" in r.json()["detail"]
+    assert client.post("/orders/bulk", json=rows[:3]).json()["created"] == 3
+
+    # NDJSON stops reading once the limit is passed (TestClient sends the
+    # body as one message, so drive the ASGI app directly)
+    received, sent = [], []
+    line = f'{{"user_id": {uid}, "amount": "1.00"}}\n'.encode()
+
+    async def receive():
+        received.append(1)
+        return {"type": "http.request", "body": line, "more_body": len(received) < 100}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "POST", "scheme": "http", "path": "/orders/bulk",
+        "raw_path": b"/orders/bulk", "root_path": "", "query_string": b"", "server": ("testserver", 80),
+        "client": ("testclient", 50000), "headers": [(b"content-type", b"application/x-ndjson")],
+    }
+    asyncio.run(client.app(scope, receive, send))
+    assert sent[0]["status"] == 413
+    assert len(received) == 4
+    assert len(client.get("/orders").json()["items"]) == 3
+
+
+def test_bulk_endpoint_byte_limit(client, monkeypatch):
+    monkeypatch.setattr(main, "BULK_MAX_BYTES", 64)
+    uid = client.post("/users", json={"name": "Heavy"}).json()["id"]
+    rows = [{"user_id": uid, "amount": "1.00"}] * 10
+    # refused on Content-Length before the body is read
+    r = client.post("/orders/bulk", json=rows)
+    assert r.status_code == 413 and "64 bytes" in r.json()["detail"]
+
+    # and while reading a chunked body that has no Content-Length
+    chunks = (f'{{"user_id": {uid}, "amount": "1.00"}}\n'.encode() for _ in range(10))
+    r = client.post("/orders/bulk", content=chunks, headers={"Content-Type": "application/x-ndjson"})
+    assert r.status_code == 413
+    assert client.get("/orders").json()["items"] == []
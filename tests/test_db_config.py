@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from app import db
+
+
+def test_production_profile_pragmas(monkeypatch):
+    for name in db.SQLITE_PRAGMA_NAMES:
+        monkeypatch.delenv(f"SQLITE_{name.upper()}", raising=False)
+    pragmas = db.sqlite_pragmas("production")
+    assert pragmas["foreign_keys"] == "ON"
+    assert pragmas["journal_mode"] == "WAL"
+    assert pragmas["synchronous"] == "NORMAL"
+    assert db.sqlite_pragmas("default") == {"foreign_keys": "ON"}
+
+
+def test_env_overrides_and_validation(monkeypatch):
+    monkeypatch.setenv("SQLITE_SYNCHRONOUS", "FULL")
+    assert db.sqlite_pragmas("production")["synchronous"] == "FULL"
+
+    monkeypatch.setenv("SQLITE_MMAP_SIZE", "0; DROP TABLE users")
+    with pytest.raises(ValueError):
+        db.sqlite_pragmas("production")
+    with pytest.raises(ValueError):
+        db.sqlite_pragmas("turbo")
+
+
+def test_pragmas_applied_on_connect(tmp_path, monkeypatch):
+    for name in db.SQLITE_PRAGMA_NAMES:
+        monkeypatch.delenv(f"SQLITE_{name.upper()}", raising=False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'tuned.db'}", **db._pool_args("sqlite:///x.db"))
+    pragmas = db.sqlite_pragmas("production")
+    event.listen(engine, "connect", lambda conn, rec: db.apply_sqlite_pragmas(conn, pragmas))
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+    assert engine.pool.size() == 10
+    engine.dispose()
+
+
+def test_in_memory_urls_skip_pool_sizing():
+    assert db._pool_args("sqlite://") == {}
+    assert db._pool_args("sqlite:///:memory:") == {}
@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import text
+
+from app import cache
+
+
+@pytest.fixture
+def etags(response_cache, monkeypatch):
+    monkeypatch.setattr(cache, "ETAGS", True)
+
+
+def test_etag_matching_rules():
+    assert cache.etag_matches('"a-1"', '"a-1"')
+    assert cache.etag_matches('"x", W/"a-1"', '"a-1"')
+    assert cache.etag_matches("*", '"a-1"')
+    assert not cache.etag_matches('"a-2"', '"a-1"')
+    assert not cache.etag_matches(None, '"a-1"')
+
+
+def test_conditional_get_orders(client, etags, monkeypatch):
+    uid = client.post("/users", json={"name": "Poller"}).json()["id"]
+    client.post("/orders", json={"user_id": uid, "amount": "1.00"})
+
+    r = client.get("/orders")
+    etag = r.headers["etag"]
+    assert etag.startswith('"')
+
+    # 304 must not run the query or serialize anything
+    def boom(*args, **kwargs):
+        raise AssertionError("query ran for a matching If-None-Match")
+
+    with monkeypatch.context() as m:
+        m.setattr(cache.responses, "lookup", boom)
+        m.setattr("app.crud.list_orders_rows", boom)
+        r304 = client.get("/orders", headers={"If-None-Match": etag})
+    assert r304.status_code == 304
+    assert r304.content == b""
+    assert r304.headers["etag"] == etag
+
+    client.post("/orders", json={"user_id": uid, "amount": "2.00"})
+    r2 = client.get("/orders", headers={"If-None-Match": etag})
+    assert r2.status_code == 200
+    assert r2.headers["etag"] != etag
+    assert len(r2.json()["items"]) == 2
+
+
+def test_conditional_get_user_detail(client, etags):
+    uid = client.post("/users", json={"name": "Detail"}).json()["id"]
+    etag = client.get(f"/users/{uid}").headers["etag"]
+    assert client.get(f"/users/{uid}", headers={"If-None-Match": etag}).status_code == 304
+
+    # the detail embeds orders, so an order write changes its ETag
+    client.post("/orders", json={"user_id": uid, "amount": "3.00"})
+    assert client.get(f"/users/{uid}", headers={"If-None-Match": etag}).status_code == 200
+
+    # different query strings never share an ETag
+    assert client.get(f"/users/{uid}", params={"orders_limit": 1}).headers["etag"] != etag
+
+
+def test_unseen_write_invalidates_etag_after_ttl(client, db_session, etags, monkeypatch):
+    uid = client.post("/users", json={"name": "Elsewhere"}).json()["id"]
+    etag = client.get("/orders").headers["etag"]
+
+    # a write this process never saw, e.g. from another worker or a migration script
+    db_session.execute(text("INSERT INTO orders (user_id, amount) VALUES (:u, 5)"), {"u": uid})
+    db_session.commit()
+    assert client.get("/orders", headers={"If-None-Match": etag}).status_code == 304
+
+    # once the entry has expired the body is rebuilt, so the old ETag no longer matches
+    now = cache.time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + cache.responses.ttl + 1)
+    r = client.get("/orders", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert len(r.json()["items"]) == 1
+
+
+def test_unchanged_body_revalidates_without_cache(client, etags, monkeypatch):
+    monkeypatch.setattr(cache.responses, "ttl", 0)
+    client.post("/users", json={"name": "Uncached"})
+    etag = client.get("/users").headers["etag"]
+    r = client.get("/users", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+
+
+def test_etags_off_by_default(client, env_default, monkeypatch):
+    assert env_default("app.cache", "ETAGS") == "False"
+    monkeypatch.setattr(cache, "ETAGS", False)
+    client.post("/users", json={"name": "Plain"})
+    r = client.get("/users")
+    assert "etag" not in r.headers
+    assert client.get("/users", headers={"If-None-Match": "*"}).status_code == 200
@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+
+from app import export
+
+
+def _seed(client):
+    uid = client.post("/users", json={"name": "Exporter", "email": "ex@example.com", "password": "pw"}).json()["id"]
+    for amt in ("1.005", "2.50", "3"):
+        client.post("/orders", json={"user_id": uid, "amount": amt})
+    return uid
+
+
+def test_export_orders_ndjson(client):
+    uid = _seed(client)
+    r = client.get("/export/orders")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [o["amount"] for o in rows] == ["1.01", "2.50", "3.00"]
+    assert all(o["user_id"] == uid for o in rows)
+
+
+def test_export_users_csv_omits_password_hash(client):
+    _seed(client)
+    r = client.get("/export/users", params={"format": "csv"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert rows == [{"id": "1", "name": "Exporter", "email": "ex@example.com", "role": "user"}]
+    assert "password" not in r.text
+
+
+def test_export_rejects_unknown_format(client):
+    assert client.get("/export/orders", params={"format": "xml"}).status_code == 422
+
+
+def test_chunks_are_bounded(monkeypatch):
+    monkeypatch.setattr(export, "CHUNK_ROWS", 2)
+    rows = [(i, 1, None) for i in range(5)]
+    chunks = list(export.encode(rows, ("id", "user_id", "amount"), "ndjson"))
+    assert [c.count("\n") for c in chunks] == [2, 2, 1]
+    csv_chunks = list(export.encode(rows, ("id", "user_id", "amount"), "csv"))
+    # header chunk first, then bounded row chunks
+    assert csv_chunks[0] == "id,user_id,amount\r\n"
+    assert [c.count("\r\n") for c in csv_chunks] == [1, 2, 2, 1]
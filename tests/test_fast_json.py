@@ -0,0 +1,62 @@
+from decimal import Decimal
+
+import pytest
+
+from app import cache, crud, fastjson, main, schemas
+
+NAMES = ['quote " \\ slash', "ctrl \x01\x1f\t\n", "Zoë 李小龙 😀", "</script>"]
+
+
+def _seed(db_session):
+    ids = [crud.create_user(db_session, schemas.UserCreate(name=n, email=None if i % 2 else f"u{i}@x.org")).id
+           for i, n in enumerate(NAMES * 3)]
+    amounts = ["0", "0.10", "12.345", "99999.99", "1E+2"]
+    crud.bulk_create_orders(db_session, [
+        schemas.OrderCreate(user_id=ids[i % len(ids)], amount=Decimal(a)) for i, a in enumerate(amounts * 3)
+    ])
+
+
+def _bodies(client, monkeypatch, fast: bool):
+    monkeypatch.setattr(main, "FAST_JSON", fast)
+    out = []
+    for path in ("/users", "/orders"):
+        for params in ({"paginate": "false"}, {"limit": 5}):
+            cache.responses.clear()
+            while True:
+                r = client.get(path, params=params)
+                assert r.status_code == 200
+                out.append(r.content)
+                cursor = r.json().get("next_cursor") if isinstance(r.json(), dict) else None
+                if not cursor:
+                    break
+                params = {"limit": 5, "after": cursor}
+    return out
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_fast_json_bodies_are_byte_identical(client, db_session, monkeypatch, use_orjson):
+    if use_orjson and fastjson.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(fastjson, "orjson", None)
+    _seed(db_session)
+    expected = _bodies(client, monkeypatch, False)
+    assert len(expected) > 4
+    assert _bodies(client, monkeypatch, True) == expected
+
+
+def test_fast_json_keeps_openapi_schema(monkeypatch):
+    monkeypatch.setattr(main, "FAST_JSON", False)
+    expected = main.create_app().openapi()
+    monkeypatch.setattr(main, "FAST_JSON", True)
+    assert main.create_app().openapi() == expected
+
+
+def test_rows_functions_match_entities(db_session):
+    _seed(db_session)
+    users = crud.list_users(db_session, after_id=2, limit=4)
+    rows = crud.list_users_rows(db_session, after_id=2, limit=4)
+    assert [tuple(r) for r in rows] == [(u.id, u.name, u.email, u.role) for u in users]
+    orders = crud.list_orders(db_session, user_id=users[0].id)
+    rows = crud.list_orders_rows(db_session, user_id=users[0].id)
+    assert [tuple(r) for r in rows] == [(o.id, o.user_id, o.amount) for o in orders]
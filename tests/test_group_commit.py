@@ -0,0 +1,147 @@
+import asyncio
+import threading
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import auth, config, crud, db, group_commit, instrumentation, models, schemas
+from app.db import Base
+
+
+@pytest.fixture
+def session(tmp_path):
+    # file-backed with foreign keys on, like the app's engine
+    engine = create_engine(f"sqlite:///{tmp_path / 'gc.db'}", connect_args={"check_same_thread": False}, future=True)
+    event.listen(engine, "connect", lambda conn, rec: conn.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False, future=True)()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _order(user_id, amount="1.00"):
+    return schemas.OrderCreate(user_id=user_id, amount=Decimal(amount))
+
+
+def _submit_all(db, orders, window_ms=20):
+    """Submit concurrently to a fresh writer; (results or exceptions, batches)."""
+    async def run():
+        writer = group_commit.OrderWriter(lambda: sessionmaker(bind=db.get_bind(), autoflush=False)(), window_ms=window_ms)
+        results = await asyncio.gather(*(writer.submit(o) for o in orders), return_exceptions=True)
+        await writer.close()
+        return results, writer.batches
+    return asyncio.run(run())
+
+
+def test_concurrent_orders_share_one_transaction(session):
+    uid = crud.create_user(session, schemas.UserCreate(name="Batch")).id
+    commits = []
+    event.listen(session.get_bind(), "commit", lambda conn: commits.append(1))
+
+    ids, batches = _submit_all(session, [_order(uid, f"{i}.005") for i in range(50)])
+    assert batches == 1 and len(commits) == 1
+    assert len(set(ids)) == 50
+    stored = {o.id: o.amount for o in crud.list_orders(session)}
+    assert [stored[i] for i in ids] == [crud.round_amount(Decimal(f"{i}.005")) for i in range(50)]
+    session.expire_all()
+    assert crud.order_summary(crud.get_user(session, uid))[0] == 50
+    assert crud.order_stats_drift(session) == []
+
+
+def test_errors_stay_with_their_order(session):
+    uid = crud.create_user(session, schemas.UserCreate(name="Mixed")).id
+    results, _ = _submit_all(session, [_order(uid), _order(999_999), _order(uid, "2.50")])
+    assert isinstance(results[0], int) and isinstance(results[2], int)
+    assert isinstance(results[1], ValueError) and "user does not exist" in str(results[1])
+    assert session.scalar(select(func.count()).select_from(models.Order)) == 2
+
+
+def test_failed_batch_is_retried_per_order(session):
+    # vulnerable mode skips the user check, so the bad row fails the whole
+    # transaction; the others must still be committed
+    uid = crud.create_user(session, schemas.UserCreate(name="Retry")).id
+    config.set_vulnerable(True)
+    try:
+        results, _ = _submit_all(session, [_order(uid), _order(999_999), _order(uid)])
+    finally:
+        config.set_vulnerable(False)
+    assert isinstance(results[0], int) and isinstance(results[2], int)
+    assert isinstance(results[1], ValueError) and str(results[1]) == "integrity error"
+    assert session.scalar(select(func.count()).select_from(models.Order)) == 2
+
+
+def test_batches_are_bounded_by_max_rows(session):
+    uid = crud.create_user(session, schemas.UserCreate(name="Bounded")).id
+
+    async def run():
+        writer = group_commit.OrderWriter(
+            lambda: sessionmaker(bind=session.get_bind())(), window_ms=50, max_rows=10
+        )
+        ids = await asyncio.gather(*(writer.submit(_order(uid)) for _ in range(25)))
+        await writer.close()
+        return ids, writer.batches
+
+    ids, batches = asyncio.run(run())
+    assert len(ids) == 25 and batches == 3
+
+
+def test_api_group_commit(client, monkeypatch):
+    monkeypatch.setattr(group_commit, "ENABLED", True)
+    uid = client.post("/users", json={"name": "Grouped"}).json()["id"]
+
+    r = client.post("/orders", json={"user_id": uid, "amount": "12.345"})
+    assert r.status_code == 201
+    assert r.json() == {"id": r.json()["id"], "user_id": uid, "amount": "12.35"}
+    assert client.get("/orders").json()["items"][0] == r.json()
+
+    r = client.post("/orders", json={"user_id": 999_999, "amount": "1.00"})
+    assert r.status_code == 400 and "user does not exist" in r.json()["detail"]
+
+    # concurrent requests from several threads all get their own id
+    ids, errors = [], []
+
+    def post():
+        resp = client.post("/orders", json={"user_id": uid, "amount": "1.00"})
+        (ids if resp.status_code == 201 else errors).append(resp.json())
+
+    threads = [threading.Thread(target=post) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len({o["id"] for o in ids}) == 8
+    assert client.get(f"/users/{uid}").json()["order_count"] == 9
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def test_writer_started_by_profiled_request_runs_off_loop(client, monkeypatch):
+    monkeypatch.setattr(group_commit, "ENABLED", True)
+    uid = client.post("/users", json={"name": "Profiled"}).json()["id"]
+    admin = {"Authorization": f"Bearer {auth.create_access_token(1, 'admin')}"}
+
+    calls = []
+    bulk_create_orders = crud.bulk_create_orders
+
+    def spy(*args, **kwargs):
+        calls.append((db.run_inline.get(), _on_event_loop(), instrumentation._current.get()))
+        return bulk_create_orders(*args, **kwargs)
+
+    monkeypatch.setattr(crud, "bulk_create_orders", spy)
+    # the first grouped order starts the writer inside a profiled request
+    r = client.post("/orders", params={"profile": 1}, json={"user_id": uid, "amount": "1.00"}, headers=admin)
+    assert r.headers["x-profiled-status"] == "201"
+    assert client.post("/orders", json={"user_id": uid, "amount": "2.00"}).status_code == 201
+
+    # neither batch inherited the profiled request's context
+    assert calls == [(False, False, None), (False, False, None)]
@@ -0,0 +1,91 @@
+import logging
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import auth, cache, group_commit, instrumentation
+from app.main import create_app, get_db
+
+
+@pytest.fixture
+def instrumented(db_session):
+    app = create_app(instrument=True)
+    instrumentation.instrument_engine(db_session.get_bind())
+    app.dependency_overrides[get_db] = lambda: db_session
+    instrumentation.metrics.reset()
+    cache.responses.clear()
+    auth.clear_auth_caches()
+    with TestClient(app) as c:
+        yield c
+    cache.responses.clear()
+    auth.clear_auth_caches()
+
+
+def _timing(response) -> dict:
+    """Server-Timing header -> {name: (ms, desc)}"""
+    out = {}
+    for part in response.headers["server-timing"].split(", "):
+        name, *params = part.split(";")
+        attrs = dict(p.split("=", 1) for p in params)
+        out[name] = (float(attrs["dur"]), attrs.get("desc", "").strip('"'))
+    return out
+
+
+def test_server_timing_breaks_down_a_request(instrumented):
+    uid = instrumented.post("/users", json={"name": "Timed"}).json()["id"]
+    r = instrumented.post("/orders", json={"user_id": uid, "amount": "1.00"})
+    phases = _timing(r)
+    assert {"validate", "app", "db", "commit", "total"} <= phases.keys()
+    assert int(phases["db"][1].split()[0]) >= 2  # user check, insert, summary upsert, refresh
+    assert phases["total"][0] >= phases["db"][0]
+
+    r = instrumented.get(f"/users/{uid}")
+    assert "encode" in _timing(r)
+
+
+def test_grouped_order_reports_its_batch(instrumented, monkeypatch):
+    monkeypatch.setattr(group_commit, "ENABLED", True)
+    uid = instrumented.post("/users", json={"name": "Grouped"}).json()["id"]
+    r = instrumented.post("/orders", json={"user_id": uid, "amount": "1.00"})
+    assert r.status_code == 201
+    phases = _timing(r)
+    # the writer's user check, insert and summary upsert, and its commit
+    assert int(phases["db"][1].split()[0]) >= 2
+    assert phases["commit"][0] > 0
+
+
+def test_render_phase_for_templates(instrumented):
+    assert "render" in _timing(instrumented.get("/ui/fragments/users"))
+
+
+def test_metrics_histograms_per_route(instrumented):
+    uid = instrumented.post("/users", json={"name": "Metered"}).json()["id"]
+    for _ in range(3):
+        instrumented.get(f"/users/{uid}")
+    instrumented.get("/no/such/path")
+    text = instrumented.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="GET",route="/users/{user_id}"} 3' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/users/{user_id}",le="+Inf"} 3' in text
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in text
+    assert re.search(r'http_request_phase_seconds_total\{route="/users/\{user_id\}",phase="db"\} [0-9.]+', text)
+    assert re.search(r"^db_query_duration_seconds_count [1-9]", text, re.M)
+
+
+def test_slow_queries_are_logged(instrumented, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="app.sql"):
+        instrumented.get("/users")
+    assert any("slow query" in rec.getMessage() and "FROM users" in rec.getMessage() for rec in caplog.records)
+    assert "db_slow_queries_total 0" not in instrumented.get("/metrics").text
+
+
+def test_disabled_by_default(env_default, monkeypatch, db_session):
+    assert env_default("app.instrumentation", "ENABLED", "INSTRUMENTATION") == "False"
+    monkeypatch.setattr(instrumentation, "ENABLED", False)
+    app = create_app()
+    assert instrumentation.InstrumentationMiddleware not in [m.cls for m in app.user_middleware]
+    app.dependency_overrides[get_db] = lambda: db_session
+    with TestClient(app) as c:
+        assert "server-timing" not in c.get("/users").headers
+        assert c.get("/metrics").status_code == 404
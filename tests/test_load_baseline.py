@@ -0,0 +1,50 @@
+import copy
+
+from benchmarks.load_test import compare, read_stats
+
+HEADER = ("Type,Name,Request Count,Failure Count,Median Response Time,Average Response Time,Min Response Time,"
+          "Max Response Time,Average Content Size,Requests/s,Failures/s,50%,66%,75%,80%,90%,95%,98%,99%,99.9%,99.99%,100%")
+
+
+def _baseline(tmp_path):
+    path = tmp_path / "run_stats.csv"
+    path.write_text("\n".join([
+        HEADER,
+        "GET,/users/[id],1000,0,8,9,2,70,300,40.0,0.0,8,9,10,11,14,20,30,40,60,70,70",
+        "POST,/auth/login,50,1,60,80,40,800,100,2.0,0.0,60,70,80,90,200,400,700,780,800,800,800",
+        ",Aggregated,1050,1,9,12,2,800,290,42.0,0.0,9,10,11,12,16,25,40,60,700,800,800",
+    ]))
+    return {"endpoints": read_stats(str(path))}
+
+
+def test_read_stats(tmp_path):
+    stats = _baseline(tmp_path)["endpoints"]
+    assert set(stats) == {"GET /users/[id]", "POST /auth/login", "Aggregated"}
+    assert stats["GET /users/[id]"] == {"p50": 8, "p95": 20, "p99": 40, "rps": 40.0, "requests": 1000, "failures": 0}
+
+
+def test_compare_flags_regressions_beyond_threshold(tmp_path):
+    base = _baseline(tmp_path)
+    assert compare(base, base, threshold=0.2) == []
+
+    slower = copy.deepcopy(base)
+    slower["endpoints"]["GET /users/[id]"]["p95"] = 30   # +50%, +10 ms
+    slower["endpoints"]["POST /auth/login"]["rps"] = 1.0  # -50%
+    problems = compare(base, slower, threshold=0.2)
+    assert any(p.startswith("GET /users/[id]: p95") for p in problems)
+    assert any(p.startswith("POST /auth/login: rps") for p in problems)
+
+
+def test_compare_ignores_small_absolute_changes_and_new_endpoints(tmp_path):
+    base = _baseline(tmp_path)
+    noisy = copy.deepcopy(base)
+    noisy["endpoints"]["GET /users/[id]"]["p95"] = 24  # +20% but only 4 ms
+    noisy["endpoints"]["GET /new"] = dict(noisy["endpoints"]["GET /users/[id]"], p95=900)
+    assert compare(base, noisy, threshold=0.1, min_ms=5) == []
+
+
+def test_compare_flags_new_failures(tmp_path):
+    base = _baseline(tmp_path)
+    failing = copy.deepcopy(base)
+    failing["endpoints"]["GET /users/[id]"]["failures"] = 50
+    assert compare(base, failing, threshold=0.2) == ["GET /users/[id]: failure rate 0.0% -> 5.0%"]
@@ -2,7 +2,9 @@ import os
 import sqlite3
 import tempfile
 
-from migration.migration_v1_to_v2 import migrate
+import pytest
+
+from migration.migration_v1_to_v2 import migrate, plan
 
 
 def create_v1_db(path: str):
@@ -42,3 +44,79 @@ def test_migration_adds_email_and_backfills():
             assert rows[1][1] == "Bob@example.com"
         finally:
             conn.close()
+
+
+def create_large_v1_db(path: str, rows: int):
+    create_v1_db(path)
+    conn = sqlite3.connect(path)
+    try:
+        # sparse ids, like a table that has seen deletes
+        conn.executemany("INSERT INTO users (id, name) VALUES (?, ?)", ((10 + i * 3, f"u{i}") for i in range(rows)))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _emails(db_path: str):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT name, email FROM users ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_batched_migration_matches_single_statement():
+    with tempfile.TemporaryDirectory() as tmp:
+        single, batched = os.path.join(tmp, "single.db"), os.path.join(tmp, "batched.db")
+        create_large_v1_db(single, 250)
+        create_large_v1_db(batched, 250)
+        migrate(single)
+        seen = []
+        assert migrate(batched, batch_size=40, progress=seen.append) == 252
+        assert _emails(batched) == _emails(single)
+        assert len(seen) == 7  # 252 users / 40 per batch
+        assert seen[-1]["last_id"] == seen[-1]["max_id"]
+
+
+def test_interrupted_migration_resumes_from_checkpoint():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        create_large_v1_db(db_path, 100)
+
+        def stop_after_two(status):
+            if status["updated"] >= 50:
+                raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            migrate(db_path, batch_size=25, progress=stop_after_two)
+        report = plan(db_path, batch_size=25)
+        assert report["rows_to_backfill"] == 52
+        assert report["batches"] == 3
+        assert report["resume_after_id"] > 0
+
+        resumed = []
+        assert migrate(db_path, batch_size=25, progress=resumed.append) == 52
+        assert len(resumed) == 3
+        assert all(email == f"{name}@example.com" for name, email in _emails(db_path))
+        # finished runs leave no checkpoint behind
+        assert plan(db_path)["resume_after_id"] == 0
+
+
+def test_dry_run_reports_without_writing():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        create_large_v1_db(db_path, 10)
+        report = plan(db_path, batch_size=5)
+        assert report == {
+            "total_users": 12,
+            "add_email_column": True,
+            "rows_to_backfill": 12,
+            "resume_after_id": 0,
+            "max_id": 37,
+            "batches": 3,
+        }
+        conn = sqlite3.connect(db_path)
+        try:
+            assert "email" not in [r[1] for r in conn.execute("PRAGMA table_info(users)")]
+        finally:
+            conn.close()
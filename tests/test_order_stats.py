@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+from app import crud, schemas
+
+
+def _seed(db_session):
+    a = crud.create_user(db_session, schemas.UserCreate(name="A"))
+    b = crud.create_user(db_session, schemas.UserCreate(name="B"))
+    crud.create_user(db_session, schemas.UserCreate(name="NoOrders"))
+    for uid, amt in [(a.id, "0.10"), (a.id, "0.20"), (a.id, "2.675"), (b.id, "19.99"), (b.id, "0.01")]:
+        crud.create_order(db_session, schemas.OrderCreate(user_id=uid, amount=Decimal(amt)))
+    return a.id, b.id
+
+
+def test_overall_stats_are_exact(db_session):
+    _seed(db_session)
+    stats = crud.order_stats(db_session)
+    # 0.10 + 0.20 + 2.68 + 19.99 + 0.01, with no float drift
+    assert stats.total == Decimal("22.98")
+    assert stats.count == 5
+    assert stats.min == Decimal("0.01") and stats.max == Decimal("19.99")
+    assert stats.avg == Decimal("4.60")  # 22.98 / 5 = 4.596 -> HALF_UP
+
+
+def test_stats_by_user_and_amount_range(db_session):
+    a, b = _seed(db_session)
+    rows = {r.user_id: r for r in crud.order_stats_by_user(db_session)}
+    assert set(rows) == {a, b}
+    assert rows[a].total == Decimal("2.98") and rows[a].count == 3
+    assert rows[b].avg == Decimal("10.00")
+
+    ranged = crud.order_stats_by_user(db_session, min_amount=Decimal("0.20"), max_amount=Decimal("5"))
+    assert [(r.user_id, r.count, r.total) for r in ranged] == [(a, 2, Decimal("2.88"))]
+
+    empty = crud.order_stats(db_session, user_id=9999)
+    assert empty.count == 0 and empty.total == Decimal("0") and empty.avg is None
+
+
+def test_stats_endpoints_match_client_side_sum(client):
+    uids = [client.post("/users", json={"name": f"S{i}"}).json()["id"] for i in range(3)]
+    for i in range(9):
+        client.post("/orders", json={"user_id": uids[i % 3], "amount": f"{i}.335"})
+
+    orders = client.get("/orders", params={"paginate": "false"}).json()
+    expected = sum(Decimal(o["amount"]) for o in orders)
+    overall = client.get("/stats/orders").json()
+    assert Decimal(overall["total"]) == expected and overall["count"] == 9
+
+    page = client.get("/stats/orders/by-user", params={"limit": 2}).json()
+    assert [r["user_id"] for r in page["items"]] == uids[:2]
+    rest = client.get("/stats/orders/by-user", params={"limit": 2, "after": page["next_cursor"]}).json()
+    assert [r["user_id"] for r in rest["items"]] == uids[2:]
+    assert rest["next_cursor"] is None
+
+    one = client.get("/stats/orders", params={"user_id": uids[0]}).json()
+    assert Decimal(one["total"]) == sum(Decimal(o["amount"]) for o in orders if o["user_id"] == uids[0])
@@ -0,0 +1,102 @@
+import os
+import random
+import tempfile
+from decimal import Decimal
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+from app.db import Base
+from migration.rebuild_order_stats import check, rebuild
+
+
+def _summary(db_session, user_id):
+    return crud.order_summary(crud.get_user_with_orders(db_session, user_id))
+
+
+def test_summary_follows_every_order_write(db_session):
+    a = crud.create_user(db_session, schemas.UserCreate(name="A")).id
+    b = crud.create_user(db_session, schemas.UserCreate(name="B")).id
+    first = crud.create_order(db_session, schemas.OrderCreate(user_id=a, amount=Decimal("0.10")))
+    crud.bulk_create_orders(
+        db_session, [schemas.OrderCreate(user_id=uid, amount=Decimal("2.675")) for uid in (a, a, b)]
+    )
+    assert _summary(db_session, a) == (3, Decimal("5.46"))
+
+    crud.update_order(db_session, first.id, amount="1.00")
+    assert _summary(db_session, a) == (3, Decimal("6.36"))
+
+    last = db_session.get(models.UserOrderStats, a).last_order_id
+    crud.delete_order(db_session, last)
+    assert _summary(db_session, a) == (2, Decimal("3.68"))
+    assert db_session.get(models.UserOrderStats, a).last_order_id < last
+
+    crud.delete_user(db_session, b)
+    assert db_session.get(models.UserOrderStats, b) is None
+    assert crud.order_stats_drift(db_session) == []
+
+
+def test_random_writes_stay_consistent(db_session):
+    rng = random.Random(12)
+    users = [crud.create_user(db_session, schemas.UserCreate(name=f"u{i}")).id for i in range(5)]
+    orders = []
+    for _ in range(200):
+        op = rng.random()
+        if op < 0.5 or not orders:
+            amount = Decimal(rng.randint(0, 100000)) / 1000
+            orders.append(crud.create_order(db_session, schemas.OrderCreate(user_id=rng.choice(users), amount=amount)).id)
+        elif op < 0.75:
+            crud.update_order(db_session, rng.choice(orders), amount=str(Decimal(rng.randint(0, 9999)) / 100))
+        else:
+            crud.delete_order(db_session, orders.pop(rng.randrange(len(orders))))
+    assert crud.order_stats_drift(db_session) == []
+    by_user = {s.user_id: s for s in crud.order_stats_by_user(db_session)}
+    for uid in users:
+        count, total = _summary(db_session, uid)
+        expected = by_user.get(uid)
+        assert count == (expected.count if expected else 0)
+        assert total == (expected.total if expected else 0)
+
+
+def test_rebuild_repairs_drift(db_session):
+    uid = crud.create_user(db_session, schemas.UserCreate(name="A")).id
+    crud.create_order(db_session, schemas.OrderCreate(user_id=uid, amount=Decimal("5")))
+    db_session.execute(text("UPDATE user_order_stats SET total_cents = 1"))
+    db_session.commit()
+    assert crud.order_stats_drift(db_session) == [uid]
+    crud.rebuild_order_stats(db_session)
+    assert crud.order_stats_drift(db_session) == []
+    assert _summary(db_session, uid) == (1, Decimal("5.00"))
+
+
+def test_user_detail_shows_totals(client):
+    uid = client.post("/users", json={"name": "Totals"}).json()["id"]
+    for amt in ("1.25", "2.50"):
+        client.post("/orders", json={"user_id": uid, "amount": amt})
+    body = client.get(f"/users/{uid}", params={"orders_limit": 1}).json()
+    assert body["order_count"] == 2 and body["order_total"] == "3.75"
+    assert len(body["orders"]) == 1
+    assert "2 orders, total 3.75" in client.get(f"/ui/users/{uid}").text
+
+
+def test_backfill_and_rebuild_command_on_existing_db():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "app.db")
+        engine = create_engine(f"sqlite:///{path}", future=True)
+        # a database from before the summary table existed
+        Base.metadata.create_all(bind=engine, tables=[models.User.__table__, models.Order.__table__])
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (id, name, role) VALUES (1, 'A', 'user')"))
+            conn.execute(text("INSERT INTO orders (user_id, amount) VALUES (1, 1.10), (1, 2.20)"))
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine, future=True)()
+        assert _summary(db, 1) == (2, Decimal("3.30"))
+        db.close()
+
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM user_order_stats"))
+        engine.dispose()
+        assert check(path) == [1]
+        rebuild(path)
+        assert check(path) == []
@@ -0,0 +1,52 @@
+import pytest
+
+from app.utils import encode_cursor, decode_cursor
+
+
+def test_cursor_roundtrip():
+    assert decode_cursor(encode_cursor(42)) == 42
+
+
+@pytest.mark.parametrize("bad", ["", "not-a-cursor", encode_cursor(1)[:-1] + "!"])
+def test_cursor_rejects_garbage(bad):
+    with pytest.raises(ValueError):
+        decode_cursor(bad)
+
+
+def test_orders_keyset_pages_cover_all_rows(client):
+    uid = client.post("/users", json={"name": "Pager"}).json()["id"]
+    created = [client.post("/orders", json={"user_id": uid, "amount": f"{i}.00"}).json()["id"] for i in range(7)]
+
+    seen = []
+    params = {"limit": 3}
+    while True:
+        r = client.get("/orders", params=params)
+        assert r.status_code == 200
+        page = r.json()
+        assert len(page["items"]) <= 3
+        seen.extend(o["id"] for o in page["items"])
+        if page["next_cursor"] is None:
+            break
+        params = {"limit": 3, "after": page["next_cursor"]}
+    assert seen == created
+
+
+def test_users_page_and_legacy_list(client):
+    for name in ("U1", "U2", "U3"):
+        client.post("/users", json={"name": name})
+
+    page = client.get("/users", params={"limit": 2}).json()
+    assert [u["name"] for u in page["items"]] == ["U1", "U2"]
+    assert page["next_cursor"]
+
+    last = client.get("/users", params={"limit": 2, "after": page["next_cursor"]}).json()
+    assert [u["name"] for u in last["items"]] == ["U3"]
+    assert last["next_cursor"] is None
+
+    legacy = client.get("/users", params={"paginate": "false"}).json()
+    assert [u["name"] for u in legacy] == ["U1", "U2", "U3"]
+
+
+def test_page_size_cap_and_bad_cursor(client):
+    assert client.get("/orders", params={"limit": 10_000}).status_code == 422
+    assert client.get("/orders", params={"after": "garbage"}).status_code == 400
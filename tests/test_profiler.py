@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from app import auth, db, profiler
+
+
+def _bearer(role):
+    return {"Authorization": f"Bearer {auth.create_access_token(1, role)}"}
+
+
+def _spin(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_collapses_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        out = profiler.sample(0.2, interval=0.002)
+    finally:
+        stop.set()
+        worker.join()
+    lines = [line for line in out.splitlines() if line.startswith("spinner;")]
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert stack.split(";")[-1].startswith("_spin (")
+
+
+def test_profile_endpoint_requires_admin_token(client):
+    assert client.get("/debug/profile", params={"seconds": 0.01}).status_code == 401
+    r = client.get("/debug/profile", params={"seconds": 0.01}, headers=_bearer("user"))
+    assert r.status_code == 403
+    # the acting-user header is not enough
+    assert client.get("/debug/profile", params={"seconds": 0.01}, headers={"X-Acting-User-Id": "1"}).status_code == 401
+
+
+def test_profile_endpoint_returns_collapsed_stacks(client):
+    r = client.get("/debug/profile", params={"seconds": 0.1, "interval_ms": 2}, headers=_bearer("admin"))
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    for line in r.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert ";" in stack and int(count) >= 1
+
+
+def test_one_sampling_run_at_a_time(client):
+    with profiler.sampling:
+        r = client.get("/debug/profile", params={"seconds": 0.01}, headers=_bearer("admin"))
+    assert r.status_code == 409
+
+
+def test_profile_single_request(client):
+    client.post("/users", json={"name": "Profiled"})
+    r = client.get("/users", params={"profile": 1}, headers=_bearer("admin"))
+    assert r.status_code == 200
+    assert r.headers["x-profiled-status"] == "200"
+    assert "function calls" in r.text
+    # run_db ran inline, so the crud call is in the profile
+    assert "list_users" in r.text
+
+    r = client.get("/users", params={"profile": 1, "profile_sort": "tottime"}, headers=_bearer("admin"))
+    assert "Ordered by: internal time" in r.text
+
+
+def test_profile_flag_ignored_without_admin(client):
+    client.post("/users", json={"name": "Plain"})
+    for headers in ({}, _bearer("user")):
+        r = client.get("/users", params={"profile": 1}, headers=headers)
+        assert r.headers["content-type"] == "application/json"
+        assert "x-profiled-status" not in r.headers
+
+
+
+def test_one_profiled_request_at_a_time(client):
+    with profiler.profiling:
+        r = client.get("/users", params={"profile": 1}, headers=_bearer("admin"))
+    assert r.status_code == 409
+    assert client.get("/users", params={"profile": 1}, headers=_bearer("admin")).status_code == 200
+
+
+def test_profiler_state_restored_when_enable_fails(client, monkeypatch):
+    # Python 3.12+ refuses a second active profiler
+    def busy(self):
+        raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profiler.cProfile.Profile, "enable", busy)
+    with pytest.raises(ValueError):
+        client.get("/users", params={"profile": 1}, headers=_bearer("admin"))
+    assert not profiler.profiling.locked()
+    assert db.run_inline.get() is False
@@ -0,0 +1,57 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app import crud, schemas
+
+
+@pytest.fixture
+def seeded(db_session):
+    ids = [crud.create_user(db_session, schemas.UserCreate(name=f"Proj{i}", password=None)).id for i in range(5)]
+    crud.bulk_create_orders(db_session, [schemas.OrderCreate(user_id=uid, amount=Decimal("1.50")) for uid in ids])
+    db_session.expunge_all()
+    return ids
+
+
+@pytest.fixture
+def statements(db_session):
+    seen = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", _record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", _record)
+
+
+@pytest.mark.parametrize("path", [
+    "/users", "/users?paginate=false", "/orders", "/orders?paginate=false",
+    "/search?q=Proj", "/search_vuln?q=Proj1", "/ui", "/ui?q=Proj", "/ui/fragments/users", "/ui/fragments/orders",
+])
+def test_read_paths_load_columns_not_entities(client, db_session, seeded, statements, path):
+    r = client.get(path)
+    assert r.status_code == 200
+    # nothing was hydrated into the session
+    assert len(db_session.identity_map) == 0
+    assert statements and not any("password_hash" in s for s in statements)
+
+
+def test_row_functions_match_entity_functions(db_session, seeded):
+    def as_tuples(users):
+        return [(u.id, u.name, u.email, u.role) for u in users]
+
+    for q in ("Proj", "roj3", "Pr", "nobody"):
+        assert [tuple(r) for r in crud.search_users_rows(db_session, q)] == as_tuples(crud.search_users(db_session, q))
+    assert len(crud.search_users_rows(db_session, "Proj", limit=2)) == 2
+    assert [tuple(r) for r in crud.find_users_by_name_rows(db_session, "Proj2")] == as_tuples(
+        crud.find_users_by_name(db_session, "Proj2")
+    )
+
+
+def test_search_results_still_serialize(client, seeded):
+    body = client.get("/search", params={"q": "Proj"}).json()
+    assert [u["name"] for u in body] == [f"Proj{i}" for i in range(5)]
+    assert set(body[0]) == {"id", "name", "email", "role"}
@@ -0,0 +1,58 @@
+import pytest
+
+from app import crud, schemas
+
+
+def _seed_user_with_orders(db_session, n=5):
+    user = crud.create_user(db_session, schemas.UserCreate(name="Heavy"))
+    for i in range(n):
+        crud.create_order(db_session, schemas.OrderCreate(user_id=user.id, amount=f"{i}.10"))
+    uid = user.id
+    # start every measurement from a cold identity map
+    db_session.expunge_all()
+    return uid
+
+
+@pytest.mark.parametrize("loader,expected", [("selectin", 2), ("joined", 1)])
+def test_get_user_with_orders_loader_strategies(db_session, assert_num_queries, loader, expected):
+    uid = _seed_user_with_orders(db_session)
+    with assert_num_queries(expected):
+        user = crud.get_user_with_orders(db_session, uid, loader=loader)
+        assert len(user.orders) == 5
+
+
+def test_unknown_loader_rejected(db_session):
+    with pytest.raises(ValueError):
+        crud.get_user_with_orders(db_session, 1, loader="lazy")
+
+
+def test_user_detail_api_query_count(client, db_session, assert_num_queries):
+    uid = _seed_user_with_orders(db_session)
+    with assert_num_queries(2):
+        r = client.get(f"/users/{uid}")
+    assert r.status_code == 200
+    assert len(r.json()["orders"]) == 5
+
+    db_session.expunge_all()
+    with assert_num_queries(2):
+        r = client.get(f"/users/{uid}", params={"paginate": "false"})
+    assert len(r.json()["orders"]) == 5
+
+
+def test_user_detail_ui_query_count(client, db_session, assert_num_queries):
+    uid = _seed_user_with_orders(db_session)
+    with assert_num_queries(2):
+        r = client.get(f"/ui/users/{uid}")
+    assert r.status_code == 200
+    assert "4.10" in r.text
+
+
+def test_user_detail_embeds_paginated_orders(client, db_session):
+    uid = _seed_user_with_orders(db_session)
+    first = client.get(f"/users/{uid}", params={"orders_limit": 3}).json()
+    assert [o["amount"] for o in first["orders"]] == ["0.10", "1.10", "2.10"]
+    assert first["orders_next_cursor"]
+
+    rest = client.get(f"/users/{uid}", params={"orders_limit": 3, "orders_after": first["orders_next_cursor"]}).json()
+    assert [o["amount"] for o in rest["orders"]] == ["3.10", "4.10"]
+    assert rest["orders_next_cursor"] is None
@@ -0,0 +1,96 @@
+import threading
+
+from app import cache
+from app.cache import ResponseCache
+
+
+def test_lru_eviction_and_byte_bound():
+    c = ResponseCache(ttl=60, max_entries=2, max_bytes=1000)
+    c.set("a", b"1", {})
+    c.set("b", b"2", {})
+    assert c.get("a") == b"1"  # a is now most recently used
+    c.set("c", b"3", {})
+    assert c.get("b") is None
+    assert c.get("a") == b"1" and c.get("c") == b"3"
+    assert c.stats()["evictions"] == 1
+
+    c.set("big", b"x" * 251, {})  # over max_bytes // 4: never cached
+    assert c.get("big") is None
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    c = ResponseCache(ttl=5, max_entries=10, max_bytes=1000)
+    c.set("k", b"v", {})
+    now[0] += 4.9
+    assert c.get("k") == b"v"
+    now[0] += 0.2
+    assert c.get("k") is None
+
+
+def test_invalidation_is_per_table():
+    c = ResponseCache(ttl=60, max_entries=10, max_bytes=1000)
+    c.set("orders", b"o", c.versions(["orders"]))
+    c.set("users", b"u", c.versions(["users"]))
+    c.invalidate("orders")
+    assert c.get("orders") is None
+    assert c.get("users") == b"u"
+
+
+def test_body_built_across_a_write_is_not_cached():
+    c = ResponseCache(ttl=60, max_entries=10, max_bytes=1000)
+    versions = c.versions(["orders"])
+    c.invalidate("orders")  # write commits while the body is being built
+    c.set("orders", b"stale", versions)
+    assert c.get("orders") is None
+
+
+def test_concurrent_access_keeps_accounting_consistent():
+    c = ResponseCache(ttl=60, max_entries=50, max_bytes=10_000)
+
+    def worker(n):
+        for i in range(500):
+            key = f"k{(i * n) % 80}"
+            if c.get(key) is None:
+                c.set(key, b"x" * (i % 7 + 1), c.versions(["orders"]))
+            if i % 50 == 0:
+                c.invalidate("orders")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(1, 9)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = c.stats()
+    assert stats["entries"] <= 50
+    assert stats["bytes"] == sum(len(e[2]) for e in c._entries.values())
+
+
+def test_read_endpoints_hit_and_invalidate(client, response_cache):
+    uid = client.post("/users", json={"name": "Cached"}).json()["id"]
+    client.post("/orders", json={"user_id": uid, "amount": "1.00"})
+
+    assert client.get("/orders").headers["x-cache"] == "MISS"
+    r = client.get("/orders")
+    assert r.headers["x-cache"] == "HIT"
+    assert len(r.json()["items"]) == 1
+    assert client.get("/users").headers["x-cache"] == "MISS"
+    assert client.get(f"/users/{uid}").headers["x-cache"] == "MISS"
+
+    # a new order invalidates order-derived responses only
+    client.post("/orders", json={"user_id": uid, "amount": "2.00"})
+    r = client.get("/orders")
+    assert r.headers["x-cache"] == "MISS" and len(r.json()["items"]) == 2
+    assert client.get("/users").headers["x-cache"] == "HIT"
+    detail = client.get(f"/users/{uid}")
+    assert detail.headers["x-cache"] == "MISS" and len(detail.json()["orders"]) == 2
+
+    # different query strings are different entries
+    assert client.get("/orders", params={"limit": 1}).headers["x-cache"] == "MISS"
+
+    client.put(f"/users/{uid}", json={"name": "Renamed"})
+    assert client.get("/users").json()["items"][0]["name"] == "Renamed"
+
+    stats = client.get("/cache/stats").json()
+    assert stats["hits"] >= 2 and stats["entries"] >= 1
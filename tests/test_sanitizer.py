@@ -14,4 +14,35 @@ def test_sanitize_strips_sql_meta():
     # separators removed, core words may remain but punctuation should be gone
     assert ";" not in out
     assert "--" not in out
-    assert "drop" in out.lower()
\ No newline at end of file
+    assert "drop" in out.lower()
+
+def test_sanitizer_matches_bleach_reference():
+    from benchmarks.sanitizer import corpus, reference
+    from app.utils import Sanitizer
+
+    sanitizer = Sanitizer(cache_size=64)
+    for value in corpus(size=500, seed=3) * 2:
+        assert sanitizer(value) == reference(value), repr(value)
+
+
+def test_plain_input_skips_html_parsing():
+    from app.utils import Sanitizer
+
+    sanitizer = Sanitizer()
+
+    def fail():
+        raise AssertionError("HTML parser used for plain input")
+
+    sanitizer._cleaner = fail
+    assert sanitizer("  Zoë; O'Brien -- ") == "Zoë O'Brien"
+
+
+def test_sanitizer_cache_is_bounded():
+    from app.utils import Sanitizer
+
+    sanitizer = Sanitizer(cache_size=8)
+    for i in range(20):
+        sanitizer(f"<span>{i}</span>")
+    assert sanitizer("<span>19</span>") == "19"
+    info = sanitizer.cache_info()
+    assert info.currsize == 8 and info.hits == 1
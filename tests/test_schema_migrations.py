@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import tempfile
+import threading
+
+from sqlalchemy import create_engine, event
+
+from app import migrations
+from tests.test_migration import create_v1_db
+
+
+def _engine(path):
+    return create_engine(f"sqlite:///{path}", connect_args={"timeout": 30}, future=True)
+
+
+def test_fresh_database_is_created_then_left_alone():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(os.path.join(tmp, "app.db"))
+        assert migrations.upgrade(engine) == [m.__name__ for m in migrations.MIGRATIONS]
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        assert migrations.upgrade(engine) == []
+        # has_table + the version read; nothing that scans a table
+        assert len(statements) <= 2
+        assert not any("users" in s or "orders" in s for s in statements)
+        engine.dispose()
+
+
+def test_v1_database_is_upgraded():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "v1.db")
+        create_v1_db(path)
+        engine = _engine(path)
+        migrations.upgrade(engine)
+        engine.dispose()
+
+        conn = sqlite3.connect(path)
+        try:
+            cols = {r[1] for r in conn.execute("PRAGMA table_info(users)")}
+            assert {"email", "role", "password_hash"} <= cols
+            rows = conn.execute("SELECT name, email, role FROM users ORDER BY id").fetchall()
+            assert rows[:2] == [("Alice", "Alice@example.com", "user"), ("Bob", "Bob@example.com", "user")]
+            assert rows[2][0] == "admin" and rows[2][2] == "admin"
+            # tables added since V1 are created and backfilled
+            assert conn.execute("SELECT SUM(order_count) FROM user_order_stats").fetchone()[0] == 2
+            assert conn.execute("SELECT version FROM schema_version").fetchone()[0] == migrations.LATEST
+        finally:
+            conn.close()
+
+
+def test_existing_v2_database_keeps_null_emails():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "v2.db")
+        engine = _engine(path)
+        # a database created by create_all before the runner existed
+        with engine.begin() as conn:
+            migrations.create_tables(conn)
+            conn.exec_driver_sql("INSERT INTO users (name, email, role) VALUES ('NoMail', NULL, 'admin')")
+        migrations.upgrade(engine)
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT email FROM users").fetchall() == [(None,)]
+        engine.dispose()
+
+
+def test_concurrent_workers_apply_each_step_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "app.db")
+        results, errors = [], []
+
+        def worker():
+            engine = _engine(path)
+            try:
+                results.append(migrations.upgrade(engine))
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+            finally:
+                engine.dispose()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        applied = [name for r in results for name in r]
+        assert sorted(applied) == sorted(m.__name__ for m in migrations.MIGRATIONS)
@@ -0,0 +1,60 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, schemas, search
+from app.db import Base
+
+
+def _names(users):
+    return [u.name for u in users]
+
+
+def test_fts_index_created_with_tables(db_session):
+    assert search.is_available(db_session.connection())
+
+
+def test_search_matches_like_semantics(db_session):
+    for name in ("Alice Smith", "alicia", "Bob", "MALICE"):
+        crud.create_user(db_session, schemas.UserCreate(name=name))
+    assert sorted(_names(crud.search_users(db_session, "lic"))) == ["Alice Smith", "MALICE", "alicia"]
+    assert _names(crud.search_users(db_session, "smith")) == ["Alice Smith"]
+    # two characters: served by the LIKE fallback
+    assert _names(crud.search_users(db_session, "Bo")) == ["Bob"]
+    assert crud.search_users(db_session, '" OR name:*') == []
+    assert len(crud.search_users(db_session, "lic", limit=2)) == 2
+
+
+def test_index_follows_updates_and_deletes(db_session):
+    user = crud.create_user(db_session, schemas.UserCreate(name="Original"))
+    crud.update_user(db_session, user.id, name="Renamed")
+    assert crud.search_users(db_session, "Original") == []
+    assert _names(crud.search_users(db_session, "Renamed")) == ["Renamed"]
+    crud.delete_user(db_session, user.id)
+    assert crud.search_users(db_session, "Renamed") == []
+
+
+def test_existing_rows_backfilled_and_like_fallback(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT, role TEXT NOT NULL DEFAULT 'user', password_hash TEXT)"))
+        conn.execute(text("INSERT INTO users (name) VALUES ('Legacy Larry'), ('Other')"))
+    db = sessionmaker(bind=engine)()
+
+    # before the index exists, search scans with LIKE
+    assert not search.is_available(db.connection())
+    assert _names(crud.search_users(db, "larry")) == ["Legacy Larry"]
+    db.close()
+
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    assert search.is_available(db.connection())
+    assert _names(crud.search_users(db, "larry")) == ["Legacy Larry"]
+    db.close()
+    engine.dispose()
+
+
+def test_search_endpoint_limit(client):
+    for i in range(5):
+        client.post("/users", json={"name": f"Searchable {i}"})
+    assert len(client.get("/search", params={"q": "Searchable"}).json()) == 5
+    assert len(client.get("/search", params={"q": "Searchable", "limit": 2}).json()) == 2
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from app.main import create_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# cumulative `python -X importtime` budget for `import app.main`; generous so
+# slow CI machines pass, tight enough to catch an eager heavy import or DDL
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "2500"))
+# must not be imported until a request needs them
+LAZY_MODULES = ("bleach", "passlib.context", "jinja2")
+
+
+def _python(tmp_path, code, *args):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'app.db'}", "DB_ASYNC": "0"}
+    return subprocess.run(
+        [sys.executable, *args, "-c", textwrap.dedent(code)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def test_import_is_cheap_and_does_no_io(tmp_path):
+    proc = _python(tmp_path, f"""
+        import sys
+        import app.main
+        print([m for m in {LAZY_MODULES!r} if m in sys.modules])
+    """, "-X", "importtime")
+    assert proc.stdout.strip() == "[]"
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cum, name = line.split("|")
+            if cum.strip().isdigit():
+                cumulative[name.strip()] = int(cum) / 1000
+    assert cumulative["app.main"] < IMPORT_BUDGET_MS, f"import app.main took {cumulative['app.main']:.0f} ms"
+    assert not (tmp_path / "app.db").exists()
+
+
+def test_lifespan_migrates_the_database(tmp_path):
+    proc = _python(tmp_path, """
+        from fastapi.testclient import TestClient
+        from app import migrations
+        from app.db import engine
+        from app.main import app
+        with TestClient(app):
+            pass
+        with engine.connect() as conn:
+            print(migrations.current_version(conn) == migrations.LATEST)
+    """)
+    assert proc.stdout.strip().splitlines()[-1] == "True"
+
+
+def test_api_only_app_has_no_ui_routes():
+    paths = {route.path for route in create_app(ui=False).routes}
+    assert "/users" in paths
+    assert not any(p.startswith("/ui") or p == "/static" for p in paths)
@@ -15,7 +15,7 @@ def test_ui_create_user_and_order_flow(client):
 
     # Find user id via API for convenience
     r_users = client.get("/users")
-    user = [u for u in r_users.json() if u["name"] == "UI Alice"][0]
+    user = [u for u in r_users.json()["items"] if u["name"] == "UI Alice"][0]
 
     # Create order via UI
     r = client.post("/ui/orders", data={"user_id": user["id"], "amount": "7.235"}, allow_redirects=False)
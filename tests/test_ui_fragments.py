@@ -0,0 +1,57 @@
+import re
+from decimal import Decimal
+
+from app import crud, schemas
+from app.main import UI_PAGE_SIZE
+
+
+def _seed(db_session, n):
+    ids = [crud.create_user(db_session, schemas.UserCreate(name=f"Row{i:03d}")).id for i in range(n)]
+    crud.bulk_create_orders(db_session, [schemas.OrderCreate(user_id=ids[0], amount=Decimal(i)) for i in range(n)])
+    return ids
+
+
+def _next_url(html):
+    match = re.search(r'data-url="([^"]+)"', html)
+    return match.group(1) if match else None
+
+
+def test_index_renders_first_page_only(client, db_session):
+    _seed(db_session, UI_PAGE_SIZE + 10)
+    r = client.get("/ui")
+    assert r.status_code == 200
+    # streamed, not buffered into one body with a length
+    assert "content-length" not in r.headers
+    assert f"Row{UI_PAGE_SIZE - 1:03d}" in r.text
+    assert f"Row{UI_PAGE_SIZE:03d}" not in r.text
+    assert r.text.count('class="delete-order"') == UI_PAGE_SIZE
+    assert "/ui/fragments/users?after=" in r.text and "/ui/fragments/orders?after=" in r.text
+
+
+def test_fragments_walk_every_row_once(client, db_session):
+    _seed(db_session, UI_PAGE_SIZE * 2 + 5)
+    url = _next_url(client.get("/ui/fragments/users").text)
+    seen = []
+    while url:
+        html = client.get(url).text
+        assert "<html" not in html  # a fragment, not a page
+        seen += re.findall(r">\d+ - (Row\d+)</a>", html)
+        url = _next_url(html)
+    assert seen == [f"Row{i:03d}" for i in range(UI_PAGE_SIZE, UI_PAGE_SIZE * 2 + 5)]
+
+
+def test_last_fragment_has_no_button_and_no_placeholder(client, db_session):
+    _seed(db_session, 3)
+    html = client.get("/ui/fragments/orders").text
+    assert html.count("data-order-id") == 3
+    assert _next_url(html) is None
+    empty = client.get("/ui/fragments/orders", params={"after": "aWQ6OTk5"}).text
+    assert "No orders" not in empty
+
+
+def test_error_rerender_is_bounded(client, db_session):
+    _seed(db_session, UI_PAGE_SIZE + 10)
+    r = client.post("/ui/orders", data={"user_id": 999999, "amount": "3.00"})
+    assert r.status_code == 400
+    assert "foreign key" in r.text.lower()
+    assert r.text.count('class="delete-user"') == UI_PAGE_SIZE
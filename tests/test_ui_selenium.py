@@ -86,7 +86,7 @@ def test_ui_create_user_and_order(browser, live_server):
 
     # Find user id via API
     import requests
-    users = requests.get(f"{live_server}/users").json()
+    users = requests.get(f"{live_server}/users", params={"paginate": "false"}).json()
     uid = [u["id"] for u in users if u["name"] == "S-User"][0]
 
     # Create order
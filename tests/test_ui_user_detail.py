@@ -26,7 +26,7 @@ def test_user_detail_create_and_delete_order():
 
     # Delete order via API
     # find order id from orders endpoint
-    orders = client.get('/orders').json()
+    orders = client.get('/orders', params={'paginate': 'false'}).json()
     oids = [o['id'] for o in orders if o['user_id'] == uid]
     assert oids, 'no order created'
     oid = oids[0]